@@ -1,49 +1,119 @@
 """Authentication endpoints."""
 
+import secrets
+import time
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.revocation import revocation_store
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    PasswordHashPoolFull,
+    password_pool,
     create_access_token,
     create_refresh_token,
     decode_token,
 )
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token
+from app.schemas.user import (
+    RefreshRequest,
+    Token,
+    UserCreate,
+    UserResponse,
+    UserUpdate,
+)
+from app.services.principal_cache import (
+    Principal,
+    get_principal,
+    invalidate_principal,
+    revoke_user_tokens,
+)
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    """Get current authenticated user."""
-    credentials_exception = HTTPException(
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _credentials_error(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+        detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    payload = decode_token(token)
-    if payload is None:
-        raise credentials_exception
+
+async def _revoke_session(session_id: str) -> None:
+    """Revoke a login session for as long as its refresh tokens can live."""
+    expires_at = time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    await revocation_store.revoke(session_id, expires_at)
+
+
+def _issue_tokens(user: User | Principal, session_id: str) -> Token:
+    return Token(
+        access_token=create_access_token(
+            user.id, epoch=user.token_epoch, session_id=session_id
+        ),
+        refresh_token=create_refresh_token(
+            user.id, epoch=user.token_epoch, session_id=session_id
+        ),
+    )
+
+
+async def _token_principal(
+    db: AsyncSession,
+    payload: dict | None,
+    token_type: str,
+) -> Principal | None:
+    """The active user a decoded token belongs to, or None if it is not valid.
+
+    Rejects tokens of the wrong type, tokens minted before the user's
+    latest epoch bump and tokens of a revoked login session.
+    """
+    if payload is None or payload.get("type") != token_type:
+        return None
 
     user_id = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        return None
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    user = await get_principal(db, int(user_id))
 
     if user is None or not user.is_active:
-        raise credentials_exception
+        return None
+
+    if payload.get("ep", 0) != user.token_epoch:
+        return None
+
+    session_id = payload.get("sid")
+    if session_id and await revocation_store.is_revoked(session_id):
+        return None
+
+    return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """Get current authenticated user.
+
+    Served from the principal and token caches, so a warm request runs
+    no queries.
+    """
+    user = await _token_principal(db, decode_token(token), "access")
+    if user is None:
+        raise _credentials_error()
 
     return user
 
@@ -61,9 +131,14 @@ async def register(
             detail="Email already registered",
         )
 
+    try:
+        hashed_password = await password_pool.hash(user_data.password)
+    except PasswordHashPoolFull:
+        raise _hashing_busy()
+
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         full_name=user_data.full_name,
     )
     db.add(user)
@@ -81,7 +156,15 @@ async def login(
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        if user is None:
+            valid = await password_pool.reject()
+        else:
+            valid = await password_pool.verify(form_data.password, user.hashed_password)
+    except PasswordHashPoolFull:
+        raise _hashing_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -94,13 +177,109 @@ async def login(
             detail="Inactive user",
         )
 
-    return Token(
-        access_token=create_access_token(user.id),
-        refresh_token=create_refresh_token(user.id),
-    )
+    return _issue_tokens(user, secrets.token_urlsafe(16))
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: RefreshRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Exchange a refresh token for a new access and refresh token pair.
+
+    Each refresh token works once. Presenting one that was already
+    rotated means it leaked, so its whole login session is revoked.
+    """
+    payload = decode_token(request.refresh_token)
+    user = await _token_principal(db, payload, "refresh")
+    if user is None or "jti" not in payload:
+        raise _credentials_error()
+
+    session_id = payload.get("sid")
+    if not await revocation_store.revoke(payload["jti"], payload["exp"]):
+        if session_id:
+            await _revoke_session(session_id)
+        else:
+            await revoke_user_tokens(db, user.id)
+        raise _credentials_error("Refresh token reuse detected")
+
+    return _issue_tokens(user, session_id or secrets.token_urlsafe(16))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Revoke the login session the presented token belongs to.
+
+    The user's other sessions stay signed in. Tokens issued before
+    sessions were tracked have no ``sid``, so those revoke every token
+    of the user instead.
+    """
+    session_id = decode_token(token).get("sid")
+    if session_id:
+        await _revoke_session(session_id)
+    else:
+        await revoke_user_tokens(db, current_user.id)
+
+
+@router.get("/password-pool/stats")
+async def get_password_pool_stats():
+    """Password hashing pool concurrency and queueing metrics."""
+    return password_pool.stats()
+
+
+@router.get("/revocations/stats")
+async def get_revocation_stats():
+    """Token revocation store size and prefilter hit metrics."""
+    return revocation_store.stats()
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: Principal = Depends(get_current_user)):
     """Get current user info."""
     return current_user
+
+
+@router.patch("/me", response_model=UserResponse)
+async def update_me(
+    user_data: UserUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Update the current user.
+
+    Changing the password or deactivating the account revokes all of the
+    user's existing tokens.
+    """
+    user = await db.get(User, current_user.id)
+    update_data = user_data.model_dump(exclude_unset=True)
+
+    email = update_data.get("email")
+    if email and email != user.email:
+        result = await db.execute(select(User).where(User.email == email))
+        if result.scalar_one_or_none():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered",
+            )
+
+    password = update_data.pop("password", None)
+    if password:
+        try:
+            user.hashed_password = await password_pool.hash(password)
+        except PasswordHashPoolFull:
+            raise _hashing_busy()
+    for field, value in update_data.items():
+        if value is not None:
+            setattr(user, field, value)
+
+    if password or not user.is_active:
+        user.token_epoch += 1
+
+    await db.commit()
+    await db.refresh(user)
+    await invalidate_principal(user.id)
+    return user
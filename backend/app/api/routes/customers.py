@@ -1,15 +1,62 @@
 """Customer endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import date
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.customer import Customer
+from app.core.jobs import run_once
+from app.core.pagination import keyset_paginate, next_cursor
+from app.models.customer import Customer, CustomerDuplicate, CustomerSegment
+from app.models.order import Order
 from app.schemas.customer import (
+    CohortRetention,
     CustomerCreate,
+    CustomerDuplicateResponse,
+    CustomerImportJob,
+    CustomerMergeRequest,
+    CustomerMergeResult,
     CustomerResponse,
+    CustomerSegmentResponse,
+    CustomerSegmentSummary,
     CustomerUpdate,
+    GeoSales,
+)
+from app.schemas.order import CustomerOrder, CustomerOrderHistory, OrderSummary
+from app.services.cohorts import retention_matrix
+from app.services.customer_dedup import merge_customers as run_customer_merge
+from app.services.customer_import import (
+    create_customer_import_job,
+    get_customer_import_job,
+    import_customers as run_customer_import,
+)
+from app.services.customer_segments import SEGMENTS, segment_summary
+from app.services.customer_search import (
+    SEARCH_FIELDS,
+    backfill_search_index,
+    index_customers,
+    search_customers,
+)
+from app.services.geo_stats import geo_summary
+from app.services.imports import (
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
 )
 
 router = APIRouter()
@@ -17,28 +64,233 @@ router = APIRouter()
 
 @router.get("", response_model=list[CustomerResponse])
 async def list_customers(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
     search: str | None = None,
+    segment: str | None = Query(None, pattern=f"^({'|'.join(SEGMENTS)})$"),
+    sort_by: str | None = Query(None, pattern="^(total_spent|orders_count|last_order_at)$"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List customers with filtering."""
-    query = select(Customer).where(Customer.is_active == True)
+    """List customers with filtering.
 
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to page
+    through results without OFFSET. Searches go through the n-gram index
+    and come back ranked by relevance, paged with ``skip``; when more than
+    ``CUSTOMER_SEARCH_MAX_CANDIDATES`` customers match, only that many are
+    ranked and ``X-Search-Truncated: true`` is set. ``sort_by``
+    orders by a stored order aggregate (highest first), also paged with
+    ``skip``. ``segment`` keeps customers in one stored RFM segment.
+    """
     if search:
-        query = query.where(
-            (Customer.email.ilike(f"%{search}%")) |
-            (Customer.first_name.ilike(f"%{search}%")) |
-            (Customer.last_name.ilike(f"%{search}%"))
-        )
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not supported with search",
+            )
+        try:
+            customers, truncated = await search_customers(db, search, skip, limit, segment)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+        if truncated:
+            response.headers["X-Search-Truncated"] = "true"
+        return customers
 
-    query = query.order_by(Customer.created_at.desc())
-    query = query.offset(skip).limit(limit)
+    query = select(Customer).where(Customer.is_active == True)
+
+    if segment:
+        query = query.join(CustomerSegment).where(CustomerSegment.segment == segment)
+
+    if sort_by:
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not supported with sort_by",
+            )
+        order = getattr(Customer, sort_by).desc()
+        if sort_by == "last_order_at":
+            order = order.nulls_last()
+        query = query.order_by(order, Customer.id.desc())
+        result = await db.execute(query.offset(skip).limit(limit))
+        return result.scalars().all()
+
+    try:
+        query = keyset_paginate(query, Customer, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    if not cursor:
+        query = query.offset(skip)
 
     result = await db.execute(query)
+    customers = result.scalars().all()
+
+    cursor = next_cursor(customers, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+    return customers
+
+
+@router.get("/segments", response_model=list[CustomerSegmentSummary])
+async def list_segments(
+    db: AsyncSession = Depends(get_db),
+):
+    """Customer counts and average lifetime value per RFM segment."""
+    return await segment_summary(db)
+
+
+@router.post("/import", response_model=CustomerImportJob)
+async def import_customers(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_format: str | None = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    on_conflict: str = Query("skip", pattern="^(merge|skip)$"),
+    job_id: str | None = Query(None, max_length=64),
+    db: AsyncSession = Depends(get_db),
+):
+    """Bulk import customers by email from a streamed CSV or NDJSON body.
+
+    With ``on_conflict=skip`` existing emails are left untouched; with
+    ``merge`` their names are replaced and other fields filled in from
+    the import. Pass a client-generated ``job_id`` to poll progress.
+    Imported customers become searchable once the search backfill that
+    runs after the response has indexed them. The backfill also runs
+    when the import fails, since chunks committed before the failure
+    are kept.
+    """
+    existing = await get_customer_import_job(db, job_id) if job_id else None
+    if existing and existing.status == "running":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import job is already running",
+        )
+
+    if file_format is None:
+        content_type = request.headers.get("content-type", "")
+        file_format = "csv" if "csv" in content_type else "ndjson"
+
+    lines = iter_lines(request.stream())
+    records = (
+        iter_csv_records(lines) if file_format == "csv" else iter_ndjson_records(lines)
+    )
+
+    job = await create_customer_import_job(db, on_conflict, job_id)
+    background_tasks.add_task(run_once, "Customer search backfill", backfill_search_index)
+    try:
+        return await run_customer_import(
+            db, records, job, settings.CUSTOMER_IMPORT_CHUNK_SIZE
+        )
+    except SQLAlchemyError:
+        # Background tasks are dropped with a raised HTTPException, so the
+        # error response carries them itself
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": job.detail},
+            background=background_tasks,
+        )
+    except Exception:
+        await run_once("Customer search backfill", backfill_search_index)
+        raise
+
+
+@router.get("/import/{job_id}", response_model=CustomerImportJob)
+async def get_import_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get progress of a bulk customer import."""
+    job = await get_customer_import_job(db, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
+        )
+
+    return job
+
+
+@router.get("/duplicates", response_model=list[CustomerDuplicateResponse])
+async def list_duplicates(
+    min_score: float = Query(0.0, ge=0, le=1),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """Suggested duplicate customers from the last detection run, best first."""
+    result = await db.execute(
+        select(CustomerDuplicate)
+        .where(CustomerDuplicate.score >= min_score)
+        .order_by(CustomerDuplicate.score.desc(), CustomerDuplicate.id)
+        .limit(limit)
+    )
     return result.scalars().all()
 
 
+@router.post("/merge", response_model=CustomerMergeResult)
+async def merge_customers(
+    merge_data: CustomerMergeRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Merge customers, moving their orders to the target customer.
+
+    Source customers are deactivated and the targets' order aggregates
+    recomputed in the same transaction.
+    """
+    merges: dict[int, list[int]] = {}
+    for item in merge_data.merges:
+        merges.setdefault(item.target_id, []).extend(item.source_ids)
+
+    try:
+        customers_merged, orders_moved = await run_customer_merge(db, merges)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    return CustomerMergeResult(
+        customers_merged=customers_merged,
+        orders_moved=orders_moved,
+    )
+
+
+@router.get("/geo", response_model=list[GeoSales])
+async def get_geo_sales(
+    start: date,
+    end: date,
+    group_by: str = Query("country", pattern="^(country|city)$"),
+    country: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Orders and revenue by customer country or city between two days (inclusive)."""
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start",
+        )
+
+    return await geo_summary(db, start, end, group_by, country)
+
+
+@router.get("/cohorts", response_model=CohortRetention)
+async def get_cohort_retention(
+    basis: str = Query("first_order", pattern="^(signup|first_order)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Monthly cohorts and the share of each cohort ordering N months later.
+
+    Cohorts are grouped by sign-up month or by first order month.
+    """
+    return await retention_matrix(db, basis)
+
+
 @router.get("/{customer_id}", response_model=CustomerResponse)
 async def get_customer(
     customer_id: int,
@@ -59,6 +311,75 @@ async def get_customer(
     return customer
 
 
+@router.get("/{customer_id}/orders", response_model=CustomerOrderHistory)
+async def list_customer_orders(
+    customer_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    include_items: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """A customer's orders, newest first, with their lifetime totals.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the
+    next page. Totals are the stored aggregates on the customer row.
+    """
+    customer = await db.get(Customer, customer_id)
+    if not customer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found",
+        )
+
+    query = select(Order).where(Order.customer_id == customer_id)
+    if include_items:
+        query = query.options(selectinload(Order.items))
+    try:
+        query = keyset_paginate(query, Order, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    result = await db.execute(query)
+    orders = result.scalars().all()
+
+    cursor = next_cursor(orders, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+    schema = CustomerOrder if include_items else OrderSummary
+    return {
+        "customer_id": customer.id,
+        "orders_count": customer.orders_count,
+        "total_spent": customer.total_spent,
+        "last_order_at": customer.last_order_at,
+        "orders": [schema.model_validate(order) for order in orders],
+    }
+
+
+@router.get("/{customer_id}/segment", response_model=CustomerSegmentResponse)
+async def get_customer_segment(
+    customer_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get a customer's latest RFM scores and lifetime value."""
+    result = await db.execute(
+        select(CustomerSegment).where(CustomerSegment.customer_id == customer_id)
+    )
+    segment = result.scalar_one_or_none()
+
+    if not segment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer segment not found",
+        )
+
+    return segment
+
+
 @router.post("", response_model=CustomerResponse, status_code=status.HTTP_201_CREATED)
 async def create_customer(
     customer_data: CustomerCreate,
@@ -77,6 +398,8 @@ async def create_customer(
     customer = Customer(**customer_data.model_dump())
 
     db.add(customer)
+    await db.flush()
+    await index_customers(db, [customer])
     await db.commit()
     await db.refresh(customer)
 
@@ -105,6 +428,8 @@ async def update_customer(
     for field, value in update_data.items():
         setattr(customer, field, value)
 
+    if SEARCH_FIELDS & update_data.keys():
+        await index_customers(db, [customer])
     await db.commit()
     await db.refresh(customer)
 
@@ -1,12 +1,14 @@
 """Order endpoints."""
 
+from collections import Counter
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
-from app.models.order import Order, OrderItem, OrderStatus
+from app.models.order import VOID_STATUSES, Order, OrderItem, OrderStatus
 from app.models.product import Product
 from app.schemas.order import (
     OrderCreate,
@@ -14,6 +16,11 @@ from app.schemas.order import (
     OrderUpdate,
     OrderListResponse,
 )
+from app.services.customer_stats import record_order, void_order
+from app.services.geo_stats import record_geo, stamp_location
+from app.services.low_stock import refresh_low_stock, return_stock, take_stock
+from app.services.product_cache import invalidate_products
+from app.services.recommendations import recommendation_index
 
 router = APIRouter()
 
@@ -24,6 +31,24 @@ def generate_order_number() -> str:
     return f"ORD-{uuid.uuid4().hex[:8].upper()}"
 
 
+def item_quantities(items) -> Counter[int]:
+    """Total ordered quantity per product."""
+    quantities: Counter[int] = Counter()
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+
+async def reserve_items(db: AsyncSession, items) -> None:
+    """Take stock for ``items`` or fail the request with 409."""
+    short = await take_stock(db, item_quantities(items))
+    if short is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Insufficient stock for product {short}",
+        )
+
+
 @router.get("", response_model=OrderListResponse)
 async def list_orders(
     page: int = Query(1, ge=1),
@@ -119,6 +144,8 @@ async def create_order(
             )
         )
 
+    await reserve_items(db, order_items)
+
     tax_amount = subtotal * Decimal("0.13")
     total_amount = subtotal + tax_amount
 
@@ -133,9 +160,19 @@ async def create_order(
         items=order_items,
     )
 
+    await stamp_location(db, order)
     db.add(order)
+    await db.flush()
+    product_ids = [item.product_id for item in order_items]
+    await refresh_low_stock(db, product_ids)
+    await record_order(db, order.customer_id, order.total_amount, order.created_at)
+    await record_geo(db, order, 1, order.total_amount)
     await db.commit()
-    await db.refresh(order)
+    await db.refresh(order, ["items"])
+    await invalidate_products(product_ids)
+    recommendation_index.add_order(
+        order.id, [(item.product_id, item.product_name) for item in order.items]
+    )
 
     return order
 
@@ -160,11 +197,44 @@ async def update_order(
             detail="Order not found",
         )
 
+    was_void = order.status in VOID_STATUSES
     update_data = order_data.model_dump(exclude_unset=True)
+    is_void = update_data.get("status", order.status) in VOID_STATUSES
+    if is_void != was_void:
+        # Only the request whose conditional UPDATE flips the row adjusts
+        # stock and aggregates; a concurrent duplicate matches no row.
+        void_filter = Order.status.in_(VOID_STATUSES)
+        result = await db.execute(
+            update(Order)
+            .where(Order.id == order.id)
+            .where(void_filter if was_void else ~void_filter)
+            .values(status=update_data["status"])
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Order status was changed by another request",
+            )
+
     for field, value in update_data.items():
         setattr(order, field, value)
 
+    product_ids = [item.product_id for item in order.items]
+    if is_void and not was_void:
+        await db.flush()
+        await void_order(db, order.customer_id, order.total_amount)
+        await record_geo(db, order, -1, -order.total_amount)
+        await return_stock(db, item_quantities(order.items))
+        await refresh_low_stock(db, product_ids)
+    elif was_void and not is_void:
+        await reserve_items(db, order.items)
+        await refresh_low_stock(db, product_ids)
+        await record_order(db, order.customer_id, order.total_amount, order.created_at)
+        await record_geo(db, order, 1, order.total_amount)
     await db.commit()
-    await db.refresh(order)
+    await db.refresh(order, ["updated_at", "items"])
+    if is_void != was_void:
+        await invalidate_products(product_ids)
 
     return order
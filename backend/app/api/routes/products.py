@@ -1,40 +1,71 @@
 """Product endpoints."""
 
-import re
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import keyset_paginate, next_cursor
+from app.core.utils import slugify
 from app.models.product import Product, ProductCategory
 from app.schemas.product import (
     ProductCreate,
     ProductResponse,
+    ProductListItem,
+    ProductFacetedList,
     ProductUpdate,
     ProductCategoryCreate,
     ProductCategoryResponse,
+    ProductCategoryUpdate,
+    ProductImportJob,
+    ProductBulkUpdate,
+    ProductBulkUpdateResult,
+    LowStockProduct,
+    RelatedProduct,
+    ProductForecast,
+)
+from app.services.category_cache import category_cache, invalidate_categories
+from app.services.forecasting import get_forecast, reorder_list
+from app.services.low_stock import list_low_stock, refresh_low_stock
+from app.services.product_bulk import apply_bulk_update
+from app.services.product_facets import FACETS, search_products
+from app.services.recommendations import related_products
+from app.services.product_cache import (
+    get_product_payload,
+    invalidate_products,
+    product_cache,
+)
+from app.services.imports import (
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+)
+from app.services.product_import import (
+    create_import_job,
+    get_product_import_job,
+    import_products as run_product_import,
 )
 
 router = APIRouter()
 
 
-def slugify(text: str) -> str:
-    """Convert text to URL-friendly slug."""
-    text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[-\s]+', '-', text)
-    return text.strip('-')
-
-
-@router.get("", response_model=list[ProductResponse])
+@router.get("", response_model=list[ProductListItem])
 async def list_products(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
     category_id: int | None = None,
     search: str | None = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """List products with filtering."""
+    """List products with filtering.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to page
+    through results without OFFSET.
+    """
     query = select(Product).where(Product.is_active == True)
 
     if category_id:
@@ -43,11 +74,174 @@ async def list_products(
     if search:
         query = query.where(Product.name.ilike(f"%{search}%"))
 
-    query = query.order_by(Product.created_at.desc())
-    query = query.offset(skip).limit(limit)
+    try:
+        query = keyset_paginate(query, Product, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    if not cursor:
+        query = query.offset(skip)
 
     result = await db.execute(query)
-    return result.scalars().all()
+    products = result.scalars().all()
+
+    cursor = next_cursor(products, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+    return await _to_list_items(db, products)
+
+
+async def _to_list_items(
+    db: AsyncSession,
+    products: list[Product],
+) -> list[ProductListItem]:
+    """Embed category names from the category cache instead of a join."""
+    category_names = (await category_cache.load(db)).names
+
+    items = []
+    for product in products:
+        item = ProductListItem.model_validate(product)
+        item.category_name = category_names.get(product.category_id)
+        items.append(item)
+    return items
+
+
+@router.get("/faceted", response_model=ProductFacetedList)
+async def list_products_faceted(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: int | None = None,
+    price_bucket: int | None = Query(None, ge=0),
+    in_stock: bool | None = None,
+    search: str | None = None,
+    facets: str = Query(",".join(FACETS), description="Comma-separated facet names"),
+    db: AsyncSession = Depends(get_db),
+):
+    """List products with category, price bucket and stock facet counts."""
+    requested = tuple(name.strip() for name in facets.split(",") if name.strip())
+    unknown = set(requested) - set(FACETS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown facets: {', '.join(sorted(unknown))}",
+        )
+
+    if price_bucket is not None and price_bucket >= len(settings.PRODUCT_PRICE_BUCKETS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown price bucket",
+        )
+
+    products, total, facet_counts = await search_products(
+        db,
+        skip=skip,
+        limit=limit,
+        facets=requested,
+        search=search,
+        category_id=category_id,
+        price_bucket=price_bucket,
+        in_stock=in_stock,
+    )
+
+    return ProductFacetedList(
+        items=await _to_list_items(db, products),
+        total=total,
+        facets=facet_counts,
+    )
+
+
+@router.post("/import", response_model=ProductImportJob)
+async def import_products(
+    request: Request,
+    file_format: str | None = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    job_id: str | None = Query(None, max_length=64),
+    db: AsyncSession = Depends(get_db),
+):
+    """Bulk upsert products by SKU from a streamed CSV or NDJSON body.
+
+    The format defaults to CSV for ``text/csv`` bodies and NDJSON otherwise.
+    Pass a client-generated ``job_id`` to poll progress while uploading.
+    """
+    existing = await get_product_import_job(db, job_id) if job_id else None
+    if existing and existing.status == "running":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import job is already running",
+        )
+
+    if file_format is None:
+        content_type = request.headers.get("content-type", "")
+        file_format = "csv" if "csv" in content_type else "ndjson"
+
+    lines = iter_lines(request.stream())
+    records = (
+        iter_csv_records(lines) if file_format == "csv" else iter_ndjson_records(lines)
+    )
+
+    job = await create_import_job(db, job_id)
+    try:
+        return await run_product_import(
+            db, records, job, settings.PRODUCT_IMPORT_CHUNK_SIZE
+        )
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=job.detail,
+        )
+
+
+@router.get("/import/{job_id}", response_model=ProductImportJob)
+async def get_import_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get progress of a bulk product import."""
+    job = await get_product_import_job(db, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
+        )
+
+    return job
+
+
+@router.post("/bulk-update", response_model=ProductBulkUpdateResult)
+async def bulk_update_products(
+    update_data: ProductBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """Bulk update prices and stock by id/SKU or by category rules."""
+    return await apply_bulk_update(db, update_data)
+
+
+@router.get("/low-stock", response_model=list[LowStockProduct])
+async def list_low_stock_products(
+    limit: int = Query(100, ge=1, le=1000),
+    category_id: int | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """List active products below their low-stock threshold."""
+    return await list_low_stock(db, limit, category_id)
+
+
+@router.get("/forecast/reorder", response_model=list[ProductForecast])
+async def list_reorder_suggestions(
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """Products at or below their forecast reorder point."""
+    return await reorder_list(db, limit)
+
+
+@router.get("/cache/stats")
+async def get_product_cache_stats():
+    """Product detail cache hit/miss metrics."""
+    return product_cache.stats()
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -55,19 +249,43 @@ async def get_product(
     product_id: int,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a specific product."""
-    result = await db.execute(
-        select(Product).where(Product.id == product_id)
-    )
-    product = result.scalar_one_or_none()
+    """Get a specific product (served from the read-through cache)."""
+    payload = await get_product_payload(db, product_id)
 
-    if not product:
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found",
         )
 
-    return product
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/{product_id}/related", response_model=list[RelatedProduct])
+async def get_related_products(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Active products frequently bought together with this one."""
+    return await related_products(db, product_id, limit)
+
+
+@router.get("/{product_id}/forecast", response_model=ProductForecast)
+async def get_product_forecast(
+    product_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """Demand forecast, days of cover and reorder point for a product."""
+    forecast = await get_forecast(db, product_id)
+
+    if not forecast:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Forecast not found",
+        )
+
+    return forecast
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -103,8 +321,11 @@ async def create_product(
     )
 
     db.add(product)
+    await db.flush()
+    await refresh_low_stock(db, [product.id])
     await db.commit()
     await db.refresh(product)
+    await invalidate_products([product.id])
 
     return product
 
@@ -135,8 +356,11 @@ async def update_product(
     for field, value in update_data.items():
         setattr(product, field, value)
 
+    await db.flush()
+    await refresh_low_stock(db, [product.id])
     await db.commit()
     await db.refresh(product)
+    await invalidate_products([product.id])
 
     return product
 
@@ -160,13 +384,26 @@ async def delete_product(
 
     product.is_active = False
     await db.commit()
+    await invalidate_products([product.id])
 
 
 @router.get("/categories/", response_model=list[ProductCategoryResponse])
-async def list_categories(db: AsyncSession = Depends(get_db)):
-    """List product categories."""
-    result = await db.execute(select(ProductCategory))
-    return result.scalars().all()
+async def list_categories(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """List product categories (cached, revalidated with ETag)."""
+    cache = await category_cache.load(db)
+    headers = {"ETag": cache.etag, "Cache-Control": "no-cache"}
+
+    if request.headers.get("if-none-match") == cache.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=cache.payload,
+        media_type="application/json",
+        headers=headers,
+    )
 
 
 @router.post("/categories/", response_model=ProductCategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -181,10 +418,52 @@ async def create_category(
         name=category_data.name,
         slug=slug,
         description=category_data.description,
+        low_stock_threshold=category_data.low_stock_threshold,
     )
 
     db.add(category)
     await db.commit()
     await db.refresh(category)
+    await invalidate_categories()
+
+    return category
+
+
+@router.patch("/categories/{category_id}", response_model=ProductCategoryResponse)
+async def update_category(
+    category_id: int,
+    category_data: ProductCategoryUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """Update a product category."""
+    result = await db.execute(
+        select(ProductCategory).where(ProductCategory.id == category_id)
+    )
+    category = result.scalar_one_or_none()
+
+    if not category:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found",
+        )
+
+    update_data = category_data.model_dump(exclude_unset=True)
+
+    if "name" in update_data:
+        update_data["slug"] = slugify(update_data["name"])
+
+    for field, value in update_data.items():
+        setattr(category, field, value)
+
+    threshold_changed = "low_stock_threshold" in update_data
+    if threshold_changed:
+        await db.flush()
+        await refresh_low_stock(db, category_id=category.id)
+
+    await db.commit()
+    await db.refresh(category)
+    await invalidate_categories()
+    if threshold_changed:
+        await invalidate_products()
 
     return category
@@ -0,0 +1,202 @@
+"""In-process caching utilities with optional cross-worker invalidation."""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Protocol
+
+from app.core.config import settings
+from app.core.pubsub import RedisSubscription
+
+
+class Invalidatable(Protocol):
+    """Anything the invalidation channel can drop keys from."""
+
+    def invalidate(self, key: Hashable) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation.
+
+        Read-through callers capture it before loading a value and pass it
+        back to ``set`` so a load that raced with a write is not cached.
+        """
+        return self._generation
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value or None on a miss."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: int | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        """Store a value, evicting the least recently used entries.
+
+        ``ttl`` overrides the cache-wide TTL for this entry.
+        """
+        if generation is not None and generation != self._generation:
+            return
+
+        expires_in = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + expires_in, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single key."""
+        self._generation += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every key."""
+        self._generation += 1
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class InvalidationChannel:
+    """Fan out cache invalidations to other workers over Redis pub/sub.
+
+    Every worker applies invalidations to its own caches immediately and
+    publishes them so that peers drop the same keys. When no channel is
+    configured the class degrades to local-only invalidation. The
+    subscription reconnects on failure; ``connected`` is False while it
+    is down, and every registered cache is cleared on reconnect since
+    peers' invalidations may have been missed meanwhile.
+    """
+
+    def __init__(self, redis_url: str, channel: str):
+        self.redis_url = redis_url
+        self.channel = channel
+        self._caches: dict[str, Invalidatable] = {}
+        self._subscription: RedisSubscription | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.channel)
+
+    @property
+    def connected(self) -> bool:
+        """Whether invalidations currently reach peer workers."""
+        return self._subscription is not None and self._subscription.connected
+
+    def register(self, name: str, cache: Invalidatable) -> None:
+        """Register a cache under a name peers can address."""
+        self._caches[name] = cache
+
+    def apply(self, name: str, keys: Iterable[Hashable] | None) -> None:
+        """Invalidate keys (or everything when keys is None) locally."""
+        cache = self._caches.get(name)
+        if cache is None:
+            return
+        if keys is None:
+            cache.clear()
+            return
+        for key in keys:
+            cache.invalidate(key)
+
+    async def invalidate(
+        self, name: str, keys: Iterable[Hashable] | None = None
+    ) -> None:
+        """Invalidate locally and notify peer workers."""
+        keys = None if keys is None else list(keys)
+        if keys == []:
+            return
+        self.apply(name, keys)
+
+        if self._subscription is not None:
+            await self._subscription.publish(json.dumps({"cache": name, "keys": keys}))
+
+    def _connect(self):
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(self.redis_url)
+
+    def _on_message(self, data) -> None:
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        self.apply(message.get("cache", ""), message.get("keys"))
+
+    async def _on_connect(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+
+    async def start(self) -> None:
+        """Start listening for peer invalidations."""
+        if not self.enabled:
+            return
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            print("redis package not installed; cache invalidation is local only")
+            return
+
+        self._subscription = RedisSubscription(
+            "Cache invalidation channel",
+            self._connect,
+            self.channel,
+            on_message=self._on_message,
+            on_connect=self._on_connect,
+        )
+        self._subscription.start()
+
+    async def stop(self) -> None:
+        """Stop the listener and close the Redis connection."""
+        if self._subscription is not None:
+            await self._subscription.stop()
+            self._subscription = None
+
+
+invalidation_channel = InvalidationChannel(
+    redis_url=settings.REDIS_URL,
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+)
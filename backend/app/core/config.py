@@ -28,6 +28,21 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     ALGORITHM: str = "HS256"
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    # Verified JWT claims kept until each token expires
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    # "redis" (shares revocations across workers via REDIS_URL, falling back
+    # to local when unreachable) or "memory" (single worker only)
+    TOKEN_REVOCATION_BACKEND: str = "redis"
+    TOKEN_REVOCATION_FILTER_CAPACITY: int = 100000
+    TOKEN_REVOCATION_FILTER_ERROR_RATE: float = 0.01
+    # Prune expired ids and write back revocations made while Redis was down
+    # (0 disables the job)
+    TOKEN_REVOCATION_SYNC_INTERVAL_SECONDS: int = 60
+    # bcrypt threads per worker process, and callers allowed to queue for them
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
@@ -48,6 +63,66 @@ class Settings(BaseSettings):
 
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
+    RATE_LIMIT_READS_PER_MINUTE: int = 600
+    # "memory" (per worker) or "redis" (shared through REDIS_URL)
+    RATE_LIMIT_BACKEND: str = "memory"
+    # Tracked clients per worker before the least recently seen are dropped
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Drop clients whose allowance has fully recovered (0 disables the job)
+    RATE_LIMIT_SWEEP_INTERVAL_SECONDS: int = 60
+
+    # Inventory
+    # Fallback when neither the product nor its category sets a threshold
+    LOW_STOCK_THRESHOLD: int = 10
+
+    # Recommendations
+    RECOMMENDATION_MAX_BASKET_SIZE: int = 50
+    # Full rebuild period for co-occurrence counts (0 disables the job)
+    RECOMMENDATION_REBUILD_INTERVAL_SECONDS: int = 3600
+
+    # Customers
+    CUSTOMER_SEARCH_MAX_CANDIDATES: int = 1000
+    # Order aggregate reconciliation period (0 disables the job)
+    CUSTOMER_STATS_RECONCILE_INTERVAL_SECONDS: int = 86400
+
+    # Customer analytics
+    # RFM segmentation period (0 disables the job)
+    CUSTOMER_RFM_INTERVAL_SECONDS: int = 86400
+    CUSTOMER_RFM_CHUNK_SIZE: int = 100000
+    CUSTOMER_CLV_HORIZON_YEARS: float = 3.0
+    CUSTOMER_COHORT_MONTHS: int = 24
+    CUSTOMER_COHORT_CACHE_TTL_SECONDS: int = 21600
+    # Duplicate detection period (0 disables the job)
+    CUSTOMER_DEDUP_INTERVAL_SECONDS: int = 86400
+    CUSTOMER_DEDUP_MAX_BLOCK_SIZE: int = 50
+    CUSTOMER_DEDUP_MIN_SCORE: float = 0.6
+
+    # Demand forecasting
+    FORECAST_HISTORY_DAYS: int = 90
+    FORECAST_ALPHA: float = 0.2
+    FORECAST_LEAD_TIME_DAYS: int = 7
+    FORECAST_SERVICE_LEVEL_Z: float = 1.65
+    # Forecast refresh period (0 disables the job)
+    FORECAST_INTERVAL_SECONDS: int = 21600
+
+    # Bulk operations
+    PRODUCT_IMPORT_CHUNK_SIZE: int = 500
+    CUSTOMER_IMPORT_CHUNK_SIZE: int = 1000
+    # A running import whose progress has not been saved for this long is
+    # reported as failed (its worker died), freeing its job id
+    IMPORT_JOB_STALE_SECONDS: int = 600
+
+    # Caching
+    PRODUCT_CACHE_MAX_SIZE: int = 10000
+    PRODUCT_CACHE_TTL_SECONDS: int = 300
+    CATEGORY_CACHE_TTL_SECONDS: int = 300
+    # Redis pub/sub channel for cross-worker invalidation (empty disables it,
+    # and the product and principal caches are then bypassed)
+    CACHE_INVALIDATION_CHANNEL: str = ""
+    PRODUCT_FACET_CACHE_TTL_SECONDS: int = 60
+
+    # Lower bounds of the price facet buckets
+    PRODUCT_PRICE_BUCKETS: list[int] = [0, 100, 500, 1000, 5000]
 
     @property
     def database_url_sync(self) -> str:
@@ -3,6 +3,7 @@
 import os
 from typing import AsyncGenerator
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -41,6 +42,13 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+def dialect_insert(db: AsyncSession):
+    """Dialect-specific ``insert`` that supports ``ON CONFLICT`` clauses."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async database sessions."""
     async with AsyncSessionLocal() as session:
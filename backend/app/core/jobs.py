@@ -0,0 +1,58 @@
+"""Periodic background jobs started from the application lifespan."""
+
+import asyncio
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import func, select
+
+from app.core.database import engine
+
+
+async def run_periodic(
+    name: str,
+    job: Callable[[], Awaitable[None]],
+    interval: int,
+) -> None:
+    """Run ``job`` now and then every ``interval`` seconds until cancelled."""
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            print(f"{name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def run_once(name: str, job: Callable[[], Awaitable[None]]) -> None:
+    """Run ``job`` a single time, logging instead of raising on failure."""
+    try:
+        await job()
+    except Exception as e:
+        print(f"{name} failed: {e}")
+
+
+@asynccontextmanager
+async def job_lock(name: str) -> AsyncIterator[bool]:
+    """Cross-worker lock so a job that writes shared tables runs once.
+
+    Every worker schedules the same jobs at startup. On PostgreSQL the
+    lock is a session advisory lock held on its own connection for the
+    whole run; yields False when another worker already holds it.
+    SQLite has no advisory locks and serializes writers itself, so
+    there the lock is always granted.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+
+    # crc32 rather than hash(): the key must agree across processes.
+    key = zlib.crc32(name.encode())
+    async with engine.connect() as conn:
+        acquired = await conn.scalar(select(func.pg_try_advisory_lock(key)))
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await conn.execute(select(func.pg_advisory_unlock(key)))
+            await conn.commit()
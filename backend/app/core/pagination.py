@@ -0,0 +1,45 @@
+"""Keyset (cursor) pagination over ``(created_at, id)``."""
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the given row."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_paginate(query: Select, model, cursor: str | None, limit: int) -> Select:
+    """Order newest first and continue after ``cursor``.
+
+    The ``(created_at, id)`` row comparison lets the database seek into a
+    composite index ending in those columns instead of sorting and
+    skipping rows as OFFSET does.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(model.created_at, model.id) < tuple_(created_at, row_id)
+        )
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+def next_cursor(rows: list, limit: int) -> str | None:
+    """Cursor for the following page, or None when this page is the last."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
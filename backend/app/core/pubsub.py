@@ -0,0 +1,120 @@
+"""Redis pub/sub subscription that survives connection failures."""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+# Messages kept for peers while publishing fails.
+MAX_PENDING_MESSAGES = 1000
+
+
+class RedisSubscription:
+    """Listen on a Redis channel, reconnecting with exponential backoff.
+
+    ``on_message`` receives the raw payload of every message, including
+    this worker's own. ``on_connect`` runs after each (re)subscribe so the
+    owner can catch up on whatever peers published while it was away.
+    Messages that fail to publish are queued and sent after reconnecting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Any],
+        channel: str,
+        on_message: Callable[[Any], None],
+        on_connect: Callable[[], Awaitable[None]] | None = None,
+        retry_min: float = 1.0,
+        retry_max: float = 30.0,
+        poll_interval: float = 1.0,
+    ):
+        self.name = name
+        self.connect = connect
+        self.channel = channel
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.poll_interval = poll_interval
+        self.reconnects = 0
+        self._client = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._pending: deque = deque(maxlen=MAX_PENDING_MESSAGES)
+
+    @property
+    def connected(self) -> bool:
+        """Whether the listener is subscribed and receiving peer messages."""
+        return (
+            self._client is not None
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # The flag also ends the loop if a cancellation is swallowed
+            # inside the client's read timeout.
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, message: str) -> None:
+        """Publish to peers, queueing the message if Redis is unreachable."""
+        client = self._client
+        if client is not None:
+            try:
+                await client.publish(self.channel, message)
+                return
+            except Exception as e:
+                print(f"{self.name} publish failed, will retry: {e}")
+        self._pending.append(message)
+
+    async def _run(self) -> None:
+        delay = self.retry_min
+        while not self._stopping:
+            client = self.connect()
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._client = client
+                if self.on_connect is not None:
+                    await self.on_connect()
+                delay = self.retry_min
+                await self._listen(client, pubsub)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{self.name} unavailable, retrying in {delay:.0f}s: {e}")
+            finally:
+                self._client = None
+                for resource in (pubsub, client):
+                    try:
+                        await resource.aclose()
+                    except Exception:
+                        pass
+            if self._stopping:
+                return
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.retry_max)
+
+    async def _listen(self, client, pubsub) -> None:
+        while not self._stopping:
+            while self._pending:
+                await client.publish(self.channel, self._pending[0])
+                self._pending.popleft()
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=self.poll_interval
+            )
+            if message is not None and message.get("type") == "message":
+                self.on_message(message["data"])
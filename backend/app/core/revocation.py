@@ -0,0 +1,320 @@
+"""Revoked token ids behind a Bloom filter prefilter.
+
+Refresh tokens carry a ``jti`` that is revoked when the token is
+rotated, and every token carries the ``sid`` of the login session it
+belongs to, revoked when reuse of a rotated refresh token is detected.
+Almost every id checked was never revoked, so the in-process store
+keeps a Bloom filter of the revoked ids and only consults its set when
+the filter reports a possible match. That store only sees revocations
+made by its own process; multi-worker deployments need the Redis store.
+"""
+
+import hashlib
+import json
+import math
+import time
+
+from app.core.config import settings
+from app.core.pubsub import RedisSubscription
+
+try:
+    from redis.exceptions import RedisError
+except ImportError:
+    RedisError = OSError
+
+# Seconds to answer from the local store after a Redis error.
+REDIS_RETRY_SECONDS = 5.0
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (no false negatives)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationStore:
+    """In-process revocation store; revoked ids are kept until they expire.
+
+    Revocations are not shared, so a refresh token rotated on one worker
+    can be replayed on another. Only suitable for a single worker.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._revoked: dict[str, float] = {}
+        self._filter = BloomFilter(capacity, error_rate)
+        self.checks = 0
+        self.lookups = 0
+
+    def _remember(self, token_id: str, expires_at: float) -> None:
+        self._revoked[token_id] = expires_at
+        self._filter.add(token_id)
+
+    def _rebuild(self, revoked: dict[str, float]) -> None:
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        for token_id in revoked:
+            fresh.add(token_id)
+        self._revoked, self._filter = revoked, fresh
+
+    async def _lookup(self, token_id: str) -> bool:
+        expires_at = self._revoked.get(token_id)
+        return expires_at is not None and expires_at > time.time()
+
+    async def is_revoked(self, token_id: str) -> bool:
+        """Whether the id was revoked; ids the filter has never seen cost nothing."""
+        self.checks += 1
+        if token_id not in self._filter:
+            return False
+        self.lookups += 1
+        return await self._lookup(token_id)
+
+    async def revoke(self, token_id: str, expires_at: float) -> bool:
+        """Revoke an id until ``expires_at`` (unix time).
+
+        Returns False when it was already revoked, which is how refresh
+        token reuse is detected.
+        """
+        if await self._lookup(token_id):
+            return False
+        self._remember(token_id, expires_at)
+        return True
+
+    async def sync(self) -> None:
+        """Drop expired ids and rebuild the filter without them."""
+        now = time.time()
+        self._rebuild({
+            token_id: expires_at
+            for token_id, expires_at in self._revoked.items()
+            if expires_at > now
+        })
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        """Prefilter effectiveness for monitoring."""
+        return {
+            "backend": "memory",
+            "revoked": len(self._revoked),
+            "checks": self.checks,
+            "lookups": self.lookups,
+            "filter_bytes": len(self._filter._bits),
+        }
+
+
+class RedisRevocationStore(RevocationStore):
+    """Revocations shared through Redis keys that expire with the token.
+
+    Redis is authoritative: ``revoke`` is an atomic ``SET NX`` so two
+    workers racing to rotate the same refresh token cannot both win.
+    Each revocation is also broadcast over pub/sub into every worker's
+    Bloom filter, so checking a token that was never revoked costs no
+    round trip and only filter hits are confirmed with ``EXISTS``. While
+    the subscription is down every check goes to Redis; while Redis is
+    unreachable the local set answers and revocations made meanwhile are
+    written back once it recovers.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        prefix: str,
+        capacity: int,
+        error_rate: float,
+        channel: str = "token-revocations",
+    ):
+        super().__init__(capacity, error_rate)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.channel = channel
+        self.fallbacks = 0
+        self._redis = None
+        self._subscription: RedisSubscription | None = None
+        self._unsynced: dict[str, float] = {}
+        self._retry_at = 0.0
+
+    def _connect(self):
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(self.redis_url)
+
+    async def start(self) -> None:
+        """Connect and subscribe; the filter is loaded once subscribed."""
+        self._redis = self._connect()
+        self._subscription = RedisSubscription(
+            "Token revocation channel",
+            self._connect,
+            self.channel,
+            on_message=self._on_message,
+            on_connect=self.sync,
+        )
+        self._subscription.start()
+
+    async def stop(self) -> None:
+        if self._subscription is not None:
+            await self._subscription.stop()
+            self._subscription = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    @property
+    def subscribed(self) -> bool:
+        return self._subscription is not None and self._subscription.connected
+
+    def _on_message(self, data) -> None:
+        try:
+            token_id, expires_at = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        self._remember(token_id, float(expires_at))
+
+    def _failed(self, error: Exception) -> None:
+        if self._retry_at == 0.0:
+            print(f"Token revocation store unavailable, using local store: {error}")
+        self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _available(self) -> bool:
+        return self._retry_at == 0.0 or time.monotonic() >= self._retry_at
+
+    async def is_revoked(self, token_id: str) -> bool:
+        if self._redis is None:
+            return await super().is_revoked(token_id)
+        self.checks += 1
+        if self.subscribed and token_id not in self._filter:
+            return False
+        if self._available():
+            self.lookups += 1
+            try:
+                revoked = await self._redis.exists(self.prefix + token_id)
+            except RedisError as e:
+                self._failed(e)
+            else:
+                self._retry_at = 0.0
+                return bool(revoked)
+        self.fallbacks += 1
+        return await super()._lookup(token_id)
+
+    async def revoke(self, token_id: str, expires_at: float) -> bool:
+        if self._redis is None:
+            return await super().revoke(token_id, expires_at)
+        if self._available():
+            ttl = max(int(expires_at - time.time()), 1)
+            try:
+                stored = await self._redis.set(
+                    self.prefix + token_id, 1, nx=True, ex=ttl
+                )
+            except RedisError as e:
+                self._failed(e)
+            else:
+                self._retry_at = 0.0
+                if not stored:
+                    return False
+                self._remember(token_id, expires_at)
+                await self._subscription.publish(json.dumps([token_id, expires_at]))
+                return True
+        self.fallbacks += 1
+        if not await super().revoke(token_id, expires_at):
+            return False
+        self._unsynced[token_id] = expires_at
+        return True
+
+    async def _write_back(self) -> None:
+        """Store and broadcast revocations made while Redis was unreachable."""
+        now = time.time()
+        for token_id, expires_at in list(self._unsynced.items()):
+            if expires_at > now:
+                ttl = max(int(expires_at - now), 1)
+                await self._redis.set(self.prefix + token_id, 1, nx=True, ex=ttl)
+                await self._subscription.publish(json.dumps([token_id, expires_at]))
+            del self._unsynced[token_id]
+
+    async def sync(self) -> None:
+        """Reload every live revocation from Redis into a fresh filter."""
+        if self._redis is None:
+            return await super().sync()
+        now = time.time()
+        try:
+            await self._write_back()
+            keys = [key async for key in self._redis.scan_iter(match=self.prefix + "*")]
+            pipe = self._redis.pipeline()
+            for key in keys:
+                pipe.ttl(key)
+            ttls = await pipe.execute()
+        except RedisError as e:
+            self._failed(e)
+            return await super().sync()
+        self._retry_at = 0.0
+        self._rebuild({
+            **{
+                key.decode()[len(self.prefix):]: now + ttl
+                for key, ttl in zip(keys, ttls)
+                if ttl > 0
+            },
+            **{
+                token_id: expires_at
+                for token_id, expires_at in self._unsynced.items()
+                if expires_at > now
+            },
+        })
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "backend": "redis" if self._available() else "memory",
+            "subscribed": self.subscribed,
+            "fallbacks": self.fallbacks,
+            "unsynced": len(self._unsynced),
+        }
+
+
+def create_revocation_store() -> RevocationStore:
+    """Store selected by ``TOKEN_REVOCATION_BACKEND``."""
+    if settings.TOKEN_REVOCATION_BACKEND == "redis":
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            print(
+                "redis package not installed; token revocation is local "
+                "to each worker"
+            )
+        else:
+            return RedisRevocationStore(
+                redis_url=settings.REDIS_URL,
+                prefix="revoked:",
+                capacity=settings.TOKEN_REVOCATION_FILTER_CAPACITY,
+                error_rate=settings.TOKEN_REVOCATION_FILTER_ERROR_RATE,
+            )
+    return RevocationStore(
+        capacity=settings.TOKEN_REVOCATION_FILTER_CAPACITY,
+        error_rate=settings.TOKEN_REVOCATION_FILTER_ERROR_RATE,
+    )
+
+
+revocation_store = create_revocation_store()
@@ -1,15 +1,26 @@
 """Security utilities for authentication and authorization."""
 
+import asyncio
+import hashlib
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+# Weight of the latest sample in the moving average of verify time.
+VERIFY_TIME_SMOOTHING = 0.1
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
@@ -21,11 +32,140 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _timed_verify(plain_password: str, hashed_password: str) -> tuple[bool, float]:
+    """``verify_password`` plus its duration, excluding any queueing."""
+    started = time.perf_counter()
+    valid = verify_password(plain_password, hashed_password)
+    return valid, time.perf_counter() - started
+
+
+class PasswordHashPoolFull(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class PasswordHashPool:
+    """Runs bcrypt on a bounded thread pool instead of the event loop.
+
+    bcrypt releases the GIL, so worker threads keep the loop responsive
+    and use several cores. At most ``max_workers`` hashes run at once;
+    once ``max_pending`` callers are waiting for a slot, new ones are
+    refused rather than letting a login storm queue without bound.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(max_workers)
+        self._dummy_hash: str | None = None
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.verify_seconds: float | None = None
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.waiting >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashPoolFull()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="password-hash"
+            )
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - queued_at
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        self.running += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+        # The slot is held until the thread finishes, even if the caller
+        # is cancelled, so the bound on concurrent hashes stays exact.
+        future.add_done_callback(self._release)
+        return await asyncio.shield(future)
+
+    def _release(self, future: asyncio.Future) -> None:
+        self.running -= 1
+        self.completed += 1
+        self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop."""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password off the event loop, timing the check."""
+        valid, elapsed = await self._run(
+            _timed_verify, plain_password, hashed_password
+        )
+        if self.verify_seconds is None:
+            self.verify_seconds = elapsed
+        else:
+            self.verify_seconds += VERIFY_TIME_SMOOTHING * (elapsed - self.verify_seconds)
+        return valid
+
+    async def reject(self) -> bool:
+        """Fail a login for an unknown account in about the time of a verify.
+
+        Sleeping for the typical verify time hides whether the email
+        exists without spending a bcrypt slot on it. Until a verify has
+        been timed, one is run against a throwaway hash to calibrate.
+        """
+        if self.verify_seconds is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+            await self.verify(secrets.token_urlsafe(16), self._dummy_hash)
+        else:
+            await asyncio.sleep(self.verify_seconds)
+        return False
+
+    def stats(self) -> dict[str, Any]:
+        """Concurrency and queueing metrics for monitoring."""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(
+                self.total_wait_seconds / self.completed * 1000, 2
+            ) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "verify_ms": round(self.verify_seconds * 1000, 2)
+            if self.verify_seconds is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 def create_access_token(
     subject: str | Any,
     expires_delta: timedelta | None = None,
+    epoch: int = 0,
+    session_id: str | None = None,
 ) -> str:
-    """Create a JWT access token."""
+    """Create a JWT access token bound to the user's revocation epoch."""
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -33,31 +173,63 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    to_encode = {"exp": expire, "sub": str(subject), "type": "access", "ep": epoch}
+    if session_id:
+        to_encode["sid"] = session_id
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-def create_refresh_token(subject: str | Any) -> str:
-    """Create a JWT refresh token."""
+def create_refresh_token(
+    subject: str | Any,
+    epoch: int = 0,
+    session_id: str | None = None,
+) -> str:
+    """Create a single-use JWT refresh token bound to the user's revocation epoch.
+
+    Each token gets a unique ``jti`` so it can be revoked when rotated.
+    """
     expire = datetime.now(timezone.utc) + timedelta(
         days=settings.REFRESH_TOKEN_EXPIRE_DAYS
     )
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": "refresh",
+        "ep": epoch,
+        "jti": secrets.token_urlsafe(16),
+    }
+    if session_id:
+        to_encode["sid"] = session_id
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
+# Claims of tokens whose signature already checked out, keyed by token
+# digest and kept until the token's own expiry. Revocation is not a
+# property of the signature: callers still compare the ``ep`` claim.
+token_cache = TTLCache(max_size=settings.TOKEN_CACHE_MAX_SIZE, ttl=0)
+
+
 def decode_token(token: str) -> dict[str, Any] | None:
     """Decode and validate a JWT token."""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(key, payload, ttl=expires_in)
+    return dict(payload)
@@ -1,22 +1,90 @@
 """Main FastAPI application entry point."""
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.cache import invalidation_channel
 from app.api import api_router
+from app.core.jobs import run_once, run_periodic
+from app.core.revocation import revocation_store
+from app.core.security import password_pool
+from app.services.customer_search import backfill_search_index
+from app.services.customer_dedup import run_duplicate_detection
+from app.services.customer_segments import refresh_segments
+from app.services.customer_stats import run_reconciliation
+from app.services.forecasting import refresh_forecasts
+from app.services.geo_stats import backfill_geo_stats
+from app.services.recommendations import rebuild_recommendations
 from app.middleware.security import SecurityHeadersMiddleware
-from app.middleware.rate_limiter import RateLimiterMiddleware
+from app.middleware.rate_limiter import RateLimiterMiddleware, rate_limiters
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     print(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    await invalidation_channel.start()
+    await revocation_store.start()
+
+    background_tasks = [
+        asyncio.create_task(run_once("Customer search backfill", backfill_search_index)),
+        asyncio.create_task(run_once("Order geo backfill", backfill_geo_stats)),
+    ]
+    if settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Rate limiter sweep",
+            rate_limiters.evict_idle,
+            settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS,
+        )))
+    if settings.TOKEN_REVOCATION_SYNC_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Token revocation sync",
+            revocation_store.sync,
+            settings.TOKEN_REVOCATION_SYNC_INTERVAL_SECONDS,
+        )))
+    if settings.RECOMMENDATION_REBUILD_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Recommendation rebuild",
+            rebuild_recommendations,
+            settings.RECOMMENDATION_REBUILD_INTERVAL_SECONDS,
+        )))
+    if settings.CUSTOMER_STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Customer stats reconciliation",
+            run_reconciliation,
+            settings.CUSTOMER_STATS_RECONCILE_INTERVAL_SECONDS,
+        )))
+    if settings.CUSTOMER_RFM_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Customer segmentation",
+            refresh_segments,
+            settings.CUSTOMER_RFM_INTERVAL_SECONDS,
+        )))
+    if settings.CUSTOMER_DEDUP_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Customer duplicate detection",
+            run_duplicate_detection,
+            settings.CUSTOMER_DEDUP_INTERVAL_SECONDS,
+        )))
+    if settings.FORECAST_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_periodic(
+            "Demand forecast",
+            refresh_forecasts,
+            settings.FORECAST_INTERVAL_SECONDS,
+        )))
+
     yield
     print("Shutting down...")
+    for task in background_tasks:
+        task.cancel()
+    await invalidation_channel.stop()
+    await revocation_store.stop()
+    await rate_limiters.close()
+    password_pool.shutdown()
 
 
 def create_application() -> FastAPI:
@@ -39,8 +107,9 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
-    app.add_middleware(SecurityHeadersMiddleware)
+    # Added last so it is outermost and also covers 429 responses.
     app.add_middleware(RateLimiterMiddleware)
+    app.add_middleware(SecurityHeadersMiddleware)
 
     app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -0,0 +1,163 @@
+"""Declarative rate limit policies and the route matcher they compile into.
+
+``RATE_LIMIT_POLICIES`` is scanned once, when the matcher is compiled
+from the application's routes: every route template and method gets the
+first policy that applies to it. Per request, the matcher walks a
+segment trie to find the route template of the path, so the lookup
+costs the path depth rather than the number of routes or rules.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from app.core.config import settings
+
+API = settings.API_V1_PREFIX
+
+# Route template used for paths that match no route (404/405).
+UNMATCHED = "<unmatched>"
+
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Limit applied per caller and route template.
+
+    ``pattern`` is a route template, a ``/prefix/*`` or ``*``. A
+    ``limit`` of None exempts matching routes. ``cost`` is charged per
+    request out of ``limit``. With ``per_user`` authenticated callers
+    are keyed by user id, everyone else by client IP.
+    """
+
+    name: str
+    pattern: str
+    limit: int | None
+    window: int = 60
+    cost: int = 1
+    methods: frozenset[str] | None = None
+    per_user: bool = True
+
+    def applies(self, template: str, method: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        if self.pattern == "*":
+            return True
+        if self.pattern.endswith("/*"):
+            return template.startswith(self.pattern[:-1])
+        return template == self.pattern
+
+
+# First matching rule wins.
+RATE_LIMIT_POLICIES = (
+    RateLimitPolicy("health", f"{API}/health/*", limit=None),
+    RateLimitPolicy(
+        "login", f"{API}/auth/login", limit=10, methods=frozenset({"POST"}), per_user=False
+    ),
+    RateLimitPolicy(
+        "register", f"{API}/auth/register", limit=5, methods=frozenset({"POST"}), per_user=False
+    ),
+    RateLimitPolicy(
+        "refresh", f"{API}/auth/refresh", limit=30, methods=frozenset({"POST"}), per_user=False
+    ),
+    # Each chat completion costs an upstream model call.
+    RateLimitPolicy(
+        "ai_chat", f"{API}/ai/chat", limit=settings.RATE_LIMIT_PER_MINUTE, cost=10
+    ),
+    RateLimitPolicy(
+        "reads", "*", limit=settings.RATE_LIMIT_READS_PER_MINUTE,
+        methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+    ),
+    RateLimitPolicy("default", "*", limit=settings.RATE_LIMIT_PER_MINUTE),
+)
+
+
+class _Node:
+    __slots__ = ("static", "param", "rest", "routes")
+
+    def __init__(self):
+        self.static: dict[str, _Node] = {}
+        self.param: _Node | None = None
+        # ``{name:path}`` parameter: matches the remainder of the path.
+        self.rest: dict[str, tuple[str, RateLimitPolicy]] = {}
+        self.routes: dict[str, tuple[str, RateLimitPolicy]] = {}
+
+
+class RouteMatcher:
+    """Segment trie from request paths to ``(route template, policy)``.
+
+    Static segments take precedence over parameters, as they would for
+    routes declared first; the walk backtracks if a static branch dead
+    ends.
+    """
+
+    def __init__(self, policies: Iterable[RateLimitPolicy]):
+        self.policies = tuple(policies)
+        self._root = _Node()
+        self._unmatched = {
+            method: (UNMATCHED, self.policy_for(UNMATCHED, method))
+            for method in HTTP_METHODS
+        }
+
+    def policy_for(self, template: str, method: str) -> RateLimitPolicy:
+        for policy in self.policies:
+            if policy.applies(template, method):
+                return policy
+        raise LookupError(f"No rate limit policy for {method} {template}")
+
+    def add(self, template: str, methods: Iterable[str]) -> None:
+        """Register a route template for the given HTTP methods."""
+        node = self._root
+        segments = template.strip("/").split("/") if template != "/" else []
+        for i, segment in enumerate(segments):
+            if segment.startswith("{") and segment.endswith(":path}"):
+                for method in methods:
+                    node.rest[method] = (template, self.policy_for(template, method))
+                return
+            if segment.startswith("{"):
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
+        for method in methods:
+            node.routes[method] = (template, self.policy_for(template, method))
+
+    def _walk(
+        self, node: _Node, segments: list[str], i: int, method: str
+    ) -> tuple[str, RateLimitPolicy] | None:
+        if i == len(segments):
+            return node.routes.get(method)
+        child = node.static.get(segments[i])
+        if child is not None:
+            found = self._walk(child, segments, i + 1, method)
+            if found is not None:
+                return found
+        if node.param is not None:
+            found = self._walk(node.param, segments, i + 1, method)
+            if found is not None:
+                return found
+        return node.rest.get(method)
+
+    def match(self, method: str, path: str) -> tuple[str, RateLimitPolicy]:
+        """Route template and policy for a request."""
+        segments = path.strip("/").split("/") if path != "/" else []
+        found = self._walk(self._root, segments, 0, method)
+        if found is not None:
+            return found
+
+        unmatched = self._unmatched.get(method)
+        if unmatched is None:
+            unmatched = (UNMATCHED, self.policy_for(UNMATCHED, method))
+        return unmatched
+
+
+def compile_policies(
+    routes: Iterable, policies: Iterable[RateLimitPolicy] = RATE_LIMIT_POLICIES
+) -> RouteMatcher:
+    """Build a matcher over every HTTP route of the application."""
+    matcher = RouteMatcher(policies)
+    for route in routes:
+        methods = getattr(route, "methods", None)
+        if methods:
+            matcher.add(route.path, methods)
+    return matcher
@@ -1,84 +1,384 @@
-"""Rate limiting middleware using sliding window algorithm."""
+"""Rate limiting middleware using the generic cell rate algorithm (GCRA).
 
-from datetime import datetime
-from typing import Callable
+Each request is charged to its caller (user id or client IP) and route
+template under the policy ``rate_limit_policy`` assigns to that route.
+Limits are enforced per worker in memory, or shared by every worker
+through Redis when ``RATE_LIMIT_BACKEND`` is ``redis``.
+"""
 
-from fastapi import Request, Response, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+import time
+from collections import OrderedDict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.security import decode_token
+from app.middleware.rate_limit_policy import (
+    RATE_LIMIT_POLICIES,
+    RateLimitPolicy,
+    RouteMatcher,
+    compile_policies,
+)
+
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = OSError
 
 
 class InMemoryRateLimiter:
-    """Simple in-memory rate limiter for development."""
+    """O(1) in-memory rate limiter storing one float per identifier.
+
+    GCRA tracks each identifier's theoretical arrival time (TAT): every
+    request pushes it ``window / limit`` seconds further out, and a
+    request is refused while that would put it more than ``window``
+    ahead of now. This allows ``limit`` requests per ``window`` with
+    bursts up to ``limit``, like a token bucket.
 
-    def __init__(self, limit: int = 100, window: int = 60):
+    An identifier whose TAT is in the past has a full allowance, so
+    dropping it loses nothing; ``evict_idle`` does that in the
+    background. Identifiers are kept in least-recently-used order and
+    the oldest are dropped beyond ``max_keys``.
+    """
+
+    def __init__(self, limit: int = 100, window: int = 60, max_keys: int = 100000):
         self.limit = limit
         self.window = window
-        self._requests: dict[str, list[float]] = {}
+        self.max_keys = max_keys
+        self.interval = window / limit
+        self._tat: OrderedDict[str, float] = OrderedDict()
+        self.evictions = 0
 
-    def is_allowed(self, identifier: str) -> tuple[bool, int, int]:
+    def is_allowed(self, identifier: str, cost: int = 1) -> tuple[bool, int, int]:
         """
         Check if request is allowed.
         Returns: (allowed, remaining, reset_time)
+
+        ``reset_time`` is the unix time at which the full allowance is
+        back, or, for a refused request, when the next one will pass.
         """
-        now = datetime.utcnow().timestamp()
-        window_start = now - self.window
+        now = time.monotonic()
+        tat = max(self._tat.get(identifier, now), now)
+        new_tat = tat + self.interval * cost
+        allow_at = new_tat - self.window
+        wall_offset = time.time() - now
 
-        if identifier not in self._requests:
-            self._requests[identifier] = []
+        if allow_at > now:
+            return False, 0, math.ceil(allow_at + wall_offset)
 
-        self._requests[identifier] = [
-            ts for ts in self._requests[identifier] if ts > window_start
-        ]
+        self._tat[identifier] = new_tat
+        self._tat.move_to_end(identifier)
+        if len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+            self.evictions += 1
 
-        request_count = len(self._requests[identifier])
+        remaining = int((now - allow_at) / self.interval)
+        return True, remaining, math.ceil(new_tat + wall_offset)
 
-        if request_count < self.limit:
-            self._requests[identifier].append(now)
-            remaining = self.limit - request_count - 1
-            reset_time = int(now) + self.window
-            return True, remaining, reset_time
-        else:
-            remaining = 0
-            reset_time = int(now) + self.window
-            return False, remaining, reset_time
+    async def check(self, identifier: str, cost: int = 1) -> tuple[bool, int, int]:
+        """Async form of ``is_allowed`` shared with the Redis limiter."""
+        return self.is_allowed(identifier, cost)
 
+    async def check_many(
+        self, checks: list[tuple[str, int]]
+    ) -> list[tuple[bool, int, int]]:
+        """Run several ``(identifier, cost)`` checks."""
+        return [self.is_allowed(identifier, cost) for identifier, cost in checks]
 
-rate_limiter = InMemoryRateLimiter(
-    limit=settings.RATE_LIMIT_PER_MINUTE,
-    window=60,
-)
+    async def close(self) -> None:
+        pass
 
+    async def evict_idle(self) -> None:
+        """Drop identifiers whose allowance has fully recovered."""
+        now = time.monotonic()
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        self.evictions += len(idle)
 
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware."""
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._tat),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+        }
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if request.url.path.startswith("/api/v1/health"):
-            return await call_next(request)
 
-        client_ip = request.client.host if request.client else "unknown"
-        identifier = f"{client_ip}:{request.url.path}"
+# GCRA over Redis. KEYS[1] holds the TAT as unix seconds; ARGV is
+# (interval, window, cost). Replies {allowed, remaining, reset_time}.
+# Uses the Redis clock so workers on different hosts agree, and expires
+# the key once its allowance has fully recovered.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
 
-        allowed, remaining, reset_time = rate_limiter.is_allowed(identifier)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - window
+if allow_at > now then
+    return {0, 0, math.ceil(allow_at)}
+end
 
-        if not allowed:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded",
-                headers={
-                    "X-RateLimit-Limit": str(settings.RATE_LIMIT_PER_MINUTE),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(reset_time),
-                    "Retry-After": str(60),
-                },
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, math.floor((now - allow_at) / interval), math.ceil(new_tat)}
+"""
+
+# Seconds to limit locally after Redis fails before trying it again.
+REDIS_RETRY_SECONDS = 5.0
+# Keep a slow Redis from stalling every request.
+REDIS_TIMEOUT_SECONDS = 0.25
+
+
+class RedisRateLimiter:
+    """GCRA limiter shared by every worker and host through Redis.
+
+    Each check is a single EVALSHA round-trip, and ``check_many``
+    pipelines several. While Redis is unreachable, checks fall back to
+    the per-worker ``fallback`` limiter for ``REDIS_RETRY_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        redis,
+        limit: int,
+        window: int,
+        fallback: InMemoryRateLimiter,
+        prefix: str = "ratelimit:",
+    ):
+        self.limit = limit
+        self.window = window
+        self.interval = window / limit
+        self.prefix = prefix
+        self.fallback = fallback
+        self._redis = redis
+        self._script = redis.register_script(GCRA_SCRIPT)
+        self._retry_at = 0.0
+        self.fallbacks = 0
+
+    def _args(self, cost: int) -> list:
+        return [self.interval, self.window, cost]
+
+    def _failed(self, error: Exception) -> None:
+        if self._retry_at == 0.0:
+            print(f"Rate limiter Redis unavailable, limiting locally: {error}")
+        self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _available(self) -> bool:
+        return self._retry_at == 0.0 or time.monotonic() >= self._retry_at
+
+    async def check(self, identifier: str, cost: int = 1) -> tuple[bool, int, int]:
+        """Check one identifier with a single script call."""
+        if self._available():
+            try:
+                allowed, remaining, reset_time = await self._script(
+                    keys=[self.prefix + identifier], args=self._args(cost)
+                )
+            except RedisError as e:
+                self._failed(e)
+            else:
+                self._retry_at = 0.0
+                return bool(allowed), int(remaining), int(reset_time)
+
+        self.fallbacks += 1
+        return self.fallback.is_allowed(identifier, cost)
+
+    async def check_many(
+        self, checks: list[tuple[str, int]]
+    ) -> list[tuple[bool, int, int]]:
+        """Run several checks in one pipelined round-trip."""
+        if self._available():
+            pipe = self._redis.pipeline(transaction=False)
+            for identifier, cost in checks:
+                await self._script(
+                    keys=[self.prefix + identifier], args=self._args(cost), client=pipe
+                )
+            try:
+                replies = await pipe.execute()
+            except RedisError as e:
+                self._failed(e)
+            else:
+                self._retry_at = 0.0
+                return [
+                    (bool(allowed), int(remaining), int(reset_time))
+                    for allowed, remaining, reset_time in replies
+                ]
+
+        self.fallbacks += 1
+        return [
+            self.fallback.is_allowed(identifier, cost) for identifier, cost in checks
+        ]
+
+    async def close(self) -> None:
+        await self._redis.close()
+
+    async def evict_idle(self) -> None:
+        """Redis expires idle keys itself; only the fallback needs sweeping."""
+        await self.fallback.evict_idle()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "redis_available": self._available(),
+            "fallbacks": self.fallbacks,
+            "fallback": self.fallback.stats(),
+        }
+
+
+class PolicyLimiters:
+    """One limiter per rate limit policy, selected by ``RATE_LIMIT_BACKEND``.
+
+    With the Redis backend every policy shares one client and keeps its
+    keys under its own prefix.
+    """
+
+    def __init__(self, policies: tuple[RateLimitPolicy, ...]):
+        client = None
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            if aioredis is None:
+                print("redis package not installed; rate limiting is per worker")
+            else:
+                client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+                    socket_timeout=REDIS_TIMEOUT_SECONDS,
+                )
+        self._client = client
+
+        self._limiters: dict[str, InMemoryRateLimiter | RedisRateLimiter] = {}
+        for policy in policies:
+            if policy.limit is None:
+                continue
+            limiter = InMemoryRateLimiter(
+                limit=policy.limit,
+                window=policy.window,
+                max_keys=settings.RATE_LIMIT_MAX_KEYS,
             )
+            if client is not None:
+                limiter = RedisRateLimiter(
+                    client,
+                    limit=policy.limit,
+                    window=policy.window,
+                    fallback=limiter,
+                    prefix=f"ratelimit:{policy.name}:",
+                )
+            self._limiters[policy.name] = limiter
+
+    def __getitem__(self, name: str) -> InMemoryRateLimiter | RedisRateLimiter:
+        return self._limiters[name]
+
+    async def evict_idle(self) -> None:
+        for limiter in self._limiters.values():
+            await limiter.evict_idle()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+    def stats(self) -> dict:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+rate_limiters = PolicyLimiters(RATE_LIMIT_POLICIES)
+
+
+def caller_identity(scope: Scope, policy: RateLimitPolicy) -> str:
+    """User id from a valid bearer token when the policy allows, else client IP.
 
-        response = await call_next(request)
+    Token claims come from the verified-token cache, so this rarely
+    costs a signature check. Invalid tokens are keyed by IP rather than
+    rejected here; authentication happens in the route.
+    """
+    if policy.per_user:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                if value[:7].lower() == b"bearer ":
+                    payload = decode_token(value[7:].decode("latin-1"))
+                    if payload and payload.get("type") == "access" and payload.get("sub"):
+                        return f"user:{payload['sub']}"
+                break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+RATE_LIMITED_BODY = b'{"detail":"Rate limit exceeded"}'
+RATE_LIMITED_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(RATE_LIMITED_BODY)).encode()),
+]
+
+
+class RateLimiterMiddleware:
+    """Pure ASGI rate limiting middleware.
+
+    Rate limit headers are appended to ``http.response.start`` and
+    refused requests get a 429 response directly, without wrapping the
+    downstream application or its response body.
+    """
+
+    def __init__(self, app: ASGIApp, policies: tuple[RateLimitPolicy, ...] = RATE_LIMIT_POLICIES):
+        self.app = app
+        self.policies = policies
+        # The shared limiters are swept by the lifespan job.
+        self.limiters = (
+            rate_limiters if policies is RATE_LIMIT_POLICIES else PolicyLimiters(policies)
+        )
+        self._matcher: RouteMatcher | None = None
+        self._limit_values = {
+            policy.name: str(policy.limit).encode()
+            for policy in policies
+            if policy.limit is not None
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Compiled on the first request, once every route is registered.
+        if self._matcher is None:
+            self._matcher = compile_policies(scope["app"].routes, self.policies)
+
+        template, policy = self._matcher.match(scope["method"], scope["path"])
+        if policy.limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        identifier = f"{caller_identity(scope, policy)}:{template}"
+        allowed, remaining, reset_time = await self.limiters[policy.name].check(
+            identifier, policy.cost
+        )
+        limit_headers = [
+            (b"x-ratelimit-limit", self._limit_values[policy.name]),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+            (b"x-ratelimit-reset", str(reset_time).encode()),
+        ]
+
+        if not allowed:
+            retry_after = max(reset_time - int(time.time()), 1)
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    *RATE_LIMITED_HEADERS,
+                    *limit_headers,
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": RATE_LIMITED_BODY})
+            return
 
-        response.headers["X-RateLimit-Limit"] = str(settings.RATE_LIMIT_PER_MINUTE)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_time)
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *limit_headers]
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
@@ -1,32 +1,57 @@
 """Security middleware implementing OWASP best practices."""
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers to all responses."""
-
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response: Response = await call_next(request)
-
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = (
-            "max-age=31536000; includeSubDomains"
-        )
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = (
-            "geolocation=(), microphone=(), camera=()"
-        )
-        response.headers["Content-Security-Policy"] = (
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Encoded once at import; appended to every response as raw byte pairs.
+SECURITY_HEADERS: list[tuple[bytes, bytes]] = [
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in (
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+        (
+            "Content-Security-Policy",
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline'; "
             "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
             "font-src 'self' https://fonts.gstatic.com; "
             "img-src 'self' data: https:; "
-            "connect-src 'self' http://localhost:* https://api.openai.com"
-        )
+            "connect-src 'self' http://localhost:* https://api.openai.com",
+        ),
+    )
+]
+SECURITY_HEADER_NAMES = frozenset(name for name, _ in SECURITY_HEADERS)
+
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware adding security headers to all responses.
+
+    Headers are injected into ``http.response.start`` without wrapping
+    the request or response body, so streaming responses pass through
+    untouched. Like assignment on ``response.headers``, the values
+    replace any the route set itself.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    header
+                    for header in message.get("headers", ())
+                    if header[0].lower() not in SECURITY_HEADER_NAMES
+                ]
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
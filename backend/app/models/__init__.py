@@ -1,15 +1,27 @@
 """Database models."""
 
 from app.models.user import User
-from app.models.order import Order, OrderItem
-from app.models.product import Product, ProductCategory
-from app.models.customer import Customer
+from app.models.order import Order, OrderGeoDaily, OrderItem
+from app.models.product import DemandForecast, Product, ProductCategory
+from app.models.import_job import ImportJob
+from app.models.customer import (
+    Customer,
+    CustomerDuplicate,
+    CustomerSearchToken,
+    CustomerSegment,
+)
 
 __all__ = [
     "User",
     "Order",
     "OrderItem",
+    "OrderGeoDaily",
     "Product",
     "ProductCategory",
+    "DemandForecast",
+    "ImportJob",
     "Customer",
+    "CustomerDuplicate",
+    "CustomerSearchToken",
+    "CustomerSegment",
 ]
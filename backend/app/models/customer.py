@@ -1,7 +1,17 @@
 """Customer model."""
 
 from datetime import datetime
-from sqlalchemy import String, Text, DateTime
+from decimal import Decimal
+from sqlalchemy import (
+    String,
+    Text,
+    DateTime,
+    Float,
+    Index,
+    ForeignKey,
+    Numeric,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -11,6 +21,10 @@ class Customer(Base):
     """Customer model."""
 
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_active_created", "is_active", "created_at", "id"),
+        Index("ix_customers_active_total_spent", "is_active", "total_spent", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
@@ -21,6 +35,12 @@ class Customer(Base):
     city: Mapped[str | None] = mapped_column(String(100), nullable=True)
     country: Mapped[str | None] = mapped_column(String(100), nullable=True)
     is_active: Mapped[bool] = mapped_column(default=True)
+    # Denormalized from non-void orders; kept in step by order writes.
+    orders_count: Mapped[int] = mapped_column(default=0)
+    total_spent: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
+    last_order_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
@@ -40,4 +60,57 @@ class Customer(Base):
         return f"<Customer {self.email}>"
 
 
+class CustomerSegment(Base):
+    """Latest RFM scores, segment and lifetime value of a customer."""
+
+    __tablename__ = "customer_segments"
+
+    customer_id: Mapped[int] = mapped_column(
+        ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True
+    )
+    segment: Mapped[str] = mapped_column(String(20), index=True)
+    recency_days: Mapped[int] = mapped_column()
+    frequency: Mapped[int] = mapped_column()
+    monetary: Mapped[Decimal] = mapped_column(Numeric(12, 2))
+    r_score: Mapped[int] = mapped_column()
+    f_score: Mapped[int] = mapped_column()
+    m_score: Mapped[int] = mapped_column()
+    clv: Mapped[Decimal] = mapped_column(Numeric(12, 2))
+    computed_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class CustomerDuplicate(Base):
+    """A pair of customers the duplicate detection job suggests merging."""
+
+    __tablename__ = "customer_duplicates"
+    __table_args__ = (
+        UniqueConstraint("customer_id", "duplicate_id"),
+        Index("ix_customer_duplicates_score", "score"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    customer_id: Mapped[int] = mapped_column(
+        ForeignKey("customers.id", ondelete="CASCADE")
+    )
+    duplicate_id: Mapped[int] = mapped_column(
+        ForeignKey("customers.id", ondelete="CASCADE"), index=True
+    )
+    score: Mapped[float] = mapped_column(Float)
+    reasons: Mapped[str] = mapped_column(String(100))
+    detected_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class CustomerSearchToken(Base):
+    """Inverted n-gram index row: one search token of one customer."""
+
+    __tablename__ = "customer_search_tokens"
+
+    token: Mapped[str] = mapped_column(String(8), primary_key=True)
+    customer_id: Mapped[int] = mapped_column(
+        ForeignKey("customers.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+
 from app.models.order import Order
@@ -0,0 +1,22 @@
+"""Import job model."""
+
+from datetime import datetime
+from sqlalchemy import String, Text, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ImportJob(Base):
+    """Progress of a bulk import, stored so any worker can answer a poll.
+
+    ``payload`` is the job schema serialized as JSON; ``kind`` keeps the
+    product and customer job id namespaces apart.
+    """
+
+    __tablename__ = "import_jobs"
+
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True)
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    payload: Mapped[str] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, index=True)
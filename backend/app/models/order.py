@@ -1,9 +1,18 @@
 """Order models."""
 
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum as PyEnum
-from sqlalchemy import String, Numeric, Integer, DateTime, ForeignKey, Enum
+from sqlalchemy import (
+    String,
+    Numeric,
+    Integer,
+    Date,
+    DateTime,
+    ForeignKey,
+    Enum,
+    Index,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -20,18 +29,24 @@ class OrderStatus(str, PyEnum):
     REFUNDED = "refunded"
 
 
+# Orders in these states no longer count as sales or customer spend.
+VOID_STATUSES = (OrderStatus.CANCELLED, OrderStatus.REFUNDED)
+
+
 class Order(Base):
     """Order model."""
 
     __tablename__ = "orders"
+    __table_args__ = (
+        # Serves per-customer lookups and their newest-first history pages.
+        Index("ix_orders_customer_created", "customer_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     order_number: Mapped[str] = mapped_column(
         String(50), unique=True, index=True
     )
-    customer_id: Mapped[int] = mapped_column(
-        ForeignKey("customers.id"), index=True
-    )
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"))
     status: Mapped[OrderStatus] = mapped_column(
         Enum(OrderStatus), default=OrderStatus.PENDING, index=True
     )
@@ -44,6 +59,10 @@ class Order(Base):
         String(500), nullable=True
     )
     notes: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    # Customer location when the order was placed ("" when unknown), so
+    # geo aggregates are reversed from the bucket the order was counted in.
+    country: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    city: Mapped[str | None] = mapped_column(String(100), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, index=True
     )
@@ -83,4 +102,17 @@ class OrderItem(Base):
         return f"<OrderItem {self.product_name} x{self.quantity}>"
 
 
+class OrderGeoDaily(Base):
+    """Non-void order count and revenue per customer location and day."""
+
+    __tablename__ = "order_geo_daily"
+
+    # Unknown locations are stored as "" so they can be part of the key.
+    country: Mapped[str] = mapped_column(String(100), primary_key=True)
+    city: Mapped[str] = mapped_column(String(100), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
+    order_count: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+
+
 from app.models.customer import Customer
@@ -2,7 +2,17 @@
 
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import String, Text, Numeric, Integer, DateTime, ForeignKey
+from sqlalchemy import (
+    String,
+    Text,
+    Numeric,
+    Integer,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -17,6 +27,9 @@ class ProductCategory(Base):
     name: Mapped[str] = mapped_column(String(100), unique=True)
     slug: Mapped[str] = mapped_column(String(100), unique=True, index=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    low_stock_threshold: Mapped[int | None] = mapped_column(
+        Integer, nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
@@ -33,6 +46,26 @@ class Product(Base):
     """Product model."""
 
     __tablename__ = "products"
+    __table_args__ = (
+        # Only low-stock rows are indexed, so the replenishment feed reads
+        # O(result) entries regardless of catalog size.
+        Index(
+            "ix_products_low_stock",
+            "stock_quantity",
+            "id",
+            postgresql_where=text("is_low_stock"),
+            sqlite_where=text("is_low_stock = 1"),
+        ),
+        # Newest-first listings, with and without a category filter
+        Index("ix_products_active_created", "is_active", "created_at", "id"),
+        Index(
+            "ix_products_category_active_created",
+            "category_id",
+            "is_active",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), index=True)
@@ -44,6 +77,10 @@ class Product(Base):
         Numeric(10, 2), nullable=True
     )
     stock_quantity: Mapped[int] = mapped_column(Integer, default=0)
+    low_stock_threshold: Mapped[int | None] = mapped_column(
+        Integer, nullable=True
+    )
+    is_low_stock: Mapped[bool] = mapped_column(default=False)
     category_id: Mapped[int | None] = mapped_column(
         ForeignKey("product_categories.id"), nullable=True
     )
@@ -62,3 +99,17 @@ class Product(Base):
 
     def __repr__(self) -> str:
         return f"<Product {self.name}>"
+
+
+class DemandForecast(Base):
+    """Latest demand forecast and reorder point of a product."""
+
+    __tablename__ = "product_forecasts"
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    model: Mapped[str] = mapped_column(String(10))
+    daily_demand: Mapped[float] = mapped_column(Float)
+    reorder_point: Mapped[int] = mapped_column(Integer)
+    computed_at: Mapped[datetime] = mapped_column(DateTime)
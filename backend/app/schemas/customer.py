@@ -1,7 +1,8 @@
 """Customer schemas."""
 
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field
+from decimal import Decimal
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 
 class CustomerBase(BaseModel):
@@ -16,10 +17,25 @@ class CustomerBase(BaseModel):
     country: str | None = Field(None, max_length=100)
 
 
+def normalize_email(email: str | None) -> str | None:
+    """Lower-case an email so it matches the keys written by the import."""
+    return email.strip().lower() if email is not None else None
+
+
 class CustomerCreate(CustomerBase):
     """Schema for creating a customer."""
 
-    pass
+    _normalize_email = field_validator("email")(normalize_email)
+
+
+class CustomerImportRow(CustomerBase):
+    """Schema for one row of a bulk customer import.
+
+    Emails get a syntactic pattern check instead of ``EmailStr``, whose
+    IDNA normalization dominates the cost of validating large files.
+    """
+
+    email: str = Field(..., max_length=255, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 
 class CustomerUpdate(BaseModel):
@@ -34,14 +50,129 @@ class CustomerUpdate(BaseModel):
     country: str | None = Field(None, max_length=100)
     is_active: bool | None = None
 
+    _normalize_email = field_validator("email")(normalize_email)
+
 
 class CustomerResponse(CustomerBase):
     """Schema for customer response."""
 
     id: int
     is_active: bool
+    orders_count: int
+    total_spent: Decimal
+    last_order_at: datetime | None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class CustomerSegmentResponse(BaseModel):
+    """Schema for a customer's RFM scores and lifetime value."""
+
+    customer_id: int
+    segment: str
+    recency_days: int
+    frequency: int
+    monetary: Decimal
+    r_score: int
+    f_score: int
+    m_score: int
+    clv: Decimal
+    computed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CustomerSegmentSummary(BaseModel):
+    """Schema for per-segment customer counts."""
+
+    segment: str
+    customers: int
+    average_clv: Decimal
+
+
+class CohortRow(BaseModel):
+    """Schema for one acquisition cohort's retention by month offset."""
+
+    cohort: str
+    customers: int
+    active: list[int]
+    retention: list[float]
+
+
+class CohortRetention(BaseModel):
+    """Schema for the cohort retention matrix."""
+
+    basis: str
+    cohorts: list[CohortRow]
+    snapshot_at: datetime
+
+
+class CustomerImportError(BaseModel):
+    """A row rejected during bulk import."""
+
+    row: int
+    detail: str
+
+
+class CustomerImportJob(BaseModel):
+    """Progress and outcome of a bulk customer import."""
+
+    id: str
+    policy: str
+    status: str = "running"
+    rows_processed: int = 0
+    rows_inserted: int = 0
+    rows_merged: int = 0
+    rows_skipped: int = 0
+    rows_duplicate: int = 0
+    rows_failed: int = 0
+    errors: list[CustomerImportError] = []
+    detail: str | None = None
+    started_at: datetime
+    finished_at: datetime | None = None
+
+
+class CustomerDuplicateResponse(BaseModel):
+    """Schema for a suggested duplicate pair."""
+
+    customer_id: int
+    duplicate_id: int
+    score: float
+    reasons: str
+    detected_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CustomerMergeItem(BaseModel):
+    """Customers to fold into ``target_id``."""
+
+    target_id: int
+    source_ids: list[int] = Field(..., min_length=1)
+
+
+class CustomerMergeRequest(BaseModel):
+    """Schema for a bulk customer merge."""
+
+    merges: list[CustomerMergeItem] = Field(..., min_length=1, max_length=10000)
+
+
+class CustomerMergeResult(BaseModel):
+    """Outcome of a bulk customer merge."""
+
+    customers_merged: int
+    orders_moved: int
+
+
+class GeoSales(BaseModel):
+    """Orders and revenue for one location over a date range."""
+
+    country: str | None
+    city: str | None = None
+    orders: int
+    revenue: Decimal
@@ -56,8 +56,8 @@ class OrderUpdate(BaseModel):
     notes: str | None = None
 
 
-class OrderResponse(OrderBase):
-    """Schema for order response."""
+class OrderSummary(OrderBase):
+    """Schema for an order without its line items."""
 
     id: int
     order_number: str
@@ -69,12 +69,33 @@ class OrderResponse(OrderBase):
     total_amount: Decimal
     created_at: datetime
     updated_at: datetime
-    items: list[OrderItemResponse] = []
 
     class Config:
         from_attributes = True
 
 
+class OrderResponse(OrderSummary):
+    """Schema for order response."""
+
+    items: list[OrderItemResponse] = []
+
+
+class CustomerOrder(OrderSummary):
+    """Order in a customer's history; ``items`` is null unless requested."""
+
+    items: list[OrderItemResponse] | None = None
+
+
+class CustomerOrderHistory(BaseModel):
+    """One page of a customer's orders with their lifetime totals."""
+
+    customer_id: int
+    orders_count: int
+    total_spent: Decimal
+    last_order_at: datetime | None
+    orders: list[CustomerOrder]
+
+
 class OrderListResponse(BaseModel):
     """Schema for paginated order list response."""
 
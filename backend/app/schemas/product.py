@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from decimal import Decimal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class ProductBase(BaseModel):
@@ -14,6 +14,7 @@ class ProductBase(BaseModel):
     price: Decimal = Field(..., ge=0)
     cost_price: Decimal | None = Field(None, ge=0)
     stock_quantity: int = Field(0, ge=0)
+    low_stock_threshold: int | None = Field(None, ge=0)
     category_id: int | None = None
     image_url: str | None = None
 
@@ -33,6 +34,7 @@ class ProductUpdate(BaseModel):
     price: Decimal | None = Field(None, ge=0)
     cost_price: Decimal | None = Field(None, ge=0)
     stock_quantity: int | None = Field(None, ge=0)
+    low_stock_threshold: int | None = Field(None, ge=0)
     category_id: int | None = None
     image_url: str | None = None
     is_active: bool | None = None
@@ -44,6 +46,7 @@ class ProductResponse(ProductBase):
     id: int
     slug: str
     is_active: bool
+    is_low_stock: bool
     created_at: datetime
     updated_at: datetime
 
@@ -51,11 +54,135 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class LowStockProduct(BaseModel):
+    """Product below its effective low-stock threshold."""
+
+    id: int
+    name: str
+    sku: str
+    stock_quantity: int
+    low_stock_threshold: int
+    category_id: int | None = None
+
+
+class RelatedProduct(BaseModel):
+    """Product frequently bought together with another."""
+
+    product_id: int
+    name: str
+    co_occurrences: int
+    confidence: float
+
+
+class ProductForecast(BaseModel):
+    """Demand forecast and replenishment figures for a product."""
+
+    product_id: int
+    model: str
+    daily_demand: float
+    stock_quantity: int
+    days_of_cover: float | None
+    reorder_point: int
+    needs_reorder: bool
+    computed_at: datetime
+
+
+class ProductListItem(ProductResponse):
+    """Product in a listing, with its category name embedded."""
+
+    category_name: str | None = None
+
+
+class FacetCount(BaseModel):
+    """Number of matching products for one facet value."""
+
+    value: bool | int | str | None
+    label: str | None = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Facet counts for the product filter sidebar."""
+
+    category: list[FacetCount] | None = None
+    price: list[FacetCount] | None = None
+    stock: list[FacetCount] | None = None
+
+
+class ProductFacetedList(BaseModel):
+    """A page of products together with facet counts."""
+
+    items: list[ProductListItem]
+    total: int
+    facets: ProductFacets
+
+
+class ProductImportError(BaseModel):
+    """A row rejected during bulk import."""
+
+    row: int
+    detail: str
+
+
+class ProductImportJob(BaseModel):
+    """Progress and outcome of a bulk product import."""
+
+    id: str
+    status: str = "running"
+    rows_processed: int = 0
+    rows_upserted: int = 0
+    rows_failed: int = 0
+    errors: list[ProductImportError] = []
+    detail: str | None = None
+    started_at: datetime
+    finished_at: datetime | None = None
+
+
+class ProductBulkItem(BaseModel):
+    """New values for one product, addressed by id or SKU."""
+
+    id: int | None = None
+    sku: str | None = Field(None, max_length=50)
+    price: Decimal | None = Field(None, ge=0)
+    cost_price: Decimal | None = Field(None, ge=0)
+    stock_quantity: int | None = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_identifier(self) -> "ProductBulkItem":
+        if (self.id is None) == (self.sku is None):
+            raise ValueError("Exactly one of id or sku is required")
+        return self
+
+
+class ProductBulkRule(BaseModel):
+    """Percentage adjustment applied to every active product in a category."""
+
+    category_id: int
+    price_percent: Decimal | None = Field(None, ge=-100)
+    cost_price_percent: Decimal | None = Field(None, ge=-100)
+
+
+class ProductBulkUpdate(BaseModel):
+    """Schema for bulk price and stock updates."""
+
+    items: list[ProductBulkItem] = Field([], max_length=50000)
+    rules: list[ProductBulkRule] = Field([], max_length=100)
+
+
+class ProductBulkUpdateResult(BaseModel):
+    """Outcome of a bulk update."""
+
+    updated: int
+    not_found_ids: list[int] = []
+    not_found_skus: list[str] = []
+
+
 class ProductCategoryBase(BaseModel):
     """Base product category schema."""
 
     name: str = Field(..., max_length=100)
     description: str | None = None
+    low_stock_threshold: int | None = Field(None, ge=0)
 
 
 class ProductCategoryCreate(ProductCategoryBase):
@@ -64,6 +191,14 @@ class ProductCategoryCreate(ProductCategoryBase):
     pass
 
 
+class ProductCategoryUpdate(BaseModel):
+    """Schema for updating a product category."""
+
+    name: str | None = Field(None, max_length=100)
+    description: str | None = None
+    low_stock_threshold: int | None = Field(None, ge=0)
+
+
 class ProductCategoryResponse(ProductCategoryBase):
     """Schema for product category response."""
 
@@ -1,7 +1,9 @@
 """User schemas."""
 
 from datetime import datetime
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+
+PASSWORD_MIN_LENGTH = 8
 
 
 class UserBase(BaseModel):
@@ -14,7 +16,7 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     """Schema for creating a user."""
 
-    password: str
+    password: str = Field(..., min_length=PASSWORD_MIN_LENGTH)
 
 
 class UserUpdate(BaseModel):
@@ -22,7 +24,7 @@ class UserUpdate(BaseModel):
 
     email: EmailStr | None = None
     full_name: str | None = None
-    password: str | None = None
+    password: str | None = Field(None, min_length=PASSWORD_MIN_LENGTH)
     is_active: bool | None = None
 
 
@@ -46,6 +48,12 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token."""
+
+    refresh_token: str
+
+
 class TokenPayload(BaseModel):
     """Schema for token payload."""
 
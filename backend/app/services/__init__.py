@@ -0,0 +1 @@
+"""Domain services shared by API routes and background jobs."""
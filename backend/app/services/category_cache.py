@@ -0,0 +1,80 @@
+"""Versioned in-process cache of product categories."""
+
+import hashlib
+import time
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidation_channel
+from app.core.config import settings
+from app.models.product import ProductCategory
+from app.schemas.product import ProductCategoryResponse
+
+CACHE_NAME = "category"
+
+_categories_adapter = TypeAdapter(list[ProductCategoryResponse])
+
+
+class CategoryCache:
+    """Category list kept until a write bumps the version or the TTL lapses.
+
+    Categories change rarely, so the whole list is reloaded with a single
+    query whenever the loaded version is stale. Writes on other workers
+    only bump the version through the invalidation channel; without one
+    the TTL bounds how long a peer's edit stays invisible. The ETag is
+    derived from the serialized payload, so it is stable across workers.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self.payload = b"[]"
+        self.etag = ""
+        self.names: dict[int, str] = {}
+
+    def invalidate(self, key=None) -> None:
+        self.version += 1
+
+    def clear(self) -> None:
+        self.version += 1
+
+    async def load(self, db: AsyncSession) -> "CategoryCache":
+        """Reload from the database if a write happened since the last load
+        or the loaded list is older than the TTL."""
+        if (
+            self._loaded_version == self.version
+            and time.monotonic() - self._loaded_at < self.ttl
+        ):
+            return self
+
+        version = self.version
+        loaded_at = time.monotonic()
+        result = await db.execute(
+            select(ProductCategory).order_by(ProductCategory.id)
+        )
+        categories = [
+            ProductCategoryResponse.model_validate(category)
+            for category in result.scalars().all()
+        ]
+
+        self.payload = _categories_adapter.dump_json(categories)
+        self.etag = f'"{hashlib.sha1(self.payload).hexdigest()}"'
+        self.names = {category.id: category.name for category in categories}
+        # A write that raced with this load leaves the version ahead, so
+        # the next call reloads.
+        self._loaded_version = version
+        self._loaded_at = loaded_at
+        return self
+
+
+category_cache = CategoryCache(ttl=settings.CATEGORY_CACHE_TTL_SECONDS)
+invalidation_channel.register(CACHE_NAME, category_cache)
+
+
+async def invalidate_categories() -> None:
+    """Bump the category version on every worker."""
+    await invalidation_channel.invalidate(CACHE_NAME)
@@ -0,0 +1,250 @@
+"""Monthly cohort retention matrix.
+
+Months are bucketed as integers (months since 1970-01) so cohort offsets
+are plain subtraction. One pass over non-void orders builds, per
+customer, the month of their first order and a boolean activity row
+over the reporting window; the ``cohort x offset`` matrix is then
+accumulated with ``np.add.at`` for both cohort definitions at once.
+
+The snapshot covers closed months only and is cached until the month
+rolls over or the TTL expires. The still-changing current month is
+added on every request from the orders placed since the month began.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.customer import Customer
+from app.models.order import VOID_STATUSES, Order
+
+BASES = ("signup", "first_order")
+
+cohort_cache = TTLCache(max_size=4, ttl=settings.CUSTOMER_COHORT_CACHE_TTL_SECONDS)
+_snapshot_lock = asyncio.Lock()
+
+
+def month_index(values) -> np.ndarray:
+    """Months since 1970-01 for datetimes or ``datetime64`` values."""
+    return np.asarray(values, dtype="datetime64[M]").astype(np.int64)
+
+
+def month_start(index: int) -> datetime:
+    return np.datetime64(index, "M").astype("datetime64[s]").astype(datetime)
+
+
+def month_label(index: int) -> str:
+    return str(np.datetime64(index, "M"))
+
+
+def accumulate_retention(
+    cohort: np.ndarray,
+    activity: np.ndarray,
+    months: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Cohort sizes and active-customer counts per ``(cohort, offset)``.
+
+    ``cohort`` holds each customer's window-relative cohort month (-1 if
+    outside the window) and ``activity`` their ``customers x months``
+    purchase flags.
+    """
+    in_window = cohort >= 0
+    sizes = np.bincount(cohort[in_window], minlength=months)
+
+    rows, columns = np.nonzero(activity & in_window[:, None])
+    offsets = columns - cohort[rows]
+    keep = offsets >= 0
+    counts = np.zeros((months, months), dtype=np.int64)
+    np.add.at(counts, (cohort[rows[keep]], offsets[keep]), 1)
+    return sizes, counts
+
+
+@dataclass
+class CohortSnapshot:
+    """Closed-month retention counts, relative to ``start`` (a month index).
+
+    ``first_order`` is each customer's absolute first order month, or -1
+    if they had not ordered before the current month.
+    """
+
+    start: int
+    current: int
+    customer_ids: np.ndarray
+    first_order: np.ndarray
+    sizes: dict[str, np.ndarray]
+    counts: dict[str, np.ndarray]
+    computed_at: datetime
+
+
+def _fold_orders(
+    customer_ids: np.ndarray,
+    first_order: np.ndarray,
+    activity: np.ndarray,
+    start: int,
+    partition,
+) -> None:
+    """Record one partition of ``(customer_id, created_at)`` rows in place."""
+    ids, created_at = zip(*partition)
+    ids = np.array(ids, dtype=np.int64)
+    index = np.searchsorted(customer_ids, ids).clip(max=max(len(customer_ids) - 1, 0))
+    keep = customer_ids[index] == ids
+    index = index[keep]
+    month = month_index(created_at)[keep]
+
+    np.minimum.at(first_order, index, month)
+    recent = month >= start
+    activity[index[recent], month[recent] - start] = True
+
+
+def _finish_snapshot(
+    customer_ids: np.ndarray,
+    signup: np.ndarray,
+    first_order: np.ndarray,
+    activity: np.ndarray,
+    start: int,
+    current: int,
+) -> CohortSnapshot:
+    months = activity.shape[1]
+    first_order = np.where(first_order == np.iinfo(np.int64).max, -1, first_order)
+    relative = first_order - start
+    cohorts = {
+        "signup": np.where((signup >= 0) & (signup < months), signup, -1),
+        "first_order": np.where((first_order >= 0) & (relative >= 0), relative, -1),
+    }
+    sizes, counts = {}, {}
+    for basis, cohort in cohorts.items():
+        # The current month is added per request, never from the snapshot.
+        cohort = np.where(cohort == months - 1, -1, cohort)
+        sizes[basis], counts[basis] = accumulate_retention(cohort, activity, months)
+
+    return CohortSnapshot(
+        start=start,
+        current=current,
+        customer_ids=customer_ids,
+        first_order=first_order,
+        sizes=sizes,
+        counts=counts,
+        computed_at=datetime.utcnow(),
+    )
+
+
+async def build_snapshot(db: AsyncSession, current: int) -> CohortSnapshot:
+    """One pass over orders placed before the current month.
+
+    The numpy work runs in worker threads between database round-trips,
+    so a large order history does not stall the event loop.
+    """
+    months = settings.CUSTOMER_COHORT_MONTHS
+    start = current - months + 1
+    result = await db.execute(select(Customer.id, Customer.created_at).order_by(Customer.id))
+    rows = result.all()
+    customer_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    signup = await asyncio.to_thread(month_index, [row[1] for row in rows])
+    signup -= start
+
+    size = len(customer_ids)
+    first_order = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+    activity = np.zeros((size, months), dtype=bool)
+
+    stream = await db.stream(
+        select(Order.customer_id, Order.created_at)
+        .where(Order.status.notin_(VOID_STATUSES))
+        .where(Order.created_at < month_start(current))
+        .execution_options(yield_per=settings.CUSTOMER_RFM_CHUNK_SIZE)
+    )
+    async for partition in stream.partitions():
+        await asyncio.to_thread(
+            _fold_orders, customer_ids, first_order, activity, start, partition
+        )
+
+    return await asyncio.to_thread(
+        _finish_snapshot, customer_ids, signup, first_order, activity, start, current
+    )
+
+
+async def _add_current_month(
+    db: AsyncSession,
+    snapshot: CohortSnapshot,
+    basis: str,
+    sizes: np.ndarray,
+    counts: np.ndarray,
+) -> None:
+    """Fold orders and sign-ups of the running month into copies of the counts."""
+    current = snapshot.current - snapshot.start
+    since = month_start(snapshot.current)
+
+    result = await db.execute(
+        select(Order.customer_id, Customer.created_at)
+        .join(Customer, Customer.id == Order.customer_id)
+        .where(Order.created_at >= since)
+        .where(Order.status.notin_(VOID_STATUSES))
+        .distinct()
+    )
+    rows = result.all()
+    if not rows and basis == "first_order":
+        return
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+
+    if basis == "signup":
+        signups = await db.execute(
+            select(func.count(Customer.id)).where(Customer.created_at >= since)
+        )
+        sizes[current] += signups.scalar() or 0
+        cohort = month_index([row[1] for row in rows]) - snapshot.start
+    else:
+        first_order = np.full(len(ids), -1, dtype=np.int64)
+        known = snapshot.customer_ids
+        if len(known):
+            index = np.searchsorted(known, ids).clip(max=len(known) - 1)
+            found = known[index] == ids
+            first_order[found] = snapshot.first_order[index[found]]
+        # No order before this month: this month is their first.
+        cohort = np.where(first_order < 0, current, first_order - snapshot.start)
+        sizes[current] += int((first_order < 0).sum())
+
+    cohort = cohort[(cohort >= 0) & (cohort <= current)]
+    np.add.at(counts, (cohort, current - cohort), 1)
+
+
+async def retention_matrix(db: AsyncSession, basis: str) -> dict:
+    """Cohort sizes and retention rates by month offset."""
+    current = int(month_index(datetime.utcnow()))
+    snapshot = cohort_cache.get(current)
+    if snapshot is None:
+        # Requests missing the cache together wait for one build.
+        async with _snapshot_lock:
+            snapshot = cohort_cache.get(current)
+            if snapshot is None:
+                snapshot = await build_snapshot(db, current)
+                cohort_cache.set(current, snapshot)
+
+    sizes = snapshot.sizes[basis].copy()
+    counts = snapshot.counts[basis].copy()
+    await _add_current_month(db, snapshot, basis, sizes, counts)
+
+    months = len(sizes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(sizes[:, None] > 0, counts / sizes[:, None], 0.0)
+
+    cohorts = []
+    for index in range(months):
+        if not sizes[index]:
+            continue
+        observed = months - index
+        cohorts.append({
+            "cohort": month_label(snapshot.start + index),
+            "customers": int(sizes[index]),
+            "active": counts[index, :observed].tolist(),
+            "retention": rates[index, :observed].round(4).tolist(),
+        })
+    return {
+        "basis": basis,
+        "cohorts": cohorts,
+        "snapshot_at": snapshot.computed_at,
+    }
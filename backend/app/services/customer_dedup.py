@@ -0,0 +1,281 @@
+"""Duplicate-customer detection with blocking, and bulk merges.
+
+Comparing every pair of customers is O(n^2). Instead each customer gets
+a few blocking keys (normalized phone, name + city, email local part);
+only customers sharing a key are compared. Keys are hashed into one
+NumPy array and sorted, so blocks are contiguous runs. Oversized blocks
+(a common name in a big city) carry little signal and are skipped.
+
+Profiling and scoring are pure Python, so the scan runs in a worker
+thread to keep the event loop serving requests.
+"""
+
+import asyncio
+from datetime import datetime
+from itertools import combinations
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import case, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.jobs import job_lock
+from app.models.customer import Customer, CustomerDuplicate, CustomerSegment
+from app.models.order import Order
+from app.services.customer_search import normalize, words
+from app.services.customer_stats import recompute_customer_stats
+
+# Trailing phone digits compared, so "+86 138..." matches "138...".
+PHONE_DIGITS = 9
+
+WEIGHTS = {"name": 0.4, "phone": 0.3, "email": 0.2, "city": 0.1}
+FUZZY_FIELDS = ("name", "email")
+
+MERGE_BATCH_SIZE = 1000
+
+
+class Profile(NamedTuple):
+    """Normalized fields used for blocking and scoring."""
+
+    name: str
+    phone: str
+    email: str
+    city: str
+
+
+def build_profile(
+    email: str,
+    first_name: str | None,
+    last_name: str | None,
+    phone: str | None,
+    city: str | None,
+) -> Profile:
+    # Name parts are sorted so "San Zhang" and "Zhang San" agree.
+    name = " ".join(sorted(words(first_name) + words(last_name)))
+    digits = "".join(ch for ch in phone or "" if ch.isdigit())
+    local = normalize(email).split("@")[0].split("+")[0].replace(".", "")
+    return Profile(
+        name=name,
+        phone=digits[-PHONE_DIGITS:] if len(digits) >= 7 else "",
+        email=local,
+        city="".join(words(city)),
+    )
+
+
+def blocking_keys(profile: Profile) -> list[str]:
+    keys = []
+    if profile.phone:
+        keys.append(f"phone:{profile.phone}")
+    if profile.name and profile.city:
+        keys.append(f"name:{profile.name}|{profile.city}")
+    if len(profile.email) >= 3:
+        keys.append(f"email:{profile.email}")
+    return keys
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def _jaccard(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    x, y = _bigrams(a), _bigrams(b)
+    return len(x & y) / len(x | y)
+
+
+def score_pair(a: Profile, b: Profile) -> tuple[float, list[str]]:
+    """Weighted similarity in [0, 1] and the fields that matched exactly.
+
+    Fields missing on either side are left out of the weighting rather
+    than counted as disagreement.
+    """
+    similarity = {}
+    for field in Profile._fields:
+        x, y = getattr(a, field), getattr(b, field)
+        if x and y:
+            similarity[field] = _jaccard(x, y) if field in FUZZY_FIELDS else float(x == y)
+
+    weight = sum(WEIGHTS[field] for field in similarity)
+    if not weight:
+        return 0.0, []
+    score = sum(WEIGHTS[field] * value for field, value in similarity.items()) / weight
+    return round(score, 3), [field for field, value in similarity.items() if value == 1.0]
+
+
+def candidate_pairs(profiles: list[Profile], max_block_size: int) -> set[tuple[int, int]]:
+    """Index pairs ``(i, j)``, ``i < j``, that share at least one blocking key."""
+    hashes, rows = [], []
+    for row, profile in enumerate(profiles):
+        for key in blocking_keys(profile):
+            hashes.append(hash(key))
+            rows.append(row)
+    if not hashes:
+        return set()
+
+    hashes = np.array(hashes, dtype=np.int64)
+    rows = np.array(rows, dtype=np.int64)
+    order = np.argsort(hashes, kind="stable")
+    hashes, rows = hashes[order], rows[order]
+
+    bounds = np.flatnonzero(np.diff(hashes)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(hashes)]))
+    sizes = ends - starts
+    blocks = (sizes >= 2) & (sizes <= max_block_size)
+
+    pairs: set[tuple[int, int]] = set()
+    for start, end in zip(starts[blocks], ends[blocks]):
+        pairs.update(combinations(sorted(set(rows[start:end].tolist())), 2))
+    return pairs
+
+
+def find_duplicates(
+    profiles: list[Profile],
+    max_block_size: int,
+    min_score: float,
+) -> list[tuple[int, int, float, list[str]]]:
+    """Scored candidate pairs at or above ``min_score``, best first."""
+    matches = []
+    for i, j in candidate_pairs(profiles, max_block_size):
+        score, reasons = score_pair(profiles[i], profiles[j])
+        if score >= min_score:
+            matches.append((i, j, score, reasons))
+    matches.sort(key=lambda match: -match[2])
+    return matches
+
+
+def scan_duplicates(
+    customers: list[tuple],
+    max_block_size: int,
+    min_score: float,
+) -> list[tuple[int, int, float, list[str]]]:
+    """Profile ``(id, email, first_name, last_name, phone, city)`` rows and
+    return matches as ``(customer_id, duplicate_id, score, reasons)``."""
+    profiles = [build_profile(*fields) for _, *fields in customers]
+    return [
+        # Ids ascend with row order, so the older customer comes first.
+        (customers[i][0], customers[j][0], score, reasons)
+        for i, j, score, reasons in find_duplicates(profiles, max_block_size, min_score)
+    ]
+
+
+async def detect_duplicates(db: AsyncSession) -> int:
+    """Replace stored merge candidates with a fresh scan; returns the count."""
+    customers: list[tuple] = []
+    stream = await db.stream(
+        select(
+            Customer.id,
+            Customer.email,
+            Customer.first_name,
+            Customer.last_name,
+            Customer.phone,
+            Customer.city,
+        )
+        .where(Customer.is_active == True)
+        .order_by(Customer.id)
+        .execution_options(yield_per=10000)
+    )
+    async for row in stream:
+        customers.append(tuple(row))
+
+    matches = await asyncio.to_thread(
+        scan_duplicates,
+        customers,
+        settings.CUSTOMER_DEDUP_MAX_BLOCK_SIZE,
+        settings.CUSTOMER_DEDUP_MIN_SCORE,
+    )
+
+    detected_at = datetime.utcnow()
+    await db.execute(delete(CustomerDuplicate))
+    rows = [
+        {
+            "customer_id": customer_id,
+            "duplicate_id": duplicate_id,
+            "score": score,
+            "reasons": ",".join(reasons),
+            "detected_at": detected_at,
+        }
+        for customer_id, duplicate_id, score, reasons in matches
+    ]
+    if rows:
+        await db.execute(insert(CustomerDuplicate.__table__), rows)
+    await db.commit()
+    return len(rows)
+
+
+async def run_duplicate_detection() -> None:
+    """Duplicate detection job using its own session, skipped while a peer
+    runs it so workers do not race on ``customer_duplicates``."""
+    async with job_lock("customer_duplicates") as acquired:
+        if not acquired:
+            return
+        async with AsyncSessionLocal() as db:
+            await detect_duplicates(db)
+
+
+async def merge_customers(db: AsyncSession, merges: dict[int, list[int]]) -> tuple[int, int]:
+    """Fold each target's source customers into it.
+
+    Orders are re-pointed with one CASE UPDATE per batch of sources, the
+    sources are deactivated, and the targets' aggregates recomputed, all
+    in one transaction. Returns ``(customers merged, orders moved)``.
+    Raises ValueError for unknown ids or chained merges.
+    """
+    mapping: dict[int, int] = {}
+    for target_id, source_ids in merges.items():
+        for source_id in source_ids:
+            if source_id == target_id or source_id in mapping:
+                raise ValueError(f"Customer {source_id} is merged more than once")
+            mapping[source_id] = target_id
+    if set(mapping) & set(merges):
+        raise ValueError("A merge target cannot also be merged into another customer")
+
+    ids = set(mapping) | set(merges)
+    result = await db.execute(
+        select(Customer.id).where(Customer.id.in_(ids)).where(Customer.is_active == True)
+    )
+    missing = ids - set(result.scalars().all())
+    if missing:
+        raise ValueError(f"Customers not found: {sorted(missing)}")
+
+    sources = list(mapping)
+    orders_moved = 0
+    for start in range(0, len(sources), MERGE_BATCH_SIZE):
+        batch = sources[start:start + MERGE_BATCH_SIZE]
+        result = await db.execute(
+            update(Order)
+            .where(Order.customer_id.in_(batch))
+            .values(
+                customer_id=case(
+                    {source: mapping[source] for source in batch},
+                    value=Order.customer_id,
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        orders_moved += result.rowcount
+
+        await db.execute(
+            update(Customer)
+            .where(Customer.id.in_(batch))
+            .values(is_active=False, orders_count=0, total_spent=0, last_order_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(CustomerDuplicate).where(
+                or_(
+                    CustomerDuplicate.customer_id.in_(batch),
+                    CustomerDuplicate.duplicate_id.in_(batch),
+                )
+            )
+        )
+        await db.execute(delete(CustomerSegment).where(CustomerSegment.customer_id.in_(batch)))
+
+    await recompute_customer_stats(db, list(merges))
+    await db.commit()
+    return len(mapping), orders_moved
@@ -0,0 +1,188 @@
+"""Streaming bulk customer import with chunked upserts by email."""
+
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.customer import Customer
+from app.schemas.customer import CustomerImportError, CustomerImportJob, CustomerImportRow
+from app.services.customer_search import drop_search_tokens
+from app.services.imports import (
+    MAX_REPORTED_ERRORS,
+    fail_import_job,
+    format_errors,
+    load_import_job,
+    register_import_job,
+    save_import_job,
+)
+
+# Optional columns a merge only overwrites when the import provides a value.
+MERGE_OPTIONAL_COLUMNS = ("phone", "address", "city", "country")
+
+JOB_KIND = "customer"
+
+
+async def create_customer_import_job(
+    db: AsyncSession, policy: str, job_id: str | None = None
+) -> CustomerImportJob:
+    """Register a new job so its progress can be polled while it runs."""
+    job = CustomerImportJob(
+        id=job_id or uuid.uuid4().hex,
+        policy=policy,
+        started_at=datetime.utcnow(),
+    )
+    await register_import_job(db, JOB_KIND, job)
+    return job
+
+
+async def get_customer_import_job(
+    db: AsyncSession, job_id: str
+) -> CustomerImportJob | None:
+    return await load_import_job(db, JOB_KIND, CustomerImportJob, job_id)
+
+
+def _record_error(job: CustomerImportJob, row: int, detail: str) -> None:
+    job.rows_failed += 1
+    if len(job.errors) < MAX_REPORTED_ERRORS:
+        job.errors.append(CustomerImportError(row=row, detail=detail))
+
+
+def add_to_batch(
+    rows: dict[str, dict[str, Any]],
+    data: dict[str, Any],
+    policy: str,
+) -> bool:
+    """Fold a validated row into the chunk keyed by normalized email.
+
+    ``merge`` lets later non-empty values win; ``skip`` keeps the first
+    occurrence. Returns False when the row duplicated an earlier one.
+    """
+    email = data["email"]
+    existing = rows.get(email)
+    if existing is None:
+        rows[email] = data
+        return True
+    if policy == "merge":
+        existing.update({key: value for key, value in data.items() if value is not None})
+    return False
+
+
+async def _flush(
+    db: AsyncSession,
+    rows: dict[str, dict[str, Any]],
+    job: CustomerImportJob,
+) -> None:
+    now = datetime.utcnow()
+    values = [
+        {
+            **row,
+            "is_active": True,
+            "orders_count": 0,
+            "total_spent": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for row in rows.values()
+    ]
+    # Executed with a parameter list so the statement compiles once and is
+    # cached; SQLAlchemy batches the rows into multi-row VALUES itself.
+    table = Customer.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table)
+    if job.policy == "merge":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["email"],
+            set_={
+                "first_name": stmt.excluded.first_name,
+                "last_name": stmt.excluded.last_name,
+                "updated_at": stmt.excluded.updated_at,
+                **{
+                    column: func.coalesce(stmt.excluded[column], table.c[column])
+                    for column in MERGE_OPTIONAL_COLUMNS
+                },
+            },
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["email"])
+
+    # Skipped rows are not returned at all; merged ones are told apart from
+    # inserts below.
+    if db.get_bind().dialect.name == "postgresql":
+        # xmax is 0 only on a row version created by this INSERT.
+        inserted = literal_column("xmax = 0").label("inserted")
+        result = await db.execute(stmt.returning(table.c.id, inserted), values)
+        returned = result.all()
+    else:
+        # SQLite serializes writers, so the emails stored before the upsert
+        # are exactly the ones it merges into.
+        existing = set(
+            (await db.execute(select(table.c.email).where(table.c.email.in_(rows))))
+            .scalars()
+        )
+        result = await db.execute(stmt.returning(table.c.id, table.c.email), values)
+        returned = [(row_id, email not in existing) for row_id, email in result.all()]
+    merged = [row_id for row_id, was_inserted in returned if not was_inserted]
+    await drop_search_tokens(db, merged)
+    job.rows_inserted += len(returned) - len(merged)
+    job.rows_merged += len(merged)
+    job.rows_skipped += len(rows) - len(returned)
+    await save_import_job(db, JOB_KIND, job)
+    await db.commit()
+
+
+async def import_customers(
+    db: AsyncSession,
+    records: AsyncIterator[Any],
+    job: CustomerImportJob,
+    chunk_size: int,
+) -> CustomerImportJob:
+    """Validate records with CustomerImportRow and upsert them chunk by chunk.
+
+    Emails are lower-cased and deduplicated within each chunk in memory;
+    conflicts with stored customers (and with earlier chunks) are settled
+    by ``INSERT ... ON CONFLICT (email)`` according to ``job.policy``.
+
+    Search tokens are not written inline: new and merged customers are
+    left without tokens for ``backfill_search_index`` to pick up, which
+    keeps tokenizing off the import's critical path.
+    """
+    rows: dict[str, dict[str, Any]] = {}
+    row_number = 0
+
+    try:
+        async for record in records:
+            row_number += 1
+            job.rows_processed += 1
+
+            if isinstance(record, Exception):
+                _record_error(job, row_number, str(record))
+                continue
+            try:
+                data = CustomerImportRow.model_validate(record).model_dump()
+            except ValidationError as e:
+                _record_error(job, row_number, format_errors(e))
+                continue
+
+            data["email"] = data["email"].strip().lower()
+            if not add_to_batch(rows, data, job.policy):
+                job.rows_duplicate += 1
+            if len(rows) >= chunk_size:
+                await _flush(db, rows, job)
+                rows = {}
+
+        if rows:
+            await _flush(db, rows, job)
+    except Exception as e:
+        await fail_import_job(db, JOB_KIND, job, row_number, e)
+        raise
+
+    job.status = "completed"
+    job.finished_at = datetime.utcnow()
+    await save_import_job(db, JOB_KIND, job)
+    await db.commit()
+    return job
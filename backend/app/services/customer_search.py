@@ -0,0 +1,238 @@
+"""Customer search over an inverted n-gram index.
+
+Every customer is indexed into ``customer_search_tokens`` as character
+n-grams of their email, names, phone and city: trigrams for Latin text
+and digits, unigrams and bigrams for CJK runs, plus one- and two-letter
+word prefixes so short queries still hit the index. Names are also
+indexed concatenated in both orders, so "San Zhang", "zhangsan" and
+"张三" all find the same customer.
+
+A query is reduced to the same grams; active customers holding all of
+them (in the requested segment) are candidates, which are then verified
+and ranked in Python. At most ``CUSTOMER_SEARCH_MAX_CANDIDATES`` are
+ranked: exact email and name matches are taken first, then the newest
+customers, and the caller is told when the candidate set was cut.
+"""
+
+import re
+import unicodedata
+from typing import Sequence
+
+from sqlalchemy import delete, exists, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.customer import Customer, CustomerSearchToken, CustomerSegment
+
+# Customer fields that feed the index; writes touching them reindex.
+SEARCH_FIELDS = frozenset({"email", "first_name", "last_name", "phone", "city"})
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_CJK_RUN = re.compile(f"[{_CJK}]+")
+_WORD = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+
+
+def normalize(text: str | None) -> str:
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def words(text: str | None) -> list[str]:
+    """Split normalized text into CJK runs and alphanumeric words."""
+    return _WORD.findall(normalize(text))
+
+
+def _is_cjk(word: str) -> bool:
+    return _CJK_RUN.match(word) is not None
+
+
+def document_grams(word: str) -> set[str]:
+    """Every gram a query fragment of ``word`` could be reduced to."""
+    if _is_cjk(word):
+        grams = set(word)
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+        return grams
+    grams = {f"^{word[:2]}", f"^{word[:1]}"}
+    grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def query_grams(word: str) -> set[str]:
+    """Grams a customer must hold for ``word`` to match.
+
+    Latin words shorter than a trigram only match at the start of a word.
+    """
+    if _is_cjk(word):
+        if len(word) == 1:
+            return {word}
+        return {word[i:i + 2] for i in range(len(word) - 1)}
+    if len(word) < 3:
+        return {f"^{word}"}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _fields(customer: Customer) -> dict[str, str]:
+    """Normalized, space-free forms of the searchable fields."""
+    first, last = words(customer.first_name), words(customer.last_name)
+    return {
+        "email": normalize(customer.email),
+        "name": "".join(first + last),
+        "name_reversed": "".join(last + first),
+        "phone": re.sub(r"\D", "", customer.phone or ""),
+        "city": "".join(words(customer.city)),
+    }
+
+
+def customer_tokens(customer: Customer) -> set[str]:
+    tokens: set[str] = set()
+    texts = [
+        *_fields(customer).values(),
+        customer.first_name,
+        customer.last_name,
+        customer.city,
+    ]
+    for text in texts:
+        for word in words(text):
+            tokens.update(document_grams(word))
+    return tokens
+
+
+async def drop_search_tokens(db: AsyncSession, customer_ids: Sequence[int]) -> None:
+    """Remove index rows so ``backfill_search_index`` rebuilds them later."""
+    if customer_ids:
+        await db.execute(
+            delete(CustomerSearchToken).where(
+                CustomerSearchToken.customer_id.in_(customer_ids)
+            )
+        )
+
+
+async def index_customers(db: AsyncSession, customers: Sequence[Customer]) -> None:
+    """Replace the index rows of ``customers``; the caller commits."""
+    if not customers:
+        return
+    await db.execute(
+        delete(CustomerSearchToken).where(
+            CustomerSearchToken.customer_id.in_([c.id for c in customers])
+        )
+    )
+    rows = [
+        {"token": token, "customer_id": customer.id}
+        for customer in customers
+        for token in customer_tokens(customer)
+    ]
+    if rows:
+        # Core table insert: skips per-row ORM bookkeeping on large batches.
+        await db.execute(insert(CustomerSearchToken.__table__), rows)
+
+
+def _rank(customer: Customer, queries: set[str], query_words: list[str]) -> tuple | None:
+    """Sort key for a candidate, or None if it does not really match."""
+    values = _fields(customer).values()
+    haystack = "\n".join(values)
+    if not all(word in haystack for word in query_words):
+        return None
+
+    if queries & set(values):
+        tier = 2
+    elif any(value.startswith(query) for value in values for query in queries):
+        tier = 1
+    else:
+        tier = 0
+
+    field_words = [word for value in values for word in words(value)]
+    field_words += words(customer.first_name) + words(customer.last_name)
+    exact = sum(word in field_words for word in query_words)
+    prefixes = sum(
+        any(field_word.startswith(word) for field_word in field_words)
+        for word in query_words
+    )
+    return (-tier, -exact, -prefixes, -customer.id)
+
+
+def _exact_match(query: str, joined: str):
+    """SQL approximation of the top ranking tier, used to pick candidates."""
+    first = func.coalesce(Customer.first_name, "")
+    last = func.coalesce(Customer.last_name, "")
+    return or_(
+        func.lower(Customer.email) == query,
+        func.lower(first.concat(last)) == joined,
+        func.lower(last.concat(first)) == joined,
+    )
+
+
+async def search_customers(
+    db: AsyncSession,
+    search: str,
+    skip: int,
+    limit: int,
+    segment: str | None = None,
+) -> tuple[list[Customer], bool]:
+    """Active customers matching ``search``, best match first.
+
+    Exact field matches rank above prefix matches, which rank above
+    substring matches; within a tier, whole-word then word-prefix hits
+    decide, and remaining ties go to the newest customer.
+
+    Returns the page and whether the candidate set was truncated. Raises
+    ValueError when ``skip`` reaches past the candidates that are ranked.
+    """
+    max_candidates = settings.CUSTOMER_SEARCH_MAX_CANDIDATES
+    if skip >= max_candidates:
+        raise ValueError(f"Search results are limited to {max_candidates} customers")
+
+    query_words = words(search)
+    grams: set[str] = set()
+    for word in query_words:
+        grams.update(query_grams(word))
+    if not grams:
+        return [], False
+
+    query, joined = normalize(search).strip(), "".join(query_words)
+    candidates = (
+        select(Customer.id)
+        .join(CustomerSearchToken, CustomerSearchToken.customer_id == Customer.id)
+        .where(CustomerSearchToken.token.in_(grams))
+        .where(Customer.is_active == True)
+        .group_by(Customer.id)
+        .having(func.count() == len(grams))
+        .order_by(_exact_match(query, joined).desc(), Customer.id.desc())
+        .limit(max_candidates + 1)
+    )
+    if segment:
+        candidates = candidates.join(CustomerSegment).where(
+            CustomerSegment.segment == segment
+        )
+    candidate_ids = (await db.execute(candidates)).scalars().all()
+    truncated = len(candidate_ids) > max_candidates
+
+    result = await db.execute(
+        select(Customer).where(Customer.id.in_(candidate_ids[:max_candidates]))
+    )
+    ranked = []
+    for customer in result.scalars().all():
+        key = _rank(customer, {query, joined}, query_words)
+        if key is not None:
+            ranked.append((key, customer))
+    ranked.sort(key=lambda item: item[0])
+    return [customer for _, customer in ranked[skip:skip + limit]], truncated
+
+
+async def backfill_search_index(chunk_size: int = 1000) -> None:
+    """Index customers that have no search tokens yet, chunk by chunk."""
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(Customer)
+                .where(Customer.id > last_id)
+                .where(~exists().where(CustomerSearchToken.customer_id == Customer.id))
+                .order_by(Customer.id)
+                .limit(chunk_size)
+            )
+            customers = result.scalars().all()
+            if not customers:
+                return
+            await index_customers(db, customers)
+            await db.commit()
+            last_id = customers[-1].id
@@ -0,0 +1,231 @@
+"""Vectorized RFM segmentation and customer lifetime value.
+
+Orders are streamed in fixed-size chunks of ``(customer_id, created_at,
+total_amount)`` arrays and folded into per-customer accumulators with
+``np.bincount`` / ``np.maximum.at``. Memory is bounded by the chunk size
+plus a few arrays sized by the customer count, regardless of how many
+orders exist. Scores, segments and CLV are then computed for every
+customer at once and upserted into ``customer_segments``.
+
+The numpy folding, the scoring and the building of upsert rows run in
+worker threads so the event loop keeps serving requests meanwhile. The
+upsert and the cleanup of stale rows share one transaction, and the
+job holds ``job_lock`` so only one worker recomputes at a time.
+"""
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.core.jobs import job_lock
+from app.models.customer import Customer, CustomerSegment
+from app.models.order import VOID_STATUSES, Order
+
+SEGMENTS = (
+    "champions",
+    "loyal",
+    "new",
+    "promising",
+    "at_risk",
+    "hibernating",
+    "need_attention",
+)
+
+WRITE_BATCH_SIZE = 5000
+
+
+def quintile_scores(values: np.ndarray) -> np.ndarray:
+    """Score 1-5 by quintile, higher values scoring higher.
+
+    Tied values share the score of their mid-rank, so a long run of
+    identical values (most customers having one order) lands in one
+    middle quintile instead of being split arbitrarily.
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side="left")
+    at_or_below = np.searchsorted(ordered, values, side="right")
+    percentile = (below + at_or_below) / (2 * len(values))
+    return np.minimum((percentile * 5).astype(np.int64), 4) + 1
+
+
+def assign_segments(r: np.ndarray, f: np.ndarray) -> np.ndarray:
+    """Map recency and frequency scores to named segments."""
+    conditions = [
+        (r >= 4) & (f >= 4),
+        (r >= 3) & (f >= 3),
+        (r >= 4) & (f <= 1),
+        r >= 4,
+        (r <= 2) & (f >= 3),
+        r <= 2,
+    ]
+    return np.select(conditions, SEGMENTS[:-1], default=SEGMENTS[-1])
+
+
+def customer_lifetime_value(
+    frequency: np.ndarray,
+    monetary: np.ndarray,
+    tenure_days: np.ndarray,
+    horizon_years: float,
+) -> np.ndarray:
+    """Average order value x yearly order rate x horizon.
+
+    Tenure is floored at 30 days so a first-week customer is not
+    extrapolated from a single burst of orders.
+    """
+    average_order = monetary / np.maximum(frequency, 1)
+    orders_per_year = frequency / np.maximum(tenure_days, 30) * 365
+    return average_order * orders_per_year * horizon_years
+
+
+class OrderAccumulator:
+    """Per-customer order aggregates folded chunk by chunk."""
+
+    def __init__(self, customer_ids: np.ndarray):
+        self.customer_ids = customer_ids
+        size = len(customer_ids)
+        self.frequency = np.zeros(size, dtype=np.int64)
+        self.monetary = np.zeros(size, dtype=np.float64)
+        self.first = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+        self.last = np.full(size, np.iinfo(np.int64).min, dtype=np.int64)
+
+    def add(self, customer_ids: np.ndarray, timestamps: np.ndarray, amounts: np.ndarray) -> None:
+        """Fold one chunk; ``timestamps`` are epoch seconds."""
+        size = len(self.customer_ids)
+        if size == 0:
+            return
+        rows = np.searchsorted(self.customer_ids, customer_ids).clip(max=size - 1)
+        keep = self.customer_ids[rows] == customer_ids
+        rows, timestamps, amounts = rows[keep], timestamps[keep], amounts[keep]
+
+        self.frequency += np.bincount(rows, minlength=size)
+        self.monetary += np.bincount(rows, weights=amounts, minlength=size)
+        np.minimum.at(self.first, rows, timestamps)
+        np.maximum.at(self.last, rows, timestamps)
+
+
+def score_customers(accumulator: OrderAccumulator, now: int, horizon_years: float) -> dict:
+    """RFM scores, segments and CLV for customers with at least one order."""
+    buying = accumulator.frequency > 0
+    frequency = accumulator.frequency[buying]
+    monetary = accumulator.monetary[buying]
+    recency_days = (now - accumulator.last[buying]) // 86400
+    tenure_days = (now - accumulator.first[buying]) / 86400
+
+    r = quintile_scores(-recency_days)
+    f = quintile_scores(frequency)
+    m = quintile_scores(monetary)
+    return {
+        "customer_id": accumulator.customer_ids[buying],
+        "segment": assign_segments(r, f),
+        "recency_days": recency_days,
+        "frequency": frequency,
+        "monetary": monetary.round(2),
+        "r_score": r,
+        "f_score": f,
+        "m_score": m,
+        "clv": customer_lifetime_value(frequency, monetary, tenure_days, horizon_years).round(2),
+    }
+
+
+def _fold_partition(accumulator: OrderAccumulator, partition) -> None:
+    customer_ids, created_at, amounts = zip(*partition)
+    accumulator.add(
+        np.array(customer_ids, dtype=np.int64),
+        np.array(created_at, dtype="datetime64[s]").astype(np.int64),
+        np.array(amounts, dtype=np.float64),
+    )
+
+
+def _to_columns(scores: dict) -> dict[str, list]:
+    return {name: values.tolist() for name, values in scores.items()}
+
+
+def _batch_rows(columns: dict, start: int, stop: int, computed_at: datetime) -> list[dict]:
+    return [
+        {
+            **{name: values[i] for name, values in columns.items()},
+            "computed_at": computed_at,
+        }
+        for i in range(start, stop)
+    ]
+
+
+async def _accumulate_orders(db: AsyncSession, accumulator: OrderAccumulator) -> None:
+    stream = await db.stream(
+        select(Order.customer_id, Order.created_at, Order.total_amount)
+        .where(Order.status.notin_(VOID_STATUSES))
+        .execution_options(yield_per=settings.CUSTOMER_RFM_CHUNK_SIZE)
+    )
+    async for partition in stream.partitions():
+        await asyncio.to_thread(_fold_partition, accumulator, partition)
+
+
+async def _store(db: AsyncSession, scores: dict, computed_at: datetime) -> None:
+    """Upsert every score and drop stale rows in a single transaction."""
+    columns = await asyncio.to_thread(_to_columns, scores)
+    count = len(columns["customer_id"])
+    insert = dialect_insert(db)
+    stmt = insert(CustomerSegment.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["customer_id"],
+        set_={
+            column: stmt.excluded[column]
+            for column in (*scores, "computed_at")
+            if column != "customer_id"
+        },
+    )
+    # Executed with a parameter list rather than one multi-row VALUES, so
+    # a batch never approaches the driver's 32767 bind parameter limit.
+    for start in range(0, count, WRITE_BATCH_SIZE):
+        rows = await asyncio.to_thread(
+            _batch_rows, columns, start, min(start + WRITE_BATCH_SIZE, count), computed_at
+        )
+        await db.execute(stmt, rows)
+
+    # Customers whose orders were all voided since the last run.
+    await db.execute(
+        delete(CustomerSegment).where(CustomerSegment.computed_at < computed_at)
+    )
+    await db.commit()
+
+
+async def compute_segments(db: AsyncSession) -> int:
+    """Score every customer and store the results; returns rows written."""
+    computed_at = datetime.utcnow()
+    result = await db.execute(select(Customer.id).order_by(Customer.id))
+    accumulator = OrderAccumulator(np.array(result.scalars().all(), dtype=np.int64))
+
+    await _accumulate_orders(db, accumulator)
+    now = int(np.datetime64(computed_at, "s").astype(np.int64))
+    scores = await asyncio.to_thread(
+        score_customers, accumulator, now, settings.CUSTOMER_CLV_HORIZON_YEARS
+    )
+    await _store(db, scores, computed_at)
+    return len(scores["customer_id"])
+
+
+async def refresh_segments() -> None:
+    """Segmentation job using its own session, skipped while a peer runs it."""
+    async with job_lock("customer_segments") as acquired:
+        if not acquired:
+            return
+        async with AsyncSessionLocal() as db:
+            await compute_segments(db)
+
+
+async def segment_summary(db: AsyncSession) -> list[dict]:
+    result = await db.execute(
+        select(
+            CustomerSegment.segment,
+            func.count().label("customers"),
+            func.round(func.avg(CustomerSegment.clv), 2).label("average_clv"),
+        ).group_by(CustomerSegment.segment)
+    )
+    return [dict(row) for row in result.mappings().all()]
@@ -0,0 +1,154 @@
+"""Denormalized per-customer order aggregates.
+
+``orders_count``, ``total_spent`` and ``last_order_at`` on ``customers``
+are adjusted with atomic ``UPDATE ... SET col = col + x`` statements in
+the same transaction as the order write, so concurrent orders never
+lose an increment. A periodic reconciliation recomputes them from
+``orders`` and repairs any drift.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.jobs import job_lock
+from app.models.customer import Customer
+from app.models.order import VOID_STATUSES, Order
+
+
+def _last_order_at(customer_id):
+    return (
+        select(func.max(Order.created_at))
+        .where(Order.customer_id == customer_id)
+        .where(Order.status.notin_(VOID_STATUSES))
+        .scalar_subquery()
+    )
+
+
+async def record_order(
+    db: AsyncSession,
+    customer_id: int,
+    amount: Decimal,
+    created_at: datetime,
+) -> None:
+    """Count an order that became billable (created or reinstated)."""
+    await db.execute(
+        update(Customer)
+        .where(Customer.id == customer_id)
+        .values(
+            orders_count=Customer.orders_count + 1,
+            total_spent=Customer.total_spent + amount,
+            last_order_at=case(
+                (
+                    or_(
+                        Customer.last_order_at.is_(None),
+                        Customer.last_order_at < created_at,
+                    ),
+                    created_at,
+                ),
+                else_=Customer.last_order_at,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def void_order(db: AsyncSession, customer_id: int, amount: Decimal) -> None:
+    """Remove a cancelled or refunded order from its customer's totals.
+
+    The order's new status must be flushed first so it is excluded when
+    the last order date is recomputed.
+    """
+    await db.execute(
+        update(Customer)
+        .where(Customer.id == customer_id)
+        .values(
+            orders_count=Customer.orders_count - 1,
+            total_spent=Customer.total_spent - amount,
+            last_order_at=_last_order_at(customer_id),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _recomputed_columns() -> dict:
+    counted = (Order.customer_id == Customer.id, Order.status.notin_(VOID_STATUSES))
+    return {
+        "orders_count": select(func.count(Order.id)).where(*counted).scalar_subquery(),
+        "total_spent": (
+            select(func.coalesce(func.sum(Order.total_amount), 0))
+            .where(*counted)
+            .scalar_subquery()
+        ),
+        "last_order_at": _last_order_at(Customer.id),
+    }
+
+
+async def recompute_customer_stats(db: AsyncSession, customer_ids: list[int]) -> None:
+    """Recompute aggregates of specific customers; the caller commits."""
+    if not customer_ids:
+        return
+    await db.execute(
+        update(Customer)
+        .where(Customer.id.in_(customer_ids))
+        .values(**_recomputed_columns())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reconcile_customer_stats(db: AsyncSession, chunk_size: int = 5000) -> int:
+    """Recompute aggregates from ``orders`` and fix rows that drifted.
+
+    Works through customer id ranges, committing each, so locks stay
+    short. Drifted rows are found without locking, then locked before
+    the repairing UPDATE. That UPDATE starts after any order write
+    holding those rows has committed and reads a snapshot that includes
+    it, so it never overwrites a concurrent increment with an older
+    aggregate. Returns the number of customers repaired.
+    """
+    columns = _recomputed_columns()
+    drifted = or_(
+        Customer.orders_count != columns["orders_count"],
+        Customer.total_spent != columns["total_spent"],
+        Customer.last_order_at.is_distinct_from(columns["last_order_at"]),
+    )
+
+    max_id = (await db.execute(select(func.max(Customer.id)))).scalar() or 0
+    repaired = 0
+    for start in range(1, max_id + 1, chunk_size):
+        result = await db.execute(
+            select(Customer.id)
+            .where(Customer.id.between(start, start + chunk_size - 1))
+            .where(drifted)
+        )
+        customer_ids = result.scalars().all()
+        if not customer_ids:
+            continue
+
+        await db.execute(
+            select(Customer.id).where(Customer.id.in_(customer_ids)).with_for_update()
+        )
+        result = await db.execute(
+            update(Customer)
+            .where(Customer.id.in_(customer_ids))
+            .where(drifted)
+            .values(**columns)
+            .execution_options(synchronize_session=False)
+        )
+        repaired += result.rowcount
+        await db.commit()
+    return repaired
+
+
+async def run_reconciliation() -> None:
+    """Reconciliation job using its own session, skipped while a peer runs it."""
+    async with job_lock("customer_stats") as acquired:
+        if not acquired:
+            return
+        async with AsyncSessionLocal() as db:
+            repaired = await reconcile_customer_stats(db)
+    if repaired:
+        print(f"Customer stats reconciliation repaired {repaired} customers")
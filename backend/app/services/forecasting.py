@@ -0,0 +1,255 @@
+"""Vectorized per-product demand forecasting and reorder points.
+
+Daily unit sales for the whole catalog are loaded into one
+``products x days`` NumPy matrix. Simple exponential smoothing and
+Croston's method are then run for every product at once, stepping over
+days rather than looping over SKUs.
+
+One worker runs the job and stores demand and reorder points in
+``product_forecasts``. Days of cover and the reorder flag are derived
+from the product's current stock when a forecast is read, so they never
+lag behind sales between runs.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.core.jobs import job_lock
+from app.models.order import VOID_STATUSES, Order, OrderItem
+from app.models.product import DemandForecast, Product
+
+# Products selling on fewer than this share of days use Croston's method.
+INTERMITTENT_SHARE = 0.5
+
+# Forecast rows upserted per statement.
+WRITE_BATCH_SIZE = 5000
+
+
+def forecast_demand(
+    sales: np.ndarray,
+    alpha: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Forecast next-day demand for every row of a ``products x days`` matrix.
+
+    Returns ``(forecast, std, intermittent)``: the daily demand forecast,
+    the standard deviation of daily demand and whether Croston's method
+    was used instead of SES.
+    """
+    n_products, n_days = sales.shape
+    if n_days == 0:
+        zeros = np.zeros(n_products)
+        return zeros, zeros, np.zeros(n_products, dtype=bool)
+
+    nonzero = sales > 0
+    nonzero_days = nonzero.sum(axis=1)
+    intermittent = nonzero_days < INTERMITTENT_SHARE * n_days
+    seen = np.maximum(nonzero_days, 1)
+
+    level = sales[:, : min(7, n_days)].mean(axis=1)
+    size = sales.sum(axis=1) / seen
+    interval = n_days / seen
+    since = np.zeros(n_products)
+
+    for t in range(n_days):
+        demand = sales[:, t]
+        level += alpha * (demand - level)
+
+        since += 1
+        hit = nonzero[:, t]
+        size[hit] += alpha * (demand[hit] - size[hit])
+        interval[hit] += alpha * (since[hit] - interval[hit])
+        since[hit] = 0
+
+    croston = np.where(nonzero_days > 0, size / interval, 0.0)
+    forecast = np.where(intermittent, croston, level)
+    return forecast, sales.std(axis=1), intermittent
+
+
+def reorder_metrics(
+    forecast: np.ndarray,
+    std: np.ndarray,
+    stock: np.ndarray,
+    lead_time_days: float,
+    service_level_z: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Days of cover and reorder point (lead-time demand plus safety stock)."""
+    safety_stock = service_level_z * std * np.sqrt(lead_time_days)
+    reorder_point = np.ceil(forecast * lead_time_days + safety_stock)
+    days_of_cover = np.full(forecast.shape, np.inf)
+    np.divide(stock, forecast, out=days_of_cover, where=forecast > 0)
+    return days_of_cover, reorder_point
+
+
+async def _load_sales(
+    db: AsyncSession,
+    product_ids: np.ndarray,
+    sales: np.ndarray,
+    start: date,
+) -> None:
+    """Accumulate daily unit sales into ``sales``, one partition at a time."""
+    day = func.date(Order.created_at)
+    stream = await db.stream(
+        select(OrderItem.product_id, day, func.sum(OrderItem.quantity))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.created_at >= datetime.combine(start, datetime.min.time()))
+        .where(Order.status.notin_(VOID_STATUSES))
+        .group_by(OrderItem.product_id, day)
+    )
+    async for partition in stream.partitions(50000):
+        ids = np.array([row[0] for row in partition], dtype=np.int64)
+        days = (
+            np.array([row[1] for row in partition], dtype="datetime64[D]")
+            - np.datetime64(start, "D")
+        ).astype(np.int64)
+        quantities = np.array([row[2] for row in partition], dtype=np.float64)
+
+        rows = np.searchsorted(product_ids, ids).clip(max=len(product_ids) - 1)
+        keep = (product_ids[rows] == ids) & (days >= 0) & (days < sales.shape[1])
+        np.add.at(sales, (rows[keep], days[keep]), quantities[keep])
+
+
+def forecast_catalog(
+    sales: np.ndarray, stock: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Daily demand, model choice and reorder point for every product."""
+    forecast, std, intermittent = forecast_demand(sales, settings.FORECAST_ALPHA)
+    _, reorder_point = reorder_metrics(
+        forecast,
+        std,
+        stock,
+        settings.FORECAST_LEAD_TIME_DAYS,
+        settings.FORECAST_SERVICE_LEVEL_Z,
+    )
+    return forecast, intermittent, reorder_point
+
+
+async def _store(db: AsyncSession, rows: list[dict], computed_at: datetime) -> None:
+    """Upsert every forecast and drop stale rows in a single transaction."""
+    insert = dialect_insert(db)
+    stmt = insert(DemandForecast.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id"],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("model", "daily_demand", "reorder_point", "computed_at")
+        },
+    )
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        await db.execute(stmt, rows[start:start + WRITE_BATCH_SIZE])
+
+    # Products deactivated since the last run.
+    await db.execute(
+        delete(DemandForecast).where(DemandForecast.computed_at < computed_at)
+    )
+    await db.commit()
+
+
+async def compute_forecasts(db: AsyncSession) -> int:
+    """Load history, forecast every active product and store the results.
+
+    Only complete days are used: the window ends yesterday. The numeric
+    work runs in a thread so the event loop keeps serving requests.
+    Returns the number of products forecast.
+    """
+    computed_at = datetime.utcnow()
+    history_days = settings.FORECAST_HISTORY_DAYS
+    start = date.today() - timedelta(days=history_days)
+
+    result = await db.execute(
+        select(Product.id, Product.stock_quantity)
+        .where(Product.is_active == True)
+        .order_by(Product.id)
+    )
+    rows = result.all()
+    product_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    stock = np.array([row[1] for row in rows], dtype=np.float64)
+
+    sales = np.zeros((len(product_ids), history_days), dtype=np.float64)
+    if len(product_ids):
+        await _load_sales(db, product_ids, sales, start)
+
+    forecast, intermittent, reorder_point = await asyncio.to_thread(
+        forecast_catalog, sales, stock
+    )
+    await _store(
+        db,
+        [
+            {
+                "product_id": product_id,
+                "model": "croston" if is_intermittent else "ses",
+                "daily_demand": demand,
+                "reorder_point": int(point),
+                "computed_at": computed_at,
+            }
+            for product_id, is_intermittent, demand, point in zip(
+                product_ids.tolist(),
+                intermittent.tolist(),
+                forecast.tolist(),
+                reorder_point.tolist(),
+            )
+        ],
+        computed_at,
+    )
+    return len(product_ids)
+
+
+async def refresh_forecasts() -> None:
+    """Forecasting job using its own session, skipped while a peer runs it."""
+    async with job_lock("product_forecasts") as acquired:
+        if not acquired:
+            return
+        async with AsyncSessionLocal() as db:
+            await compute_forecasts(db)
+
+
+def _forecast_response(forecast: DemandForecast, stock: int) -> dict:
+    """Stored forecast combined with the product's current stock."""
+    demand = forecast.daily_demand
+    return {
+        "product_id": forecast.product_id,
+        "model": forecast.model,
+        "daily_demand": round(demand, 4),
+        "stock_quantity": stock,
+        "days_of_cover": round(stock / demand, 1) if demand > 0 else None,
+        "reorder_point": forecast.reorder_point,
+        "needs_reorder": demand > 0 and stock <= forecast.reorder_point,
+        "computed_at": forecast.computed_at,
+    }
+
+
+def _forecast_query():
+    return (
+        select(DemandForecast, Product.stock_quantity)
+        .join(Product, Product.id == DemandForecast.product_id)
+        .where(Product.is_active == True)
+    )
+
+
+async def get_forecast(db: AsyncSession, product_id: int) -> dict | None:
+    """Latest forecast for a product, or None before the job has run."""
+    result = await db.execute(
+        _forecast_query().where(DemandForecast.product_id == product_id)
+    )
+    row = result.first()
+    return _forecast_response(*row) if row else None
+
+
+async def reorder_list(db: AsyncSession, limit: int) -> list[dict]:
+    """Products at or below their reorder point, least cover first."""
+    result = await db.execute(
+        _forecast_query()
+        .where(DemandForecast.daily_demand > 0)
+        .where(Product.stock_quantity <= DemandForecast.reorder_point)
+        .order_by(
+            Product.stock_quantity / DemandForecast.daily_demand,
+            DemandForecast.product_id,
+        )
+        .limit(limit)
+    )
+    return [_forecast_response(*row) for row in result.all()]
@@ -0,0 +1,166 @@
+"""Order count and revenue pre-aggregated by (country, city, day).
+
+Order writes upsert a delta into ``order_geo_daily`` in the order's
+transaction, so a date-range report sums at most one row per location
+and day instead of joining and grouping ``orders``. Each order stores
+the customer's location when it was placed, and voids and reinstates
+adjust that same bucket even if the customer later moved or the order
+was re-pointed by a merge.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.core.jobs import job_lock
+from app.models.customer import Customer
+from app.models.order import VOID_STATUSES, Order, OrderGeoDaily
+
+
+async def stamp_location(db: AsyncSession, order: Order) -> None:
+    """Copy the customer's current location onto an order that has none.
+
+    Called on create; orders that predate the columns are stamped the
+    first time they are voided or reinstated.
+    """
+    if order.country is not None:
+        return
+    result = await db.execute(
+        select(Customer.country, Customer.city).where(Customer.id == order.customer_id)
+    )
+    location = result.one_or_none()
+    country, city = location if location else (None, None)
+    order.country = country or ""
+    order.city = city or ""
+
+
+async def record_geo(
+    db: AsyncSession,
+    order: Order,
+    orders: int,
+    revenue: Decimal,
+) -> None:
+    """Add ``orders`` and ``revenue`` (negative to remove) to the order's bucket."""
+    await stamp_location(db, order)
+
+    insert = dialect_insert(db)
+    stmt = insert(OrderGeoDaily).values(
+        country=order.country,
+        city=order.city,
+        day=order.created_at.date(),
+        order_count=orders,
+        revenue=revenue,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["country", "city", "day"],
+        set_={
+            "order_count": OrderGeoDaily.order_count + stmt.excluded.order_count,
+            "revenue": OrderGeoDaily.revenue + stmt.excluded.revenue,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_geo_stats(db: AsyncSession) -> None:
+    """Recompute the whole table from ``orders`` in one INSERT ... SELECT.
+
+    Orders without a stored location are first stamped with their
+    customer's current one. Everything runs in one transaction that
+    holds the table against concurrent order writes (on PostgreSQL an
+    EXCLUSIVE lock, which still allows reads), so a delta written while
+    the rebuild runs is neither wiped by the delete nor counted twice.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE order_geo_daily IN EXCLUSIVE MODE"))
+
+    def customer_column(column):
+        return func.coalesce(
+            select(column).where(Customer.id == Order.customer_id).scalar_subquery(),
+            "",
+        )
+
+    await db.execute(
+        update(Order)
+        .where(Order.country.is_(None))
+        .values(country=customer_column(Customer.country), city=customer_column(Customer.city))
+        .execution_options(synchronize_session=False)
+    )
+
+    day = func.date(Order.created_at)
+    aggregated = (
+        select(
+            Order.country,
+            Order.city,
+            day,
+            func.count(Order.id),
+            func.sum(Order.total_amount),
+        )
+        .where(Order.status.notin_(VOID_STATUSES))
+        .group_by(Order.country, Order.city, day)
+    )
+    await db.execute(delete(OrderGeoDaily))
+    await db.execute(
+        OrderGeoDaily.__table__.insert().from_select(
+            ["country", "city", "day", "order_count", "revenue"],
+            aggregated,
+        )
+    )
+    await db.commit()
+
+
+async def backfill_geo_stats() -> None:
+    """Build the table on first start if orders predate it.
+
+    Every worker schedules this at startup; only the one holding the
+    lock runs it, and later ones find the table populated.
+    """
+    async with job_lock("order_geo") as acquired:
+        if not acquired:
+            return
+        async with AsyncSessionLocal() as db:
+            if await db.scalar(select(OrderGeoDaily.day).limit(1)) is not None:
+                return
+            if await db.scalar(select(Order.id).limit(1)) is None:
+                return
+            await rebuild_geo_stats(db)
+
+
+async def geo_summary(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    group_by: str,
+    country: str | None = None,
+) -> list[dict]:
+    """Orders and revenue per country (or country and city), highest revenue first."""
+    keys = [OrderGeoDaily.country]
+    if group_by == "city":
+        keys.append(OrderGeoDaily.city)
+
+    query = (
+        select(
+            *keys,
+            func.sum(OrderGeoDaily.order_count).label("orders"),
+            func.sum(OrderGeoDaily.revenue).label("revenue"),
+        )
+        .where(OrderGeoDaily.day.between(start, end))
+        .group_by(*keys)
+        .having(func.sum(OrderGeoDaily.order_count) > 0)
+        .order_by(func.sum(OrderGeoDaily.revenue).desc())
+    )
+    if country is not None:
+        query = query.where(OrderGeoDaily.country == country)
+
+    result = await db.execute(query)
+    return [
+        {
+            "country": row["country"] or None,
+            "city": row.get("city") or None,
+            "orders": row["orders"],
+            "revenue": row["revenue"],
+        }
+        for row in result.mappings()
+    ]
@@ -0,0 +1,185 @@
+"""Shared plumbing for the streaming bulk imports.
+
+Job progress is stored in the ``import_jobs`` table so any worker can
+report it, and uploads are parsed line by line into records without
+buffering the whole body.
+"""
+
+import codecs
+import csv
+import json
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.import_job import ImportJob
+
+MAX_REPORTED_ERRORS = 100
+MAX_TRACKED_JOBS = 100
+
+Job = TypeVar("Job", bound=BaseModel)
+
+
+async def save_import_job(db: AsyncSession, kind: str, job: BaseModel) -> None:
+    """Upsert a job's progress as part of the caller's transaction."""
+    insert = dialect_insert(db)
+    stmt = insert(ImportJob).values(
+        kind=kind,
+        id=job.id,
+        payload=job.model_dump_json(),
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["kind", "id"],
+        set_={"payload": stmt.excluded.payload, "updated_at": stmt.excluded.updated_at},
+    )
+    await db.execute(stmt)
+
+
+async def register_import_job(db: AsyncSession, kind: str, job: BaseModel) -> None:
+    """Store a new job so any worker can report it, keeping the latest few."""
+    await save_import_job(db, kind, job)
+    latest = (
+        select(ImportJob.id)
+        .where(ImportJob.kind == kind)
+        .order_by(ImportJob.updated_at.desc())
+        .limit(MAX_TRACKED_JOBS)
+    )
+    await db.execute(
+        delete(ImportJob)
+        .where(ImportJob.kind == kind)
+        .where(ImportJob.id.notin_(latest))
+    )
+    await db.commit()
+
+
+async def load_import_job(
+    db: AsyncSession,
+    kind: str,
+    schema: type[Job],
+    job_id: str,
+) -> Job | None:
+    """Stored job; a running job whose progress stopped is reported failed."""
+    result = await db.execute(
+        select(ImportJob.payload, ImportJob.updated_at)
+        .where(ImportJob.kind == kind)
+        .where(ImportJob.id == job_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    job = schema.model_validate_json(row.payload)
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    if job.status == "running" and row.updated_at < stale_before:
+        job.status = "failed"
+        job.detail = "Import stopped without finishing"
+    return job
+
+
+async def fail_import_job(
+    db: AsyncSession,
+    kind: str,
+    job: BaseModel,
+    row_number: int,
+    error: Exception,
+) -> None:
+    """Roll back the chunk in flight and record the job as failed.
+
+    A failure to save the status is only logged, so it cannot mask the
+    error that aborted the import; the job then goes stale instead.
+    """
+    await db.rollback()
+    job.status = "failed"
+    job.detail = f"Import aborted at row {row_number}: {error.__class__.__name__}"
+    job.finished_at = datetime.utcnow()
+    try:
+        await save_import_job(db, kind, job)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Could not record failure of import job {job.id}: {e}")
+
+
+def _decode_line(line: bytes, first: bool) -> str | ValueError:
+    if first:
+        line = line.removeprefix(codecs.BOM_UTF8)
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return ValueError(f"Invalid UTF-8: {e}")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str | ValueError]:
+    """Split a byte stream into text lines without buffering the whole body.
+
+    Each line is decoded on its own, so invalid UTF-8 only spoils that
+    line: it is yielded as a ValueError for the importer to report.
+    """
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode_line(line, first)
+            first = False
+    if buffer:
+        yield _decode_line(buffer, first)
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[dict[str, Any]]:
+    """Parse CSV lines into dicts keyed by the header row.
+
+    Quoted fields may span lines; empty cells are dropped so schema
+    defaults apply.
+    """
+    header: list[str] | None = None
+    pending = ""
+    async for line in lines:
+        if isinstance(line, Exception):
+            pending = ""
+            yield line
+            continue
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            yield ValueError(f"Invalid CSV: {e}")
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield {key: value for key, value in zip(header, values) if value != ""}
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Any]:
+    """Parse newline-delimited JSON objects."""
+    async for line in lines:
+        if isinstance(line, Exception):
+            yield line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def format_errors(error: ValidationError) -> str:
+    """One-line summary of a row's validation errors."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
@@ -0,0 +1,119 @@
+"""Stock adjustments and low-stock tracking based on per-product and
+per-category thresholds."""
+
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product import Product, ProductCategory
+
+# Keeps IN lists well under driver bind-parameter limits.
+STATEMENT_BATCH_SIZE = 1000
+
+
+def effective_threshold():
+    """Product threshold, falling back to its category, then the default."""
+    category_threshold = (
+        select(ProductCategory.low_stock_threshold)
+        .where(ProductCategory.id == Product.category_id)
+        .scalar_subquery()
+    )
+    return func.coalesce(
+        Product.low_stock_threshold,
+        category_threshold,
+        settings.LOW_STOCK_THRESHOLD,
+    )
+
+
+async def take_stock(db: AsyncSession, quantities: Counter[int]) -> int | None:
+    """Atomically decrement stock for ``{product_id: quantity}``.
+
+    Each product is updated with a single conditional UPDATE, so
+    concurrent orders cannot both consume the last units. Returns the id
+    of the first product without enough stock, or None on success; the
+    caller rolls back the transaction on failure.
+    """
+    for product_id, quantity in sorted(quantities.items()):
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .where(Product.stock_quantity >= quantity)
+            .values(stock_quantity=Product.stock_quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            return product_id
+    return None
+
+
+async def return_stock(db: AsyncSession, quantities: Counter[int]) -> None:
+    """Put stock back for ``{product_id: quantity}``, e.g. on cancellation."""
+    for product_id, quantity in sorted(quantities.items()):
+        await db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock_quantity=Product.stock_quantity + quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def refresh_low_stock(
+    db: AsyncSession,
+    product_ids: Iterable[int] | None = None,
+    category_id: int | None = None,
+) -> None:
+    """Recompute ``is_low_stock`` for the given products.
+
+    Call it in the same transaction as any write to stock, thresholds or
+    category membership. With no arguments every product is recomputed,
+    which is needed after changing ``LOW_STOCK_THRESHOLD``.
+    """
+    stmt = (
+        update(Product)
+        .values(is_low_stock=Product.stock_quantity < effective_threshold())
+        .execution_options(synchronize_session=False)
+    )
+
+    if category_id is not None:
+        await db.execute(stmt.where(Product.category_id == category_id))
+        return
+
+    if product_ids is None:
+        await db.execute(stmt)
+        return
+
+    product_ids = list(product_ids)
+    for start in range(0, len(product_ids), STATEMENT_BATCH_SIZE):
+        batch = product_ids[start:start + STATEMENT_BATCH_SIZE]
+        await db.execute(stmt.where(Product.id.in_(batch)))
+
+
+async def list_low_stock(
+    db: AsyncSession,
+    limit: int,
+    category_id: int | None = None,
+):
+    """Active low-stock products, emptiest first, read via the partial index."""
+    query = (
+        select(
+            Product.id,
+            Product.name,
+            Product.sku,
+            Product.stock_quantity,
+            Product.category_id,
+            effective_threshold().label("low_stock_threshold"),
+        )
+        .where(Product.is_low_stock == True)
+        .where(Product.is_active == True)
+    )
+
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+
+    query = query.order_by(Product.stock_quantity, Product.id).limit(limit)
+
+    result = await db.execute(query)
+    return result.mappings().all()
@@ -0,0 +1,96 @@
+"""Short-lived cache of authenticated principals keyed by user id.
+
+``get_current_user`` resolves the caller from this cache instead of
+loading the ``users`` row on every request. Each user carries a
+revocation epoch that is stamped into their tokens; bumping it (password
+change, deactivation) invalidates the cached principal on every worker
+so tokens minted before the bump are rejected on their next use.
+
+The cache is only used while the invalidation channel is connected.
+Without it a peer's bump could not reach this worker, so every request
+loads the row and revocations still take effect immediately.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, invalidation_channel
+from app.core.config import settings
+from app.models.user import User
+
+CACHE_NAME = "principal"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Immutable snapshot of the user columns needed to authorize a request."""
+
+    id: int
+    email: str
+    full_name: str | None
+    is_active: bool
+    is_superuser: bool
+    created_at: datetime
+    token_epoch: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            created_at=user.created_at,
+            token_epoch=user.token_epoch,
+        )
+
+
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+invalidation_channel.register(CACHE_NAME, principal_cache)
+
+
+async def get_principal(db: AsyncSession, user_id: int) -> Principal | None:
+    """Return the cached principal, loading it on a miss."""
+    cached = invalidation_channel.connected
+    if cached:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+    generation = principal_cache.generation
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+
+    principal = Principal.from_user(user)
+    if cached:
+        principal_cache.set(user_id, principal, generation)
+    return principal
+
+
+async def invalidate_principal(user_id: int) -> None:
+    """Drop a cached principal on every worker after the user row changed."""
+    await invalidation_channel.invalidate(CACHE_NAME, [user_id])
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> None:
+    """Bump the user's epoch so every token issued so far stops validating.
+
+    Commits before invalidating so that no worker can reload the old epoch
+    after its cache entry was dropped.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_epoch=User.token_epoch + 1)
+    )
+    await db.commit()
+    await invalidate_principal(user_id)
@@ -0,0 +1,134 @@
+"""Set-based bulk price and stock updates for products."""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.schemas.product import (
+    ProductBulkItem,
+    ProductBulkUpdate,
+    ProductBulkUpdateResult,
+)
+from app.services.low_stock import refresh_low_stock
+from app.services.product_cache import invalidate_products
+
+# Keeps each CASE statement well under driver bind-parameter limits.
+STATEMENT_BATCH_SIZE = 1000
+
+ITEM_COLUMNS = ("price", "cost_price", "stock_quantity")
+
+
+async def _resolve_ids(
+    db: AsyncSession,
+    items: list[ProductBulkItem],
+    result: ProductBulkUpdateResult,
+) -> list[tuple[int, ProductBulkItem]]:
+    """Map every item to a product id with one lookup per key type."""
+    ids = {item.id for item in items if item.id is not None}
+    skus = {item.sku for item in items if item.sku is not None}
+
+    known_ids: set[int] = set()
+    if ids:
+        rows = await db.execute(select(Product.id).where(Product.id.in_(ids)))
+        known_ids = set(rows.scalars().all())
+
+    sku_to_id: dict[str, int] = {}
+    if skus:
+        rows = await db.execute(
+            select(Product.sku, Product.id).where(Product.sku.in_(skus))
+        )
+        sku_to_id = dict(rows.all())
+
+    result.not_found_ids = sorted(ids - known_ids)
+    result.not_found_skus = sorted(skus - sku_to_id.keys())
+
+    resolved = []
+    for item in items:
+        product_id = item.id if item.id is not None else sku_to_id.get(item.sku)
+        if product_id is not None and (item.id is None or product_id in known_ids):
+            resolved.append((product_id, item))
+    return resolved
+
+
+async def _apply_rules(db: AsyncSession, data: ProductBulkUpdate) -> set[int]:
+    touched: set[int] = set()
+    for rule in data.rules:
+        values: dict[str, Any] = {}
+        if rule.price_percent is not None:
+            factor = 1 + rule.price_percent / Decimal(100)
+            values["price"] = func.round(Product.price * factor, 2)
+        if rule.cost_price_percent is not None:
+            factor = 1 + rule.cost_price_percent / Decimal(100)
+            values["cost_price"] = func.round(Product.cost_price * factor, 2)
+        if not values:
+            continue
+
+        rows = await db.execute(
+            update(Product)
+            .where(Product.category_id == rule.category_id)
+            .where(Product.is_active == True)
+            .values(**values, updated_at=datetime.utcnow())
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        touched.update(rows.scalars().all())
+    return touched
+
+
+async def _apply_items(
+    db: AsyncSession,
+    resolved: list[tuple[int, ProductBulkItem]],
+) -> set[int]:
+    touched: set[int] = set()
+    for start in range(0, len(resolved), STATEMENT_BATCH_SIZE):
+        batch = resolved[start:start + STATEMENT_BATCH_SIZE]
+        for column in ITEM_COLUMNS:
+            mapping = {
+                product_id: getattr(item, column)
+                for product_id, item in batch
+                if getattr(item, column) is not None
+            }
+            if not mapping:
+                continue
+
+            await db.execute(
+                update(Product)
+                .where(Product.id.in_(mapping))
+                .values(
+                    **{column: case(mapping, value=Product.id)},
+                    updated_at=datetime.utcnow(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            touched.update(mapping)
+    return touched
+
+
+async def apply_bulk_update(
+    db: AsyncSession,
+    data: ProductBulkUpdate,
+) -> ProductBulkUpdateResult:
+    """Apply rules, then explicit values, in a single transaction.
+
+    Rules run first so explicit per-product values win. Each column is
+    written with one ``UPDATE ... SET col = CASE id ...`` per batch rather
+    than one statement per product.
+    """
+    result = ProductBulkUpdateResult(updated=0)
+    resolved = await _resolve_ids(db, data.items, result)
+
+    touched = await _apply_rules(db, data)
+    touched |= await _apply_items(db, resolved)
+    await refresh_low_stock(
+        db,
+        [product_id for product_id, item in resolved if item.stock_quantity is not None],
+    )
+    await db.commit()
+
+    result.updated = len(touched)
+    await invalidate_products(touched)
+    return result
@@ -0,0 +1,67 @@
+"""Read-through cache of serialized product detail payloads.
+
+Payloads include stock, which changes with every order. Writes drop the
+entry on every worker through the invalidation channel, so the cache is
+only used while that channel is connected; otherwise a peer's order
+would leave this worker serving stale stock until the TTL lapsed.
+"""
+
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, invalidation_channel
+from app.core.config import settings
+from app.models.product import Product
+from app.schemas.product import ProductResponse
+from app.services.product_facets import FACET_CACHE_NAME
+
+CACHE_NAME = "product"
+
+# Past this many keys a single clear is cheaper than per-key invalidation.
+MAX_KEYED_INVALIDATION = 1000
+
+product_cache = TTLCache(
+    max_size=settings.PRODUCT_CACHE_MAX_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+)
+invalidation_channel.register(CACHE_NAME, product_cache)
+
+
+async def get_product_payload(db: AsyncSession, product_id: int) -> bytes | None:
+    """Return the JSON-encoded ProductResponse, loading it on a miss."""
+    cached = invalidation_channel.connected
+    if cached:
+        payload = product_cache.get(product_id)
+        if payload is not None:
+            return payload
+
+    generation = product_cache.generation
+    result = await db.execute(
+        select(Product).where(Product.id == product_id)
+    )
+    product = result.scalar_one_or_none()
+    if product is None:
+        return None
+
+    payload = ProductResponse.model_validate(product).model_dump_json().encode()
+    if cached:
+        product_cache.set(product_id, payload, generation)
+    return payload
+
+
+async def invalidate_products(product_ids: Iterable[int] | None = None) -> None:
+    """Drop cached products on every worker; None clears the whole cache.
+
+    Facet counts aggregate over many products, so they are always
+    cleared in full.
+    """
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        if len(product_ids) > MAX_KEYED_INVALIDATION:
+            product_ids = None
+    await invalidation_channel.invalidate(CACHE_NAME, product_ids)
+    await invalidation_channel.invalidate(FACET_CACHE_NAME)
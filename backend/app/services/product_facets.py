@@ -0,0 +1,183 @@
+"""Faceted product search with all facet counts from one aggregate query."""
+
+from collections import defaultdict
+from typing import Any
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, invalidation_channel
+from app.core.config import settings
+from app.models.product import Product
+from app.schemas.product import FacetCount, ProductFacets
+from app.services.category_cache import category_cache
+
+FACETS = ("category", "price", "stock")
+
+FACET_CACHE_NAME = "product_facets"
+
+# Aggregate cells keyed by (search, grouped dimensions). Every filter
+# combination over the same search is answered from one cached entry.
+# Any product write can move any count, so invalidate_products clears it.
+facet_cache = TTLCache(
+    max_size=256,
+    ttl=settings.PRODUCT_FACET_CACHE_TTL_SECONDS,
+)
+invalidation_channel.register(FACET_CACHE_NAME, facet_cache)
+
+
+def price_bucket_label(index: int) -> str:
+    bounds = settings.PRODUCT_PRICE_BUCKETS
+    if index + 1 < len(bounds):
+        return f"{bounds[index]}-{bounds[index + 1]}"
+    return f"{bounds[index]}+"
+
+
+def _facet_columns() -> dict[str, Any]:
+    bounds = settings.PRODUCT_PRICE_BUCKETS
+    price_bucket = case(
+        *[(Product.price < upper, index) for index, upper in enumerate(bounds[1:])],
+        else_=len(bounds) - 1,
+    )
+    return {
+        "category": Product.category_id,
+        "price": price_bucket,
+        "stock": Product.stock_quantity > 0,
+    }
+
+
+def _apply_base_filters(query, search: str | None):
+    query = query.where(Product.is_active == True)
+    if search:
+        query = query.where(Product.name.ilike(f"%{search}%"))
+    return query
+
+
+def _apply_facet_filters(query, filters: dict[str, Any]):
+    if "category" in filters:
+        query = query.where(Product.category_id == filters["category"])
+    if "price" in filters:
+        bounds = settings.PRODUCT_PRICE_BUCKETS
+        index = filters["price"]
+        if index > 0:
+            query = query.where(Product.price >= bounds[index])
+        if index + 1 < len(bounds):
+            query = query.where(Product.price < bounds[index + 1])
+    if "stock" in filters:
+        query = query.where(
+            Product.stock_quantity > 0 if filters["stock"] else Product.stock_quantity <= 0
+        )
+    return query
+
+
+async def _load_cells(
+    db: AsyncSession,
+    search: str | None,
+    dimensions: tuple[str, ...],
+) -> list[dict[str, Any]]:
+    """Counts grouped by every requested or filtered dimension at once."""
+    key = (search or "", dimensions)
+    cells = facet_cache.get(key)
+    if cells is not None:
+        return cells
+
+    generation = facet_cache.generation
+    columns = _facet_columns()
+    grouped = [columns[dimension] for dimension in dimensions]
+    query = select(
+        *[column.label(name) for name, column in zip(dimensions, grouped)],
+        func.count().label("count"),
+    )
+    query = _apply_base_filters(query, search)
+    if grouped:
+        query = query.group_by(*grouped)
+
+    result = await db.execute(query)
+    cells = []
+    for row in result.mappings().all():
+        cell = dict(row)
+        if "stock" in cell:
+            cell["stock"] = bool(cell["stock"])
+        cells.append(cell)
+
+    facet_cache.set(key, cells, generation)
+    return cells
+
+
+def _matches(
+    cell: dict[str, Any],
+    filters: dict[str, Any],
+    skip: str | None = None,
+) -> bool:
+    return all(cell[name] == value for name, value in filters.items() if name != skip)
+
+
+def _count(
+    cells: list[dict[str, Any]],
+    filters: dict[str, Any],
+    facet: str,
+) -> dict[Any, int]:
+    """Sum cells per facet value, applying every filter but the facet's own."""
+    counts: dict[Any, int] = defaultdict(int)
+    for cell in cells:
+        if _matches(cell, filters, skip=facet):
+            counts[cell[facet]] += cell["count"]
+    return counts
+
+
+async def search_products(
+    db: AsyncSession,
+    *,
+    skip: int,
+    limit: int,
+    facets: tuple[str, ...],
+    search: str | None = None,
+    category_id: int | None = None,
+    price_bucket: int | None = None,
+    in_stock: bool | None = None,
+) -> tuple[list[Product], int, ProductFacets]:
+    """Return a page of products, the total and the requested facet counts.
+
+    The page is one query; total and facets come from a second GROUP BY
+    query (usually cached) that is reduced in Python. Each facet ignores
+    its own filter so the sidebar can offer alternative values.
+    """
+    filters: dict[str, Any] = {}
+    if category_id is not None:
+        filters["category"] = category_id
+    if price_bucket is not None:
+        filters["price"] = price_bucket
+    if in_stock is not None:
+        filters["stock"] = in_stock
+
+    dimensions = tuple(name for name in FACETS if name in facets or name in filters)
+    cells = await _load_cells(db, search, dimensions)
+    total = sum(cell["count"] for cell in cells if _matches(cell, filters))
+
+    query = _apply_facet_filters(_apply_base_filters(select(Product), search), filters)
+    query = query.order_by(Product.created_at.desc()).offset(skip).limit(limit)
+    result = await db.execute(query)
+    products = list(result.scalars().all())
+
+    result_facets = ProductFacets()
+    if "category" in facets:
+        names = (await category_cache.load(db)).names
+        counts = _count(cells, filters, "category")
+        result_facets.category = [
+            FacetCount(value=value, label=names.get(value), count=count)
+            for value, count in sorted(counts.items(), key=lambda item: -item[1])
+        ]
+    if "price" in facets:
+        counts = _count(cells, filters, "price")
+        result_facets.price = [
+            FacetCount(value=value, label=price_bucket_label(value), count=count)
+            for value, count in sorted(counts.items())
+        ]
+    if "stock" in facets:
+        counts = _count(cells, filters, "stock")
+        result_facets.stock = [
+            FacetCount(value=value, label="In stock" if value else "Out of stock", count=count)
+            for value, count in sorted(counts.items(), reverse=True)
+        ]
+
+    return products, total, result_facets
@@ -0,0 +1,152 @@
+"""Streaming bulk product import with chunked upserts by SKU."""
+
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.core.utils import slugify
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductImportError, ProductImportJob
+from app.services.imports import (
+    MAX_REPORTED_ERRORS,
+    fail_import_job,
+    format_errors,
+    load_import_job,
+    register_import_job,
+    save_import_job,
+)
+from app.services.low_stock import refresh_low_stock
+from app.services.product_cache import invalidate_products
+
+# Columns overwritten when an imported SKU already exists. The slug is kept
+# so existing product URLs stay stable.
+UPSERT_COLUMNS = (
+    "name",
+    "description",
+    "price",
+    "cost_price",
+    "stock_quantity",
+    "low_stock_threshold",
+    "category_id",
+    "image_url",
+    "is_active",
+    "updated_at",
+)
+
+JOB_KIND = "product"
+
+
+async def create_import_job(
+    db: AsyncSession, job_id: str | None = None
+) -> ProductImportJob:
+    """Register a new job so its progress can be polled while it runs."""
+    job = ProductImportJob(
+        id=job_id or uuid.uuid4().hex,
+        started_at=datetime.utcnow(),
+    )
+    await register_import_job(db, JOB_KIND, job)
+    return job
+
+
+async def get_product_import_job(
+    db: AsyncSession, job_id: str
+) -> ProductImportJob | None:
+    return await load_import_job(db, JOB_KIND, ProductImportJob, job_id)
+
+
+def import_slug(name: str, sku: str) -> str:
+    """Slug for an imported product.
+
+    Distinct SKUs can slugify alike (``AB 1`` and ``ab-1``), so a short
+    hash of the raw SKU keeps the slug unique.
+    """
+    digest = hashlib.blake2b(sku.encode(), digest_size=4).hexdigest()
+    return f"{slugify(name)}-{slugify(sku)}-{digest}"
+
+
+def _record_error(job: ProductImportJob, row: int, detail: str) -> None:
+    job.rows_failed += 1
+    if len(job.errors) < MAX_REPORTED_ERRORS:
+        job.errors.append(ProductImportError(row=row, detail=detail))
+
+
+async def _flush(
+    db: AsyncSession,
+    rows: dict[str, dict[str, Any]],
+    job: ProductImportJob,
+) -> None:
+    insert = dialect_insert(db)
+    stmt = insert(Product).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+    ).returning(Product.id)
+
+    result = await db.execute(stmt)
+    product_ids = result.scalars().all()
+    await refresh_low_stock(db, product_ids)
+    job.rows_upserted += len(rows)
+    await save_import_job(db, JOB_KIND, job)
+    await db.commit()
+
+    await invalidate_products(product_ids)
+
+
+async def import_products(
+    db: AsyncSession,
+    records: AsyncIterator[Any],
+    job: ProductImportJob,
+    chunk_size: int,
+) -> ProductImportJob:
+    """Validate records with ProductCreate and upsert them chunk by chunk.
+
+    Each chunk is committed on its own, together with the job's
+    progress, so memory stays bounded by ``chunk_size`` and a failure
+    only loses the chunk in flight. Duplicate SKUs within a chunk
+    collapse to the last occurrence.
+    """
+    rows: dict[str, dict[str, Any]] = {}
+    row_number = 0
+
+    try:
+        async for record in records:
+            row_number += 1
+            job.rows_processed += 1
+
+            if isinstance(record, Exception):
+                _record_error(job, row_number, str(record))
+                continue
+            try:
+                data = ProductCreate.model_validate(record)
+            except ValidationError as e:
+                _record_error(job, row_number, format_errors(e))
+                continue
+
+            now = datetime.utcnow()
+            rows[data.sku] = {
+                **data.model_dump(),
+                "slug": import_slug(data.name, data.sku),
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now,
+            }
+            if len(rows) >= chunk_size:
+                await _flush(db, rows, job)
+                rows = {}
+
+        if rows:
+            await _flush(db, rows, job)
+    except Exception as e:
+        await fail_import_job(db, JOB_KIND, job, row_number, e)
+        raise
+
+    job.status = "completed"
+    job.finished_at = datetime.utcnow()
+    await save_import_job(db, JOB_KIND, job)
+    await db.commit()
+    return job
@@ -0,0 +1,167 @@
+"""Frequently-bought-together recommendations from order co-occurrence."""
+
+import heapq
+from datetime import datetime
+from operator import itemgetter
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.order import VOID_STATUSES, Order, OrderItem
+from app.models.product import Product
+
+
+class CooccurrenceIndex:
+    """Sparse item-item co-occurrence counts kept in memory.
+
+    Each product maps only to the products it was actually bought with, so
+    memory grows with the number of distinct pairs rather than the square
+    of the catalog. Orders are added as they are created; ``rebuild``
+    recomputes everything from ``order_items`` and swaps it in at once.
+    """
+
+    def __init__(self, max_basket_size: int):
+        self.max_basket_size = max_basket_size
+        self._pairs: dict[int, dict[int, int]] = {}
+        self._orders: dict[int, int] = {}
+        self._names: dict[int, str] = {}
+        self._pending: list[tuple[int, list[tuple[int, str]]]] | None = None
+        self.last_order_id = 0
+        self.built_at: datetime | None = None
+
+    def _add(self, order_id: int, items: Iterable[tuple[int, str]]) -> None:
+        basket: dict[int, str] = {}
+        for product_id, name in items:
+            basket[product_id] = name
+        self._names.update(basket)
+        self.last_order_id = max(self.last_order_id, order_id)
+
+        for product_id in basket:
+            self._orders[product_id] = self._orders.get(product_id, 0) + 1
+
+        # Bulk/wholesale baskets would add O(n^2) pairs of mostly noise.
+        if len(basket) > self.max_basket_size:
+            return
+
+        product_ids = list(basket)
+        for i, a in enumerate(product_ids):
+            row_a = self._pairs.setdefault(a, {})
+            for b in product_ids[i + 1:]:
+                row_a[b] = row_a.get(b, 0) + 1
+                row_b = self._pairs.setdefault(b, {})
+                row_b[a] = row_b.get(a, 0) + 1
+
+    def add_order(self, order_id: int, items: Iterable[tuple[int, str]]) -> None:
+        """Count a newly created order."""
+        items = list(items)
+        if self._pending is not None:
+            self._pending.append((order_id, items))
+        self._add(order_id, items)
+
+    def related(self, product_id: int, limit: int) -> list[dict]:
+        """Top-k products most often bought together with ``product_id``."""
+        row = self._pairs.get(product_id)
+        if not row:
+            return []
+
+        orders = self._orders.get(product_id, 0)
+        return [
+            {
+                "product_id": other_id,
+                "name": self._names.get(other_id, ""),
+                "co_occurrences": count,
+                "confidence": round(count / orders, 4) if orders else 0.0,
+            }
+            for other_id, count in heapq.nlargest(limit, row.items(), key=itemgetter(1))
+        ]
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Recompute from ``order_items``, streaming one basket at a time.
+
+        Cancelled and refunded orders are left out, so their baskets stop
+        counting once the next rebuild runs.
+        """
+        self._pending = []
+        fresh = CooccurrenceIndex(self.max_basket_size)
+        try:
+            result = await db.stream(
+                select(OrderItem.order_id, OrderItem.product_id, OrderItem.product_name)
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(Order.status.notin_(VOID_STATUSES))
+                .order_by(OrderItem.order_id)
+                .execution_options(yield_per=10000)
+            )
+            current_order = None
+            basket: list[tuple[int, str]] = []
+            async for order_id, product_id, name in result:
+                if order_id != current_order:
+                    if basket:
+                        fresh._add(current_order, basket)
+                    current_order, basket = order_id, []
+                basket.append((product_id, name))
+            if basket:
+                fresh._add(current_order, basket)
+
+            # Replay orders created while streaming that the scan missed.
+            for order_id, items in self._pending:
+                if order_id > fresh.last_order_id:
+                    fresh._add(order_id, items)
+        finally:
+            self._pending = None
+
+        self._pairs = fresh._pairs
+        self._orders = fresh._orders
+        self._names = fresh._names
+        self.last_order_id = fresh.last_order_id
+        self.built_at = datetime.utcnow()
+
+    def stats(self) -> dict:
+        return {
+            "products": len(self._pairs),
+            "pairs": sum(len(row) for row in self._pairs.values()) // 2,
+            "last_order_id": self.last_order_id,
+            "built_at": self.built_at,
+        }
+
+
+recommendation_index = CooccurrenceIndex(
+    max_basket_size=settings.RECOMMENDATION_MAX_BASKET_SIZE,
+)
+
+
+async def related_products(db: AsyncSession, product_id: int, limit: int) -> list[dict]:
+    """Top-k related products that are still active.
+
+    The index keeps deactivated products, so candidates are fetched in
+    growing windows until ``limit`` active ones are found or the product's
+    co-purchases run out.
+    """
+    window = limit * 2
+    while True:
+        candidates = recommendation_index.related(product_id, window)
+        if not candidates:
+            return []
+        result = await db.execute(
+            select(Product.id)
+            .where(Product.id.in_([c["product_id"] for c in candidates]))
+            .where(Product.is_active == True)
+        )
+        active = set(result.scalars().all())
+        related = [c for c in candidates if c["product_id"] in active][:limit]
+        if len(related) == limit or len(candidates) < window:
+            return related
+        window *= 4
+
+
+async def rebuild_recommendations() -> None:
+    """Full rebuild job using its own session.
+
+    Incremental updates only reach the worker that created the order, so
+    the periodic rebuild also brings every worker back in sync.
+    """
+    async with AsyncSessionLocal() as db:
+        await recommendation_index.rebuild(db)
+
@@ -0,0 +1 @@
+"""Standalone micro-benchmarks (run with ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,80 @@
+"""Bulk customer import throughput.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.customer_import [--rows 100000] [--duplicates 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["DEBUG"] = "false"
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.services.customer_import import (  # noqa: E402
+    create_customer_import_job,
+    import_customers,
+)
+from app.services.customer_search import backfill_search_index  # noqa: E402
+from app.services.product_import import iter_lines, iter_ndjson_records  # noqa: E402
+
+
+def body(rows: int, duplicates: float) -> bytes:
+    unique = max(int(rows * (1 - duplicates)), 1)
+    return "\n".join(
+        json.dumps({
+            "email": f"user{i % unique}@example.com",
+            "first_name": f"First{i}",
+            "last_name": "Last",
+            "city": "Berlin",
+        })
+        for i in range(rows)
+    ).encode()
+
+
+async def chunks(data: bytes, size: int = 64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def run(data: bytes, policy: str) -> tuple[float, object]:
+    job = create_customer_import_job(policy)
+    records = iter_ndjson_records(iter_lines(chunks(data)))
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await import_customers(db, records, job, settings.CUSTOMER_IMPORT_CHUNK_SIZE)
+    return time.perf_counter() - start, job
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    data = body(args.rows, args.duplicates)
+
+    for policy in ("skip", "merge"):
+        elapsed, job = await run(data, policy)
+        print(
+            f"{policy:<6} {args.rows / elapsed:>9.0f} rows/s  "
+            f"inserted={job.rows_inserted} merged={job.rows_merged} "
+            f"skipped={job.rows_skipped}"
+        )
+
+    start = time.perf_counter()
+    await backfill_search_index()
+    print(f"search backfill: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
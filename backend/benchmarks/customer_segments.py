@@ -0,0 +1,54 @@
+"""RFM accumulation throughput and memory on synthetic orders.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.customer_segments [--orders 10000000] [--customers 1000000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.customer_segments import OrderAccumulator, score_customers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    now = int(time.time())
+    accumulator = OrderAccumulator(np.arange(1, args.customers + 1, dtype=np.int64))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for offset in range(0, args.orders, args.chunk_size):
+        size = min(args.chunk_size, args.orders - offset)
+        accumulator.add(
+            rng.integers(1, args.customers + 1, size=size),
+            now - rng.integers(0, 730 * 86400, size=size),
+            rng.gamma(2.0, 150.0, size=size),
+        )
+    accumulated = time.perf_counter() - start
+    scores = score_customers(accumulator, now, horizon_years=3.0)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    segments, counts = np.unique(scores["segment"], return_counts=True)
+    print(f"orders:      {args.orders}")
+    print(f"customers:   {len(scores['customer_id'])}")
+    print(f"accumulate:  {accumulated:.2f}s")
+    print(f"total:       {elapsed:.2f}s")
+    print(f"peak memory: {peak / 1024 / 1024:.0f} MiB")
+    for segment, count in zip(segments, counts):
+        print(f"  {segment:<15} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Event-loop latency during a login storm, bcrypt inline vs pooled.
+
+A ticker coroutine sleeps in short intervals and records how late it
+wakes up while ``--logins`` concurrent password checks run. Inline
+checks block the loop for the full bcrypt cost; pooled checks leave it
+free.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.login_latency [--logins 50] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.core.security import (
+    PasswordHashPool,
+    get_password_hash,
+    verify_password,
+)
+
+TICK_SECONDS = 0.005
+PASSWORD = "correct horse battery staple"
+
+
+async def ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - started - TICK_SECONDS)
+
+
+async def storm(check, logins: int) -> tuple[float, np.ndarray]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK_SECONDS * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(check() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await tick
+    return elapsed, np.array(lags) * 1000
+
+
+def report(label: str, logins: int, elapsed: float, lags: np.ndarray) -> None:
+    print(
+        f"{label:<8} {logins / elapsed:>7.1f} logins/s  loop lag "
+        f"p50={np.percentile(lags, 50):>7.1f}ms "
+        f"p99={np.percentile(lags, 99):>7.1f}ms max={lags.max():>7.1f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    pool = PasswordHashPool(max_workers=args.workers, max_pending=args.logins)
+
+    async def inline():
+        return verify_password(PASSWORD, hashed)
+
+    async def pooled():
+        return await pool.verify(PASSWORD, hashed)
+
+    report("inline", args.logins, *await storm(inline, args.logins))
+    report("pooled", args.logins, *await storm(pooled, args.logins))
+    print(f"pool: {pool.stats()}")
+
+    started = time.perf_counter()
+    await pool.verify("wrong password", hashed)
+    known = time.perf_counter() - started
+    started = time.perf_counter()
+    await pool.reject()
+    unknown = time.perf_counter() - started
+    print(f"wrong password {known * 1000:.1f}ms, unknown email {unknown * 1000:.1f}ms")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
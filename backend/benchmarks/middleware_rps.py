@@ -0,0 +1,82 @@
+"""Requests per second through the full middleware stack.
+
+Drives the ASGI application directly (no server or HTTP parsing) with
+``GET /api/v1/health/live`` so the numbers reflect the framework and
+middleware cost per request.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.middleware_rps [--requests 20000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ["DEBUG"] = "false"
+
+from app.main import app  # noqa: E402
+
+PATH = "/api/v1/health/live"
+
+
+async def request() -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": PATH,
+        "raw_path": PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Like a server, only report a disconnect once the client goes.
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def worker(count: int) -> None:
+    for _ in range(count):
+        assert await request() == 200
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    await worker(200)
+    per_worker = args.requests // args.concurrency
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(per_worker) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    total = per_worker * args.concurrency
+    print(f"{PATH}: {total / elapsed:,.0f} req/s ({total} requests, concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
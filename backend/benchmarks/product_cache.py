@@ -0,0 +1,76 @@
+"""Product detail throughput with and without the read-through cache.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.product_cache [--products 1000] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["DEBUG"] = "false"
+
+from app.core.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services.product_cache import get_product_payload, product_cache  # noqa: E402
+
+
+async def seed(count: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                sku=f"SKU-{i:06d}",
+                price=Decimal("9.99"),
+                stock_quantity=100,
+            )
+            for i in range(1, count + 1)
+        )
+        await db.commit()
+
+
+async def run(products: int, requests: int) -> float:
+    rng = random.Random(42)
+    ids = [rng.randint(1, products) for _ in range(requests)]
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for product_id in ids:
+            await get_product_payload(db, product_id)
+    return requests / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    await seed(args.products)
+
+    max_size = product_cache.max_size
+    product_cache.max_size = 0
+    uncached = await run(args.products, args.requests)
+
+    product_cache.max_size = max_size
+    product_cache.clear()
+    product_cache.hits = product_cache.misses = product_cache.evictions = 0
+    cached = await run(args.products, args.requests)
+
+    print(f"uncached: {uncached:10.0f} req/s")
+    print(f"cached:   {cached:10.0f} req/s  ({cached / uncached:.1f}x)")
+    print(f"stats:    {product_cache.stats()}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Rate limiter cost per check and memory at many distinct clients.
+
+Compares the GCRA limiter with the previous list-of-timestamps
+implementation, reproduced below as the baseline.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.rate_limiter [--clients 100000] [--requests 1000000]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.middleware.rate_limiter import InMemoryRateLimiter
+
+
+class TimestampListLimiter:
+    """The previous implementation: O(limit) per check, keys never dropped."""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self._requests: dict[str, list[float]] = {}
+
+    def is_allowed(self, identifier: str) -> tuple[bool, int, int]:
+        now = time.time()
+        window_start = now - self.window
+        requests = [ts for ts in self._requests.get(identifier, []) if ts > window_start]
+        self._requests[identifier] = requests
+        if len(requests) < self.limit:
+            requests.append(now)
+            return True, self.limit - len(requests), int(now) + self.window
+        return False, 0, int(now) + self.window
+
+
+def timed(limiter, keys: list[str], requests: int) -> float:
+    check = limiter.is_allowed
+    started = time.perf_counter()
+    for i in range(requests):
+        check(keys[i % len(keys)])
+    return (time.perf_counter() - started) / requests * 1e9
+
+
+def state_bytes(limiter, keys: list[str]) -> int:
+    tracemalloc.start()
+    for key in keys:
+        limiter.is_allowed(key)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:/api/v1/products" for i in range(args.clients)]
+
+    # Few busy clients keep each timestamp list near ``limit`` entries.
+    busy = keys[: max(args.clients // 1000, 1)]
+
+    for name, factory in (
+        ("timestamps", lambda: TimestampListLimiter(args.limit, 60)),
+        ("gcra", lambda: InMemoryRateLimiter(args.limit, 60, max_keys=args.clients)),
+    ):
+        spread = timed(factory(), keys, args.requests)
+        hot = timed(factory(), busy, args.requests)
+        memory = state_bytes(factory(), keys)
+        print(
+            f"{name:<10} {spread:>6.0f} ns/check ({args.clients} clients)  "
+            f"{hot:>6.0f} ns/check ({len(busy)} busy clients)  "
+            f"state {memory / 2**20:>5.1f} MiB"
+        )
+
+    limiter = InMemoryRateLimiter(args.limit, 60, max_keys=args.clients)
+    for key in keys:
+        limiter.is_allowed(key)
+    limiter._tat = type(limiter._tat)((key, 0.0) for key in limiter._tat)
+    started = time.perf_counter()
+    asyncio.run(limiter.evict_idle())
+    print(
+        f"evict_idle: {args.clients} idle clients in "
+        f"{(time.perf_counter() - started) * 1000:.1f} ms, {limiter.stats()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Per-request JWT decode cost with and without the verified-token cache.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.token_cache [--requests 100000] [--tokens 100]
+"""
+
+import argparse
+import time
+
+from jose import jwt
+
+from app.core.config import settings
+from app.core.security import create_access_token, decode_token, token_cache
+
+
+def per_call_us(func, tokens: list[str], requests: int) -> float:
+    started = time.process_time()
+    for i in range(requests):
+        func(tokens[i % len(tokens)])
+    return (time.process_time() - started) / requests * 1e6
+
+
+def uncached(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = [create_access_token(i, epoch=0) for i in range(args.tokens)]
+
+    before = per_call_us(uncached, tokens, args.requests)
+    token_cache.clear()
+    after = per_call_us(decode_token, tokens, args.requests)
+    print(f"jwt.decode     {before:>7.2f} us CPU/request")
+    print(f"decode_token   {after:>7.2f} us CPU/request (cached)")
+    print(f"saved          {before - after:>7.2f} us CPU/request ({1 - after / before:.0%})")
+    print(f"cache: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ Pytest Configuration and Fixtures
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
+import itertools
 from typing import AsyncGenerator, Generator
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -22,6 +24,9 @@ from app.core.database import Base, get_db
 # 测试数据库 URL (使用内存 SQLite)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# 每个测试客户端使用独立的来源地址，避免限流计数在测试之间累积
+_client_hosts = itertools.count(1)
+
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
@@ -31,7 +36,7 @@ def event_loop() -> Generator:
     loop.close()
 
 
-@pytest.fixture(scope="session")
+@pytest_asyncio.fixture
 async def test_engine():
     """创建测试数据库引擎"""
     engine = create_async_engine(
@@ -51,7 +56,7 @@ async def test_engine():
     await engine.dispose()
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def db_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
     """创建测试数据库会话"""
     async_session = async_sessionmaker(
@@ -65,7 +70,7 @@ async def db_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
         await session.rollback()
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def client(db_session) -> AsyncGenerator[AsyncClient, None]:
     """创建测试客户端"""
     
@@ -74,7 +79,8 @@ async def client(db_session) -> AsyncGenerator[AsyncClient, None]:
     
     app.dependency_overrides[get_db] = override_get_db
     
-    transport = ASGITransport(app=app)
+    host = next(_client_hosts)
+    transport = ASGITransport(app=app, client=(f"10.0.{host // 256}.{host % 256}", 123))
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
     
@@ -88,8 +94,8 @@ def sample_product_data():
         "name": "测试产品",
         "sku": "TEST-001",
         "description": "这是一个测试产品",
-        "price": 99.99,
-        "stock": 100,
+        "price": "99.99",
+        "stock_quantity": 100,
         "category_id": 1,
         "is_active": True,
     }
@@ -99,7 +105,8 @@ def sample_product_data():
 def sample_customer_data():
     """示例客户数据"""
     return {
-        "name": "张三",
+        "first_name": "三",
+        "last_name": "张",
         "email": "zhangsan@test.com",
         "phone": "13800138000",
         "address": "北京市朝阳区",
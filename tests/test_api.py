@@ -51,6 +51,69 @@ class TestProductEndpoints:
         assert "id" in data
         assert "slug" in data
 
+    @pytest.mark.asyncio
+    async def test_import_products(self, client: AsyncClient):
+        """测试批量导入：SKU 规范化后相同也生成不同 slug，任务进度可查询"""
+        body = "\n".join([
+            '{"name": "Widget", "sku": "AB 1", "price": "10"}',
+            '{"name": "Widget", "sku": "ab-1", "price": "12"}',
+            '{"name": "Widget", "price": "12"}',
+        ])
+        response = await client.post(
+            "/api/v1/products/import",
+            params={"job_id": "import-slugs"},
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert response.json()["rows_upserted"] == 2
+
+        slugs = {product["slug"] for product in (await client.get("/api/v1/products")).json()}
+        assert len(slugs) == 2
+
+        job = await client.get("/api/v1/products/import/import-slugs")
+        assert job.status_code == 200
+        assert job.json()["status"] == "completed"
+        assert job.json()["rows_failed"] == 1
+        assert (await client.get("/api/v1/products/import/unknown")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_import_invalid_utf8_and_stale_job(self, client: AsyncClient, db_session):
+        """测试无效 UTF-8 行记为行错误，失联的运行中任务不再占用 job_id"""
+        import json
+        from datetime import datetime, timedelta
+
+        from sqlalchemy import update
+
+        from app.models.import_job import ImportJob
+
+        body = b'{"name": "Bad \xff", "sku": "X1", "price": "1"}\n{"name": "Ok", "sku": "X2", "price": "1"}'
+        response = await client.post(
+            "/api/v1/products/import", params={"job_id": "stale"}, content=body
+        )
+        assert response.status_code == 200
+        assert response.json()["rows_upserted"] == 1
+        assert "UTF-8" in response.json()["errors"][0]["detail"]
+
+        job = (await client.get("/api/v1/products/import/stale")).json()
+        job["status"] = "running"
+        await db_session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == "stale")
+            .values(
+                payload=json.dumps(job),
+                updated_at=datetime.utcnow() - timedelta(hours=1),
+            )
+        )
+        await db_session.commit()
+
+        job = (await client.get("/api/v1/products/import/stale")).json()
+        assert job["status"] == "failed"
+        response = await client.post(
+            "/api/v1/products/import", params={"job_id": "stale"}, content=body
+        )
+        assert response.status_code == 200
+
     @pytest.mark.asyncio
     async def test_create_product_duplicate_sku(self, client: AsyncClient, sample_product_data):
         """测试创建重复SKU产品"""
@@ -73,6 +136,88 @@ class TestProductEndpoints:
         assert response.status_code == 200
         assert response.json()["id"] == product_id
 
+    @pytest.mark.asyncio
+    async def test_get_product_peer_stock_change(
+        self, client: AsyncClient, db_session, sample_product_data
+    ):
+        """测试未配置失效通道时，其他 worker 修改的库存立即可见"""
+        from sqlalchemy import update
+
+        from app.models.product import Product
+
+        create_response = await client.post("/api/v1/products", json=sample_product_data)
+        product_id = create_response.json()["id"]
+        await client.get(f"/api/v1/products/{product_id}")
+
+        # 模拟另一个 worker 下单扣减库存，本进程收不到失效通知
+        await db_session.execute(
+            update(Product).where(Product.id == product_id).values(stock_quantity=1)
+        )
+        await db_session.commit()
+        response = await client.get(f"/api/v1/products/{product_id}")
+        assert response.json()["stock_quantity"] == 1
+
+    @pytest.mark.asyncio
+    async def test_faceted_counts_follow_writes(self, client: AsyncClient):
+        """测试商品写入后分面计数与总数立即更新"""
+        async def stock_facets():
+            response = await client.get("/api/v1/products/faceted", params={"facets": "stock"})
+            data = response.json()
+            counts = {facet["value"]: facet["count"] for facet in data["facets"]["stock"]}
+            return data["total"], counts
+
+        first = await client.post(
+            "/api/v1/products",
+            json={"name": "分面商品", "sku": "FACET-001", "price": "10", "stock_quantity": 5},
+        )
+        assert await stock_facets() == (1, {True: 1})
+
+        await client.post(
+            "/api/v1/products",
+            json={"name": "分面商品二", "sku": "FACET-002", "price": "10", "stock_quantity": 0},
+        )
+        assert await stock_facets() == (2, {True: 1, False: 1})
+
+        await client.patch(f"/api/v1/products/{first.json()['id']}", json={"stock_quantity": 0})
+        assert await stock_facets() == (2, {False: 2})
+
+    @pytest.mark.asyncio
+    async def test_related_products(self, client: AsyncClient, db_session):
+        """测试关联推荐排除已取消订单和已下架商品"""
+        from app.services.recommendations import recommendation_index
+
+        product_ids = []
+        for sku in ("REL-A", "REL-B", "REL-C", "REL-D"):
+            product = await client.post(
+                "/api/v1/products",
+                json={"name": sku, "sku": sku, "price": "10", "stock_quantity": 10},
+            )
+            product_ids.append(product.json()["id"])
+        a, b, c, d = product_ids
+        customer = await client.post(
+            "/api/v1/customers",
+            json={"email": "related@test.com", "first_name": "关联", "last_name": "推荐"},
+        )
+
+        async def place(*ids):
+            response = await client.post("/api/v1/orders", json={
+                "customer_id": customer.json()["id"],
+                "items": [{"product_id": pid, "quantity": 1} for pid in ids],
+            })
+            assert response.status_code == 201
+            return response.json()["id"]
+
+        await place(a, b, c)
+        cancelled = await place(a, d)
+        await client.patch(f"/api/v1/orders/{cancelled}", json={"status": "cancelled"})
+        await client.delete(f"/api/v1/products/{c}")
+        await recommendation_index.rebuild(db_session)
+
+        response = await client.get(f"/api/v1/products/{a}/related", params={"limit": 1})
+        assert response.status_code == 200
+        assert [item["product_id"] for item in response.json()] == [b]
+        assert response.json()[0]["confidence"] == 1.0
+
     @pytest.mark.asyncio
     async def test_get_product_not_found(self, client: AsyncClient):
         """测试获取不存在的产品"""
@@ -87,12 +232,12 @@ class TestProductEndpoints:
         product_id = create_response.json()["id"]
         
         # 更新产品
-        update_data = {"name": "更新后的产品", "price": 199.99}
+        update_data = {"name": "更新后的产品", "price": "199.99"}
         response = await client.patch(f"/api/v1/products/{product_id}", json=update_data)
         assert response.status_code == 200
         data = response.json()
         assert data["name"] == "更新后的产品"
-        assert data["price"] == 199.99
+        assert data["price"] == "199.99"
 
     @pytest.mark.asyncio
     async def test_delete_product(self, client: AsyncClient, sample_product_data):
@@ -118,6 +263,87 @@ class TestProductEndpoints:
         assert len(data) >= 1
 
 
+class TestProductBulkUpdate:
+    """批量更新接口测试"""
+
+    async def _create_products(self, client: AsyncClient, count: int, **fields) -> list[dict]:
+        products = []
+        for i in range(count):
+            response = await client.post("/api/v1/products", json={
+                "name": f"批量商品{i}",
+                "sku": f"BULK-{fields.get('category_id', 0)}-{i}",
+                "price": "100",
+                "cost_price": "50",
+                "stock_quantity": 10,
+                **fields,
+            })
+            products.append(response.json())
+        return products
+
+    @pytest.mark.asyncio
+    async def test_mixed_identifiers_across_batches(self, client: AsyncClient, monkeypatch):
+        """测试 id 与 SKU 混合、跨多个语句批次更新，并报告未找到的标识"""
+        from app.services import product_bulk
+
+        monkeypatch.setattr(product_bulk, "STATEMENT_BATCH_SIZE", 2)
+        products = await self._create_products(client, 5)
+        items = [
+            {"id": product["id"], "price": f"{200 + i}"} if i % 2 else
+            {"sku": product["sku"], "stock_quantity": 20 + i}
+            for i, product in enumerate(products)
+        ]
+        items += [{"id": 99999, "price": "1"}, {"sku": "NO-SUCH-SKU", "price": "1"}]
+
+        response = await client.post("/api/v1/products/bulk-update", json={"items": items})
+        assert response.status_code == 200
+        result = response.json()
+        assert result["updated"] == 5
+        assert result["not_found_ids"] == [99999]
+        assert result["not_found_skus"] == ["NO-SUCH-SKU"]
+
+        for i, product in enumerate(products):
+            stored = (await client.get(f"/api/v1/products/{product['id']}")).json()
+            if i % 2:
+                assert float(stored["price"]) == 200 + i
+                assert stored["stock_quantity"] == 10
+            else:
+                assert float(stored["price"]) == 100
+                assert stored["stock_quantity"] == 20 + i
+
+    @pytest.mark.asyncio
+    async def test_rules_then_explicit_values(self, client: AsyncClient):
+        """测试分类规则只作用于在售商品，且逐个指定的值优先于规则"""
+        category = await client.post("/api/v1/products/categories/", json={"name": "批量分类"})
+        category_id = category.json()["id"]
+        products = await self._create_products(client, 3, category_id=category_id)
+        await client.delete(f"/api/v1/products/{products[2]['id']}")
+
+        response = await client.post("/api/v1/products/bulk-update", json={
+            "rules": [{"category_id": category_id, "price_percent": "10", "cost_price_percent": "-20"}],
+            "items": [{"id": products[1]["id"], "price": "90"}],
+        })
+        assert response.status_code == 200
+        assert response.json()["updated"] == 2
+
+        first, second, inactive = [
+            (await client.get(f"/api/v1/products/{product['id']}")).json()
+            for product in products
+        ]
+        assert float(first["price"]) == 110
+        assert float(first["cost_price"]) == 40
+        assert float(second["price"]) == 90
+        assert float(second["cost_price"]) == 40
+        assert float(inactive["price"]) == 100
+
+    @pytest.mark.asyncio
+    async def test_item_needs_one_identifier(self, client: AsyncClient):
+        """测试每项必须且只能指定 id 或 SKU 之一"""
+        response = await client.post("/api/v1/products/bulk-update", json={
+            "items": [{"id": 1, "sku": "BOTH", "price": "1"}],
+        })
+        assert response.status_code == 422
+
+
 class TestOrderEndpoints:
     """订单管理接口测试"""
 
@@ -126,14 +352,15 @@ class TestOrderEndpoints:
         """测试获取空订单列表"""
         response = await client.get("/api/v1/orders")
         assert response.status_code == 200
-        assert response.json() == []
+        assert response.json()["items"] == []
+        assert response.json()["total"] == 0
 
     @pytest.mark.asyncio
     async def test_create_order(self, client: AsyncClient, sample_order_data):
         """测试创建订单"""
         response = await client.post("/api/v1/orders", json=sample_order_data)
-        # 可能因为缺少关联数据而失败，但接口应该响应
-        assert response.status_code in [201, 400, 404]
+        # 可能因为缺少关联数据或库存不足而失败，但接口应该响应
+        assert response.status_code in [201, 400, 404, 409]
 
     @pytest.mark.asyncio
     async def test_get_order_not_found(self, client: AsyncClient):
@@ -158,7 +385,8 @@ class TestCustomerEndpoints:
         response = await client.post("/api/v1/customers", json=sample_customer_data)
         assert response.status_code == 201
         data = response.json()
-        assert data["name"] == sample_customer_data["name"]
+        assert data["first_name"] == sample_customer_data["first_name"]
+        assert data["last_name"] == sample_customer_data["last_name"]
         assert data["email"] == sample_customer_data["email"]
 
     @pytest.mark.asyncio
@@ -173,6 +401,405 @@ class TestCustomerEndpoints:
         assert response.status_code == 200
         assert response.json()["id"] == customer_id
 
+    @pytest.mark.asyncio
+    async def test_email_normalized(self, client: AsyncClient):
+        """测试邮箱统一转为小写，与批量导入的冲突键一致"""
+        response = await client.post(
+            "/api/v1/customers",
+            json={"email": "Mixed.Case@Test.com", "first_name": "大小", "last_name": "写"},
+        )
+        assert response.status_code == 201
+        assert response.json()["email"] == "mixed.case@test.com"
+
+        duplicate = await client.post(
+            "/api/v1/customers",
+            json={"email": "mixed.case@test.com", "first_name": "大小", "last_name": "写"},
+        )
+        assert duplicate.status_code == 400
+
+        customer_id = response.json()["id"]
+        response = await client.patch(
+            f"/api/v1/customers/{customer_id}", json={"email": "New.Address@Test.com"}
+        )
+        assert response.json()["email"] == "new.address@test.com"
+
+    @pytest.mark.asyncio
+    async def test_import_customers_merge(self, client: AsyncClient):
+        """测试合并导入：已存在的邮箱计为合并，新邮箱计为插入"""
+        await client.post(
+            "/api/v1/customers",
+            json={"email": "old@test.com", "first_name": "旧", "last_name": "客户", "phone": "123"},
+        )
+        body = "\n".join([
+            '{"email": "Old@Test.com", "first_name": "新", "last_name": "名字"}',
+            '{"email": "new@test.com", "first_name": "新", "last_name": "客户"}',
+        ])
+        response = await client.post(
+            "/api/v1/customers/import", params={"on_conflict": "merge"}, content=body
+        )
+        assert response.status_code == 200
+        job = response.json()
+        assert job["rows_merged"] == 1
+        assert job["rows_inserted"] == 1
+
+        customers = {c["email"]: c for c in (await client.get("/api/v1/customers")).json()}
+        assert customers["old@test.com"]["first_name"] == "新"
+        assert customers["old@test.com"]["phone"] == "123"
+
+    @pytest.mark.asyncio
+    async def test_cohort_retention(self, client: AsyncClient):
+        """测试同时请求留存矩阵时快照只构建一次，当月注册计入当月队列"""
+        import asyncio
+
+        from app.services import cohorts
+
+        cohorts.cohort_cache.clear()
+        await client.post(
+            "/api/v1/customers",
+            json={"email": "cohort@test.com", "first_name": "队", "last_name": "列"},
+        )
+        builds = 0
+        build_snapshot = cohorts.build_snapshot
+
+        async def counting_build(*args):
+            nonlocal builds
+            builds += 1
+            return await build_snapshot(*args)
+
+        cohorts.build_snapshot = counting_build
+        try:
+            responses = await asyncio.gather(*[
+                client.get("/api/v1/customers/cohorts", params={"basis": "signup"})
+                for _ in range(3)
+            ])
+        finally:
+            cohorts.build_snapshot = build_snapshot
+            cohorts.cohort_cache.clear()
+
+        assert builds == 1
+        for response in responses:
+            assert response.status_code == 200
+            assert response.json()["cohorts"][-1]["customers"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stats_reconciliation(self, client: AsyncClient, db_session):
+        """测试对账只修复与订单聚合不一致的客户统计"""
+        from sqlalchemy import update
+
+        from app.models.customer import Customer
+        from app.services.customer_stats import reconcile_customer_stats
+
+        product = await client.post(
+            "/api/v1/products",
+            json={"name": "对账商品", "sku": "RECONCILE-001", "price": "10", "stock_quantity": 10},
+        )
+        customer_ids = []
+        for i in range(2):
+            customer = await client.post(
+                "/api/v1/customers",
+                json={"email": f"reconcile{i}@test.com", "first_name": "对账", "last_name": "测试"},
+            )
+            customer_ids.append(customer.json()["id"])
+            await client.post("/api/v1/orders", json={
+                "customer_id": customer_ids[-1],
+                "items": [{"product_id": product.json()["id"], "quantity": 1}],
+            })
+
+        await db_session.execute(
+            update(Customer).where(Customer.id == customer_ids[0]).values(orders_count=5)
+        )
+        await db_session.commit()
+
+        assert await reconcile_customer_stats(db_session, chunk_size=1) == 1
+        assert await reconcile_customer_stats(db_session) == 0
+        response = await client.get(f"/api/v1/customers/{customer_ids[0]}")
+        assert response.json()["orders_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_compute_segments(self, client: AsyncClient, db_session):
+        """测试分群计算写入有订单的客户，无订单的客户不计入"""
+        from app.services.customer_segments import compute_segments
+
+        product = await client.post(
+            "/api/v1/products",
+            json={"name": "分群商品", "sku": "SEGMENT-001", "price": "25", "stock_quantity": 10},
+        )
+        buyer = await client.post(
+            "/api/v1/customers",
+            json={"email": "buyer@test.com", "first_name": "分群", "last_name": "买家"},
+        )
+        await client.post(
+            "/api/v1/customers",
+            json={"email": "browser@test.com", "first_name": "分群", "last_name": "访客"},
+        )
+        order = await client.post("/api/v1/orders", json={
+            "customer_id": buyer.json()["id"],
+            "items": [{"product_id": product.json()["id"], "quantity": 2}],
+        })
+
+        assert await compute_segments(db_session) == 1
+        response = await client.get(f"/api/v1/customers/{buyer.json()['id']}/segment")
+        assert response.status_code == 200
+        assert response.json()["frequency"] == 1
+        assert float(response.json()["monetary"]) == float(order.json()["total_amount"])
+
+    @pytest.mark.asyncio
+    async def test_merge_customers(self, client: AsyncClient):
+        """测试合并客户：订单转移到目标客户、统计重算、源客户停用"""
+        from decimal import Decimal
+
+        product = await client.post(
+            "/api/v1/products",
+            json={"name": "合并商品", "sku": "MERGE-001", "price": "10", "stock_quantity": 10},
+        )
+        customer_ids = []
+        for i, orders in enumerate((1, 2)):
+            customer = await client.post(
+                "/api/v1/customers",
+                json={"email": f"merge{i}@test.com", "first_name": "合并", "last_name": "测试"},
+            )
+            customer_ids.append(customer.json()["id"])
+            for _ in range(orders):
+                await client.post("/api/v1/orders", json={
+                    "customer_id": customer_ids[-1],
+                    "items": [{"product_id": product.json()["id"], "quantity": 1}],
+                })
+        target_id, source_id = customer_ids
+        before = [
+            (await client.get(f"/api/v1/customers/{customer_id}")).json()
+            for customer_id in customer_ids
+        ]
+
+        response = await client.post("/api/v1/customers/merge", json={
+            "merges": [{"target_id": target_id, "source_ids": [source_id]}],
+        })
+        assert response.status_code == 200
+        assert response.json() == {"customers_merged": 1, "orders_moved": 2}
+
+        target = (await client.get(f"/api/v1/customers/{target_id}")).json()
+        assert target["orders_count"] == 3
+        assert Decimal(target["total_spent"]) == sum(Decimal(c["total_spent"]) for c in before)
+        history = (await client.get(f"/api/v1/customers/{target_id}/orders")).json()
+        assert len(history["orders"]) == 3
+
+        source = (await client.get(f"/api/v1/customers/{source_id}")).json()
+        assert source["is_active"] is False
+        assert source["orders_count"] == 0
+
+        response = await client.post("/api/v1/customers/merge", json={
+            "merges": [{"target_id": target_id, "source_ids": [source_id]}],
+        })
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_search_candidate_cap(self, client: AsyncClient, monkeypatch):
+        """测试候选集截断时优先保留精确匹配并拒绝越界的 skip"""
+        from app.core.config import settings
+
+        exact = await client.post(
+            "/api/v1/customers",
+            json={"email": "older@test.com", "first_name": "Capped", "last_name": "Search"},
+        )
+        for i in range(3):
+            await client.post(
+                "/api/v1/customers",
+                json={"email": f"cappedsearch{i}@test.com", "first_name": "New", "last_name": "Buyer"},
+            )
+        monkeypatch.setattr(settings, "CUSTOMER_SEARCH_MAX_CANDIDATES", 2)
+
+        response = await client.get("/api/v1/customers", params={"search": "cappedsearch"})
+        assert response.status_code == 200
+        assert response.headers["X-Search-Truncated"] == "true"
+        assert response.json()[0]["id"] == exact.json()["id"]
+        assert len(response.json()) == 2
+
+        response = await client.get("/api/v1/customers", params={"search": "cappedsearch", "skip": 2})
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_customer_orders(self, client: AsyncClient):
+        """测试客户订单历史（游标分页、订单明细与累计统计）"""
+        customer = await client.post(
+            "/api/v1/customers",
+            json={"email": "history@test.com", "first_name": "历史", "last_name": "订单"},
+        )
+        customer_id = customer.json()["id"]
+
+        response = await client.get(f"/api/v1/customers/{customer_id}/orders")
+        assert response.status_code == 200
+        assert response.json()["orders"] == []
+        assert response.json()["orders_count"] == 0
+
+        product = await client.post(
+            "/api/v1/products",
+            json={"name": "历史商品", "sku": "HISTORY-001", "price": "10", "stock_quantity": 100},
+        )
+        order_ids = []
+        for quantity in (1, 2, 3):
+            order = await client.post(
+                "/api/v1/orders",
+                json={
+                    "customer_id": customer_id,
+                    "items": [{"product_id": product.json()["id"], "quantity": quantity}],
+                },
+            )
+            order_ids.append(order.json()["id"])
+
+        first = await client.get(f"/api/v1/customers/{customer_id}/orders?limit=2")
+        data = first.json()
+        assert [order["id"] for order in data["orders"]] == order_ids[:0:-1]
+        assert data["orders"][0]["items"] is None
+        assert data["orders_count"] == 3
+        assert data["total_spent"] == "67.80"
+
+        second = await client.get(
+            f"/api/v1/customers/{customer_id}/orders",
+            params={"limit": 2, "cursor": first.headers["X-Next-Cursor"], "include_items": True},
+        )
+        data = second.json()
+        assert [order["id"] for order in data["orders"]] == order_ids[:1]
+        assert data["orders"][0]["items"][0]["quantity"] == 1
+        assert "X-Next-Cursor" not in second.headers
+
+        response = await client.get(f"/api/v1/customers/{customer_id}/orders?cursor=bad")
+        assert response.status_code == 400
+
+        response = await client.get("/api/v1/customers/99999/orders")
+        assert response.status_code == 404
+
+
+class TestOrderStock:
+    """订单库存测试"""
+
+    @pytest.mark.asyncio
+    async def test_order_stock(self, client: AsyncClient):
+        """测试下单扣减库存、库存不足返回 409、取消与恢复订单时归还与重新扣减"""
+        product = await client.post(
+            "/api/v1/products",
+            json={"name": "库存商品", "sku": "STOCK-001", "price": "10", "stock_quantity": 5},
+        )
+        product_id = product.json()["id"]
+        customer = await client.post(
+            "/api/v1/customers",
+            json={"email": "stock@test.com", "first_name": "库存", "last_name": "测试"},
+        )
+        order_data = {
+            "customer_id": customer.json()["id"],
+            "items": [{"product_id": product_id, "quantity": 3}],
+        }
+
+        async def stock():
+            response = await client.get(f"/api/v1/products/{product_id}")
+            return response.json()["stock_quantity"]
+
+        order = await client.post("/api/v1/orders", json=order_data)
+        assert order.status_code == 201
+        assert await stock() == 2
+
+        response = await client.post("/api/v1/orders", json=order_data)
+        assert response.status_code == 409
+        assert await stock() == 2
+
+        order_id = order.json()["id"]
+        response = await client.patch(f"/api/v1/orders/{order_id}", json={"status": "cancelled"})
+        assert response.status_code == 200
+        assert await stock() == 5
+
+        response = await client.patch(f"/api/v1/orders/{order_id}", json={"status": "pending"})
+        assert response.status_code == 200
+        assert await stock() == 2
+
+    @pytest.mark.asyncio
+    async def test_low_stock_feed(self, client: AsyncClient):
+        """测试低库存列表随下单、修改库存和取消订单更新，并按分类过滤"""
+        category = await client.post("/api/v1/products/categories/", json={"name": "低库存分类"})
+        category_id = category.json()["id"]
+        product = await client.post("/api/v1/products", json={
+            "name": "低库存商品",
+            "sku": "LOW-001",
+            "price": "10",
+            "stock_quantity": 8,
+            "low_stock_threshold": 5,
+            "category_id": category_id,
+        })
+        product_id = product.json()["id"]
+        customer = await client.post(
+            "/api/v1/customers",
+            json={"email": "lowstock@test.com", "first_name": "低", "last_name": "库存"},
+        )
+
+        async def feed(**params):
+            response = await client.get("/api/v1/products/low-stock", params=params)
+            assert response.status_code == 200
+            return [item["id"] for item in response.json()]
+
+        assert await feed() == []
+        order = await client.post("/api/v1/orders", json={
+            "customer_id": customer.json()["id"],
+            "items": [{"product_id": product_id, "quantity": 4}],
+        })
+        assert order.status_code == 201
+        assert await feed() == [product_id]
+        assert await feed(category_id=category_id) == [product_id]
+        assert await feed(category_id=0) == []
+
+        await client.patch(f"/api/v1/products/{product_id}", json={"stock_quantity": 2})
+        assert await feed() == [product_id]
+        await client.patch(f"/api/v1/products/{product_id}", json={"stock_quantity": 3})
+        await client.patch(f"/api/v1/orders/{order.json()['id']}", json={"status": "cancelled"})
+        assert await feed() == []
+
+
+class TestProductForecast:
+    """需求预测接口测试"""
+
+    @pytest.mark.asyncio
+    async def test_forecast_uses_current_stock(self, client: AsyncClient, db_session):
+        """测试预测结果按当前库存计算可售天数与补货标记"""
+        from datetime import datetime, timedelta
+
+        from sqlalchemy import update
+
+        from app.models.order import Order
+        from app.services.forecasting import compute_forecasts
+
+        product = await client.post(
+            "/api/v1/products",
+            json={"name": "预测商品", "sku": "FORECAST-001", "price": "10", "stock_quantity": 100},
+        )
+        product_id = product.json()["id"]
+        customer = await client.post(
+            "/api/v1/customers",
+            json={"email": "forecast@test.com", "first_name": "预测", "last_name": "测试"},
+        )
+        for _ in range(2):
+            await client.post("/api/v1/orders", json={
+                "customer_id": customer.json()["id"],
+                "items": [{"product_id": product_id, "quantity": 5}],
+            })
+        await db_session.execute(
+            update(Order).values(created_at=datetime.utcnow() - timedelta(days=1))
+        )
+        await db_session.commit()
+
+        response = await client.get(f"/api/v1/products/{product_id}/forecast")
+        assert response.status_code == 404
+
+        assert await compute_forecasts(db_session) == 1
+        forecast = (await client.get(f"/api/v1/products/{product_id}/forecast")).json()
+        assert forecast["stock_quantity"] == 90
+        assert forecast["daily_demand"] > 0
+        assert not forecast["needs_reorder"]
+        assert (await client.get("/api/v1/products/forecast/reorder")).json() == []
+
+        await client.patch(f"/api/v1/products/{product_id}", json={"stock_quantity": 0})
+        forecast = (await client.get(f"/api/v1/products/{product_id}/forecast")).json()
+        assert forecast["stock_quantity"] == 0
+        assert forecast["days_of_cover"] == 0
+        assert forecast["needs_reorder"]
+        reorder = (await client.get("/api/v1/products/forecast/reorder")).json()
+        assert [row["product_id"] for row in reorder] == [product_id]
+
 
 class TestDashboardEndpoints:
     """仪表盘接口测试"""
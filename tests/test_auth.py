@@ -5,9 +5,21 @@
 测试 JWT 认证、用户注册、登录等功能
 """
 
+import asyncio
+import time
+
 import pytest
 from httpx import AsyncClient
 
+from app.core.revocation import BloomFilter, RedisRevocationStore, RevocationStore
+from app.core.security import (
+    PasswordHashPool,
+    PasswordHashPoolFull,
+    create_access_token,
+    decode_token,
+    token_cache,
+)
+
 
 class TestAuthEndpoints:
     """认证接口测试"""
@@ -41,10 +53,10 @@ class TestAuthEndpoints:
         
         # 登录
         login_data = {
-            "email": sample_user_data["email"],
+            "username": sample_user_data["email"],
             "password": sample_user_data["password"],
         }
-        response = await client.post("/api/v1/auth/login", json=login_data)
+        response = await client.post("/api/v1/auth/login", data=login_data)
         
         if response.status_code == 200:
             data = response.json()
@@ -59,20 +71,20 @@ class TestAuthEndpoints:
         
         # 错误密码登录
         login_data = {
-            "email": sample_user_data["email"],
+            "username": sample_user_data["email"],
             "password": "wrongpassword",
         }
-        response = await client.post("/api/v1/auth/login", json=login_data)
+        response = await client.post("/api/v1/auth/login", data=login_data)
         assert response.status_code in [401, 400, 500]
 
     @pytest.mark.asyncio
     async def test_login_nonexistent_user(self, client: AsyncClient):
         """测试不存在用户登录"""
         login_data = {
-            "email": "nonexistent@test.com",
+            "username": "nonexistent@test.com",
             "password": "password123",
         }
-        response = await client.post("/api/v1/auth/login", json=login_data)
+        response = await client.post("/api/v1/auth/login", data=login_data)
         assert response.status_code in [401, 404, 500]
 
     @pytest.mark.asyncio
@@ -110,8 +122,8 @@ class TestTokenValidation:
         """测试有效 Token 访问受保护路由"""
         # 注册并登录
         await client.post("/api/v1/auth/register", json=sample_user_data)
-        login_response = await client.post("/api/v1/auth/login", json={
-            "email": sample_user_data["email"],
+        login_response = await client.post("/api/v1/auth/login", data={
+            "username": sample_user_data["email"],
             "password": sample_user_data["password"],
         })
         
@@ -122,6 +134,58 @@ class TestTokenValidation:
                 response = await client.get("/api/v1/dashboard", headers=headers)
                 assert response.status_code == 200
 
+    @pytest.mark.asyncio
+    async def test_logout_revokes_token(self, client: AsyncClient, sample_user_data):
+        """测试登出后旧 Token 立即失效"""
+        await client.post("/api/v1/auth/register", json=sample_user_data)
+        login_response = await client.post("/api/v1/auth/login", data={
+            "username": sample_user_data["email"],
+            "password": sample_user_data["password"],
+        })
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        assert (await client.get("/api/v1/auth/me", headers=headers)).status_code == 200
+        assert (await client.post("/api/v1/auth/logout", headers=headers)).status_code == 204
+        assert (await client.get("/api/v1/auth/me", headers=headers)).status_code == 401
+
+    async def _login(self, client: AsyncClient, user_data: dict) -> dict:
+        response = await client.post("/api/v1/auth/login", data={
+            "username": user_data["email"],
+            "password": user_data["password"],
+        })
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    @pytest.mark.asyncio
+    async def test_logout_keeps_other_sessions(self, client: AsyncClient, sample_user_data):
+        """测试登出只撤销当前会话，其他会话不受影响"""
+        await client.post("/api/v1/auth/register", json=sample_user_data)
+        first = await self._login(client, sample_user_data)
+        second = await self._login(client, sample_user_data)
+
+        assert (await client.post("/api/v1/auth/logout", headers=first)).status_code == 204
+        assert (await client.get("/api/v1/auth/me", headers=first)).status_code == 401
+        assert (await client.get("/api/v1/auth/me", headers=second)).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_peer_deactivation_is_immediate(
+        self, client: AsyncClient, db_session, sample_user_data
+    ):
+        """测试未配置失效通道时，其他进程停用用户后 Token 立即失效"""
+        from sqlalchemy import update
+
+        from app.models.user import User
+
+        await client.post("/api/v1/auth/register", json=sample_user_data)
+        headers = await self._login(client, sample_user_data)
+        assert (await client.get("/api/v1/auth/me", headers=headers)).status_code == 200
+
+        # 模拟另一个 worker 直接修改用户行，本进程的缓存收不到失效通知
+        await db_session.execute(
+            update(User).where(User.email == sample_user_data["email"]).values(is_active=False)
+        )
+        await db_session.commit()
+        assert (await client.get("/api/v1/auth/me", headers=headers)).status_code == 401
+
 
 class TestPasswordSecurity:
     """密码安全测试"""
@@ -147,3 +211,205 @@ class TestPasswordSecurity:
             data = response.json()
             assert "password" not in data
             assert "hashed_password" not in data
+
+
+class TestPasswordHashPool:
+    """密码哈希线程池测试"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self):
+        """测试在线程池中哈希与校验，并记录校验耗时"""
+        pool = PasswordHashPool(max_workers=2, max_pending=4)
+        hashed = await pool.hash("secret123")
+
+        assert await pool.verify("secret123", hashed)
+        assert not await pool.verify("wrong", hashed)
+        assert not await pool.reject()
+        assert pool.stats()["completed"] == 3
+        assert pool.stats()["verify_ms"] > 0
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """测试排队已满时拒绝新的请求"""
+        pool = PasswordHashPool(max_workers=1, max_pending=0)
+        with pytest.raises(PasswordHashPoolFull):
+            await pool.hash("secret123")
+        assert pool.stats()["rejected"] == 1
+
+
+class TestTokenCache:
+    """已验证 Token 缓存测试"""
+
+    def test_cached_claims(self):
+        """测试重复解码命中缓存且返回副本"""
+        token = create_access_token(7, epoch=3)
+        hits = token_cache.hits
+
+        first = decode_token(token)
+        first["sub"] = "tampered"
+        second = decode_token(token)
+
+        assert second["sub"] == "7"
+        assert second["ep"] == 3
+        assert token_cache.hits == hits + 1
+
+    def test_invalid_signature_not_cached(self):
+        """测试签名无效的 Token 不会被缓存"""
+        token = create_access_token(7)
+        forged = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+        size = token_cache.stats()["size"]
+
+        assert decode_token(forged) is None
+        assert token_cache.stats()["size"] == size
+
+
+class TestRevocationStore:
+    """Token 吊销存储测试"""
+
+    def test_bloom_filter(self):
+        """测试布隆过滤器无漏判且误判率受控"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+
+        assert all(f"revoked-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+    @pytest.mark.asyncio
+    async def test_revoke_once(self):
+        """测试同一 ID 只能吊销一次（用于检测刷新 Token 重放）"""
+        store = RevocationStore(capacity=100, error_rate=0.01)
+        expires_at = time.time() + 60
+
+        assert await store.revoke("jti-1", expires_at)
+        assert not await store.revoke("jti-1", expires_at)
+        assert await store.is_revoked("jti-1")
+        assert not await store.is_revoked("jti-2")
+
+    @pytest.mark.asyncio
+    async def test_sync_drops_expired(self):
+        """测试同步时清理过期 ID"""
+        store = RevocationStore(capacity=100, error_rate=0.01)
+        await store.revoke("old", time.time() - 1)
+        await store.revoke("live", time.time() + 60)
+        await store.sync()
+
+        assert store.stats()["revoked"] == 1
+        assert not await store.is_revoked("old")
+        assert await store.is_revoked("live")
+
+
+class TestRedisRevocationStore:
+    """Redis Token 吊销存储测试（多个 worker 共享同一个 fakeredis 服务器）"""
+
+    @pytest.fixture
+    def server(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.FakeServer()
+
+    async def _store(self, server):
+        import fakeredis
+
+        store = RedisRevocationStore(
+            redis_url="redis://unused", prefix="revoked:", capacity=100, error_rate=0.01
+        )
+        store._connect = lambda: fakeredis.FakeAsyncRedis(server=server)
+        await store.start()
+        store._subscription.poll_interval = 0.01
+        await _wait_for(lambda: store.subscribed)
+        return store
+
+    @pytest.mark.asyncio
+    async def test_peer_revocation_broadcast(self, server):
+        """测试吊销通过广播进入其他 worker 的过滤器，未吊销的 Token 不访问 Redis"""
+        first, second = await self._store(server), await self._store(server)
+
+        assert await first.revoke("sid-1", time.time() + 60)
+        await _wait_for(lambda: "sid-1" in second._filter)
+        assert await second.is_revoked("sid-1")
+        assert not await second.is_revoked("sid-2")
+        assert second.stats()["lookups"] == 1
+        await first.stop()
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_reuse_detected_across_workers(self, server):
+        """测试刷新 Token 在另一个 worker 上重放时被识别"""
+        first, second = await self._store(server), await self._store(server)
+        expires_at = time.time() + 60
+
+        assert await first.revoke("jti-1", expires_at)
+        assert not await second.revoke("jti-1", expires_at)
+        await first.stop()
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back(self, server):
+        """测试 Redis 出错时使用本地存储，恢复后写回 Redis"""
+        from redis.exceptions import ConnectionError
+
+        store = await self._store(server)
+        client = store._redis
+
+        class Broken:
+            async def exists(self, *args):
+                raise ConnectionError("down")
+
+            async def set(self, *args, **kwargs):
+                raise ConnectionError("down")
+
+        store._redis = Broken()
+        assert await store.revoke("sid-1", time.time() + 60)
+        assert await store.is_revoked("sid-1")
+        assert store.stats()["unsynced"] == 1
+
+        store._redis = client
+        store._retry_at = 0.0
+        await store.sync()
+        assert store.stats()["unsynced"] == 0
+        assert await client.exists("revoked:sid-1")
+        await store.stop()
+
+
+class TestRedisSubscription:
+    """Redis 订阅断线重连测试"""
+
+    @pytest.mark.asyncio
+    async def test_reconnects_with_backoff(self):
+        """测试连接失败时标记为未连接，并按退避重连"""
+        fakeredis = pytest.importorskip("fakeredis")
+        from redis.exceptions import ConnectionError
+
+        from app.core.pubsub import RedisSubscription
+
+        server = fakeredis.FakeServer()
+        server.connected = False
+        received = []
+        subscription = RedisSubscription(
+            "test",
+            lambda: fakeredis.FakeAsyncRedis(server=server),
+            "events",
+            on_message=received.append,
+            retry_min=0.01,
+            poll_interval=0.01,
+        )
+        subscription.start()
+        await _wait_for(lambda: subscription.reconnects > 0)
+        assert not subscription.connected
+        await subscription.publish("queued")
+
+        server.connected = True
+        await _wait_for(lambda: received)
+        assert subscription.connected
+        assert received == [b"queued"]
+        await subscription.stop()
+        assert not subscription.connected
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
@@ -0,0 +1,164 @@
+"""
+缓存测试
+========
+
+测试进程内 TTL/LRU 缓存与失效通道
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import TTLCache, InvalidationChannel
+
+
+class TestTTLCache:
+    """TTL/LRU 缓存测试"""
+
+    def test_hit_and_miss(self):
+        """测试命中与未命中计数"""
+        cache = TTLCache(max_size=10, ttl=60)
+        assert cache.get(1) is None
+        cache.set(1, b"payload")
+        assert cache.get(1) == b"payload"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        assert cache.get(2) is None
+        assert cache.get(1) == "a"
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """测试条目过期"""
+        cache = TTLCache(max_size=10, ttl=-1)
+        cache.set(1, "a")
+        assert cache.get(1) is None
+
+    def test_per_entry_ttl(self):
+        """测试单个条目覆盖默认 TTL"""
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set(1, "a", ttl=-1)
+        cache.set(2, "b")
+        assert cache.get(1) is None
+        assert cache.get(2) == "b"
+
+    def test_stale_fill_is_discarded(self):
+        """测试读取期间发生失效时不回填旧数据"""
+        cache = TTLCache(max_size=10, ttl=60)
+        generation = cache.generation
+        cache.invalidate(1)
+        cache.set(1, "stale", generation)
+        assert cache.get(1) is None
+
+
+class TestInvalidationChannel:
+    """失效通道测试"""
+
+    @pytest.mark.asyncio
+    async def test_local_invalidation(self):
+        """测试未配置 Redis 时本地失效"""
+        cache = TTLCache(max_size=10, ttl=60)
+        channel = InvalidationChannel(redis_url="", channel="")
+        channel.register("product", cache)
+        cache.set(1, "a")
+        cache.set(2, "b")
+
+        await channel.invalidate("product", [1])
+        assert cache.get(1) is None
+        assert cache.get(2) == "b"
+
+        await channel.invalidate("product")
+        assert cache.get(2) is None
+
+    @pytest.mark.asyncio
+    async def test_peer_invalidation_and_reconnect(self):
+        """测试跨 worker 失效、断线时 connected 为 False、重连后清空本地缓存"""
+        fakeredis = pytest.importorskip("fakeredis")
+
+        server = fakeredis.FakeServer()
+        caches, channels = [], []
+        for _ in range(2):
+            cache = TTLCache(max_size=10, ttl=60)
+            channel = InvalidationChannel(redis_url="", channel="invalidate")
+            channel._connect = lambda: fakeredis.FakeAsyncRedis(server=server)
+            channel.register("product", cache)
+            await channel.start()
+            channel._subscription.poll_interval = 0.01
+            channel._subscription.retry_min = 0.01
+            caches.append(cache)
+            channels.append(channel)
+        await _wait_for(lambda: all(channel.connected for channel in channels))
+
+        caches[1].set(1, "a")
+        await channels[0].invalidate("product", [1])
+        await _wait_for(lambda: caches[1].get(1) is None)
+
+        server.connected = False
+        await _wait_for(lambda: not channels[1].connected)
+        caches[1].set(2, "b")
+        server.connected = True
+        await _wait_for(lambda: channels[1].connected)
+        assert caches[1].get(2) is None
+
+        for channel in channels:
+            await channel.stop()
+        assert not channels[0].connected
+
+    @pytest.mark.asyncio
+    async def test_category_version_bump(self):
+        """测试分类缓存通过失效通道递增版本号"""
+        from app.services.category_cache import category_cache, invalidate_categories
+
+        version = category_cache.version
+        await invalidate_categories()
+        assert category_cache.version == version + 1
+
+    @pytest.mark.asyncio
+    async def test_category_ttl_reload(self):
+        """测试未收到失效通知时分类缓存按 TTL 重新加载"""
+        from app.services.category_cache import CategoryCache
+
+        queries = []
+
+        async def execute(statement):
+            queries.append(statement)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=list))
+
+        db = SimpleNamespace(execute=execute)
+        fresh = CategoryCache(ttl=60)
+        await fresh.load(db)
+        await fresh.load(db)
+        assert len(queries) == 1
+
+        expired = CategoryCache(ttl=0)
+        await expired.load(db)
+        await expired.load(db)
+        assert len(queries) == 3
+
+    @pytest.mark.asyncio
+    async def test_principal_invalidation(self):
+        """测试用户变更后主体缓存失效"""
+        from app.services.principal_cache import invalidate_principal, principal_cache
+
+        principal_cache.set(42, "principal")
+        await invalidate_principal(42)
+        assert principal_cache.get(42) is None
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
@@ -15,26 +15,25 @@ class TestProductModel:
 
     def test_product_creation(self):
         """测试产品模型创建"""
-        from backend.app.models.product import Product
+        from app.models.product import Product
         
         product = Product(
             name="测试产品",
             slug="test-product",
             sku="TEST-001",
             description="测试描述",
-            price=99.99,
-            stock=100,
+            price=Decimal("99.99"),
+            stock_quantity=100,
         )
         
         assert product.name == "测试产品"
         assert product.sku == "TEST-001"
-        assert product.price == 99.99
-        assert product.stock == 100
-        assert product.is_active == True
+        assert product.price == Decimal("99.99")
+        assert product.stock_quantity == 100
 
     def test_product_default_values(self):
         """测试产品默认值"""
-        from backend.app.models.product import Product
+        from app.models.product import Product
         
         product = Product(
             name="测试",
@@ -43,12 +42,15 @@ class TestProductModel:
             price=10.0,
         )
         
-        assert product.is_active == True
-        assert product.stock == 0 or product.stock is None
+        # 默认值在写入数据库时生效
+        columns = Product.__table__.c
+        assert columns.is_active.default.arg is True
+        assert columns.stock_quantity.default.arg == 0
+        assert columns.is_low_stock.default.arg is False
 
     def test_product_category_relationship(self):
         """测试产品分类关系"""
-        from backend.app.models.product import Product, ProductCategory
+        from app.models.product import Product, ProductCategory
         
         category = ProductCategory(
             name="电子产品",
@@ -71,31 +73,34 @@ class TestCustomerModel:
 
     def test_customer_creation(self):
         """测试客户模型创建"""
-        from backend.app.models.customer import Customer
+        from app.models.customer import Customer
         
         customer = Customer(
-            name="张三",
+            first_name="三",
+            last_name="张",
             email="zhangsan@test.com",
             phone="13800138000",
         )
         
-        assert customer.name == "张三"
+        assert customer.full_name == "三 张"
         assert customer.email == "zhangsan@test.com"
 
     def test_customer_vip_levels(self):
         """测试客户 VIP 等级"""
-        from backend.app.models.customer import Customer
+        from app.models.customer import Customer
         
         # 普通客户
         customer1 = Customer(
-            name="普通客户",
+            first_name="普通",
+            last_name="客户",
             email="normal@test.com",
             total_spent=500,
         )
         
         # VIP 客户
         customer2 = Customer(
-            name="VIP客户",
+            first_name="VIP",
+            last_name="客户",
             email="vip@test.com",
             total_spent=10000,
         )
@@ -108,7 +113,7 @@ class TestOrderModel:
 
     def test_order_creation(self):
         """测试订单模型创建"""
-        from backend.app.models.order import Order
+        from app.models.order import Order
         
         order = Order(
             order_number="ORD-001",
@@ -122,32 +127,34 @@ class TestOrderModel:
 
     def test_order_status_values(self):
         """测试订单状态值"""
-        valid_statuses = ["pending", "paid", "processing", "shipped", "delivered", "cancelled"]
+        valid_statuses = ["pending", "processing", "shipped", "delivered", "cancelled", "refunded"]
         
-        from backend.app.models.order import Order
+        from app.models.order import Order, OrderStatus
         
         for status in valid_statuses:
             order = Order(
                 order_number=f"ORD-{status}",
                 customer_id=1,
                 total_amount=100,
-                status=status,
+                status=OrderStatus(status),
             )
             assert order.status == status
 
     def test_order_item_creation(self):
         """测试订单项模型创建"""
-        from backend.app.models.order import OrderItem
+        from app.models.order import OrderItem
         
         item = OrderItem(
             order_id=1,
             product_id=1,
+            product_name="测试产品",
             quantity=2,
-            unit_price=99.99,
+            unit_price=Decimal("99.99"),
+            total_price=Decimal("199.98"),
         )
         
         assert item.quantity == 2
-        assert item.unit_price == 99.99
+        assert item.unit_price == Decimal("99.99")
 
 
 class TestUserModel:
@@ -155,7 +162,7 @@ class TestUserModel:
 
     def test_user_creation(self):
         """测试用户模型创建"""
-        from backend.app.models.user import User
+        from app.models.user import User
         
         user = User(
             email="admin@test.com",
@@ -168,14 +175,12 @@ class TestUserModel:
 
     def test_user_default_active(self):
         """测试用户默认激活状态"""
-        from backend.app.models.user import User
+        from app.models.user import User
         
-        user = User(
-            email="test@test.com",
-            hashed_password="hash",
-        )
-        
-        assert user.is_active == True
+        # 默认值在写入数据库时生效
+        columns = User.__table__.c
+        assert columns.is_active.default.arg is True
+        assert columns.is_superuser.default.arg is False
 
 
 class TestModelTimestamps:
@@ -183,7 +188,7 @@ class TestModelTimestamps:
 
     def test_created_at_field(self):
         """测试 created_at 字段"""
-        from backend.app.models.product import Product
+        from app.models.product import Product
         
         product = Product(
             name="测试",
@@ -197,7 +202,7 @@ class TestModelTimestamps:
 
     def test_updated_at_field(self):
         """测试 updated_at 字段"""
-        from backend.app.models.product import Product
+        from app.models.product import Product
         
         product = Product(
             name="测试",
@@ -215,7 +220,7 @@ class TestSchemaValidation:
 
     def test_product_schema_validation(self):
         """测试产品 Schema 验证"""
-        from backend.app.schemas.product import ProductCreate
+        from app.schemas.product import ProductCreate
         
         # 有效数据
         valid_data = {
@@ -229,7 +234,7 @@ class TestSchemaValidation:
 
     def test_product_schema_price_validation(self):
         """测试产品价格验证"""
-        from backend.app.schemas.product import ProductCreate
+        from app.schemas.product import ProductCreate
         
         # 负价格应该无效
         try:
@@ -243,13 +248,26 @@ class TestSchemaValidation:
         except ValueError:
             pass  # 验证正常工作
 
+    def test_product_bulk_item_identifier(self):
+        """测试批量更新条目必须且只能指定 id 或 sku 之一"""
+        from app.schemas.product import ProductBulkItem
+
+        assert ProductBulkItem(id=1, price=10).id == 1
+        assert ProductBulkItem(sku="TEST-001", stock_quantity=5).sku == "TEST-001"
+
+        with pytest.raises(ValueError):
+            ProductBulkItem(price=10)
+        with pytest.raises(ValueError):
+            ProductBulkItem(id=1, sku="TEST-001")
+
     def test_customer_schema_email_validation(self):
         """测试客户邮箱验证"""
-        from backend.app.schemas.customer import CustomerCreate
+        from app.schemas.customer import CustomerCreate
         
         # 有效邮箱
         valid_data = {
-            "name": "张三",
+            "first_name": "三",
+            "last_name": "张",
             "email": "zhangsan@test.com",
         }
         
@@ -258,7 +276,7 @@ class TestSchemaValidation:
 
     def test_order_schema_validation(self):
         """测试订单 Schema 验证"""
-        from backend.app.schemas.order import OrderCreate
+        from app.schemas.order import OrderCreate
         
         valid_data = {
             "customer_id": 1,
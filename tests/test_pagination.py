@@ -0,0 +1,112 @@
+"""
+分页测试
+========
+
+测试游标分页编码以及列表查询的执行计划
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.core.database import Base
+from app.core.pagination import decode_cursor, encode_cursor, keyset_paginate
+from app.models import Customer, Order, Product
+
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    """创建仅用于 EXPLAIN 的同步 SQLite 引擎"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def explain(engine, query) -> str:
+    compiled = query.compile(dialect=engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+        return "\n".join(row[3] for row in rows)
+
+
+class TestCursor:
+    """游标编码测试"""
+
+    def test_round_trip(self):
+        """测试游标编码与解码"""
+        created_at = datetime(2024, 12, 19, 17, 30, 0, 123456)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_invalid_cursor(self):
+        """测试无效游标"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestListingQueryPlans:
+    """列表查询执行计划测试：应走复合索引范围扫描且无需排序"""
+
+    cursor = encode_cursor(datetime(2024, 12, 19), 100)
+
+    def test_product_listing(self, plan_engine):
+        """测试产品列表使用 (is_active, created_at, id) 索引"""
+        query = select(Product).where(Product.is_active == True)
+        plan = explain(plan_engine, keyset_paginate(query, Product, self.cursor, 20))
+
+        assert "USING INDEX ix_products_active_created" in plan
+        assert "created_at<?" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_product_listing_by_category(self, plan_engine):
+        """测试按分类的产品列表使用 (category_id, is_active, created_at) 索引"""
+        query = (
+            select(Product)
+            .where(Product.is_active == True)
+            .where(Product.category_id == 1)
+        )
+        plan = explain(plan_engine, keyset_paginate(query, Product, self.cursor, 20))
+
+        assert "USING INDEX ix_products_category_active_created" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_customer_listing(self, plan_engine):
+        """测试客户列表使用 (is_active, created_at, id) 索引"""
+        query = select(Customer).where(Customer.is_active == True)
+        plan = explain(plan_engine, keyset_paginate(query, Customer, self.cursor, 20))
+
+        assert "USING INDEX ix_customers_active_created" in plan
+        assert "created_at<?" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_customer_keys_index_only(self, plan_engine):
+        """测试仅取键列时为覆盖索引扫描"""
+        query = select(Customer.id, Customer.created_at).where(Customer.is_active == True)
+        plan = explain(plan_engine, keyset_paginate(query, Customer, self.cursor, 20))
+
+        assert "COVERING INDEX ix_customers_active_created" in plan
+
+    def test_customer_listing_by_lifetime_value(self, plan_engine):
+        """测试按消费总额排序使用 (is_active, total_spent, id) 索引"""
+        query = (
+            select(Customer)
+            .where(Customer.is_active == True)
+            .order_by(Customer.total_spent.desc(), Customer.id.desc())
+            .limit(20)
+        )
+        plan = explain(plan_engine, query)
+
+        assert "USING INDEX ix_customers_active_total_spent" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_customer_order_history(self, plan_engine):
+        """测试客户订单历史使用 (customer_id, created_at, id) 索引"""
+        query = select(Order).where(Order.customer_id == 1)
+        plan = explain(plan_engine, keyset_paginate(query, Order, self.cursor, 20))
+
+        assert "USING INDEX ix_orders_customer_created" in plan
+        assert "customer_id=?" in plan
+        assert "TEMP B-TREE" not in plan
+
@@ -0,0 +1,234 @@
+"""
+限流测试
+========
+
+测试 GCRA 限流器的配额、突发与空闲淘汰，基于 Redis 的分布式限流，
+按路由模板匹配的限流策略，以及纯 ASGI 中间件
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.rate_limit_policy import (
+    UNMATCHED,
+    RateLimitPolicy,
+    compile_policies,
+)
+from app.middleware.rate_limiter import (
+    InMemoryRateLimiter,
+    RateLimiterMiddleware,
+    RedisRateLimiter,
+)
+from app.middleware.security import SecurityHeadersMiddleware
+
+
+class TestInMemoryRateLimiter:
+    """进程内限流器测试"""
+
+    def test_burst_then_reject(self):
+        """测试窗口内允许 limit 次突发请求后拒绝"""
+        limiter = InMemoryRateLimiter(limit=5, window=60)
+        results = [limiter.is_allowed("client") for _ in range(6)]
+
+        assert [allowed for allowed, _, _ in results] == [True] * 5 + [False]
+        assert [remaining for _, remaining, _ in results] == [4, 3, 2, 1, 0, 0]
+        assert limiter.is_allowed("other")[0]
+
+    def test_cost_weighted(self):
+        """测试按权重扣减配额"""
+        limiter = InMemoryRateLimiter(limit=10, window=60)
+        assert limiter.is_allowed("client", cost=8)[:2] == (True, 2)
+        assert not limiter.is_allowed("client", cost=3)[0]
+        assert limiter.is_allowed("client", cost=2)[0]
+
+    def test_max_keys(self):
+        """测试超过容量时淘汰最久未访问的客户端"""
+        limiter = InMemoryRateLimiter(limit=5, window=60, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.is_allowed(key)
+
+        assert limiter.stats()["keys"] == 2
+        assert limiter.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_evict_idle(self):
+        """测试配额已完全恢复的客户端被清理"""
+        limiter = InMemoryRateLimiter(limit=5, window=60)
+        limiter.is_allowed("active")
+        limiter._tat["idle"] = 0.0
+
+        await limiter.evict_idle()
+        assert list(limiter._tat) == ["active"]
+
+
+class _UnreachableRedis:
+    """模拟不可达的 Redis"""
+
+    def register_script(self, script):
+        async def call(*args, **kwargs):
+            from redis.exceptions import ConnectionError
+
+            raise ConnectionError("unreachable")
+
+        return call
+
+
+class TestRedisRateLimiter:
+    """Redis 分布式限流测试（使用进程内 fakeredis 执行 Lua 脚本）"""
+
+    @pytest.fixture
+    def redis(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        return fakeredis.FakeAsyncRedis()
+
+    def _limiter(self, client):
+        return RedisRateLimiter(
+            client, limit=5, window=60, fallback=InMemoryRateLimiter(limit=5, window=60)
+        )
+
+    @pytest.mark.asyncio
+    async def test_shared_between_workers(self, redis):
+        """测试多个工作进程共享同一配额"""
+        first, second = self._limiter(redis), self._limiter(redis)
+        results = [await limiter.check("client") for limiter in (first, second) * 3]
+
+        assert [allowed for allowed, _, _ in results] == [True] * 5 + [False]
+        assert [remaining for _, remaining, _ in results[:5]] == [4, 3, 2, 1, 0]
+
+    @pytest.mark.asyncio
+    async def test_key_expires_when_idle(self, redis):
+        """测试键在配额恢复时自动过期"""
+        limiter = self._limiter(redis)
+        await limiter.check("client", cost=2)
+
+        ttl = await redis.pttl("ratelimit:client")
+        assert 0 < ttl <= 24000
+
+    @pytest.mark.asyncio
+    async def test_check_many_pipelined(self, redis):
+        """测试批量检查在一次往返内按顺序执行"""
+        limiter = self._limiter(redis)
+        results = await limiter.check_many([("a", 1), ("a", 3), ("a", 2), ("b", 1)])
+
+        assert [allowed for allowed, _, _ in results] == [True, True, False, True]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_unreachable(self):
+        """测试 Redis 不可达时退回本地限流"""
+        pytest.importorskip("redis")
+        limiter = self._limiter(_UnreachableRedis())
+        results = [await limiter.check("client") for _ in range(6)]
+
+        assert [allowed for allowed, _, _ in results] == [True] * 5 + [False]
+        assert limiter.stats()["redis_available"] is False
+        assert limiter.stats()["fallbacks"] == 6
+
+
+class TestRouteMatcher:
+    """限流策略路由匹配测试"""
+
+    POLICIES = (
+        RateLimitPolicy("health", "/health/*", limit=None),
+        RateLimitPolicy("login", "/auth/login", limit=5, methods=frozenset({"POST"})),
+        RateLimitPolicy("reads", "*", limit=600, methods=frozenset({"GET"})),
+        RateLimitPolicy("default", "*", limit=100),
+    )
+
+    def _matcher(self):
+        routes = [
+            SimpleNamespace(path="/orders/{order_id}", methods={"GET", "PATCH"}),
+            SimpleNamespace(path="/customers/segments", methods={"GET"}),
+            SimpleNamespace(path="/customers/{customer_id}", methods={"GET"}),
+            SimpleNamespace(path="/customers/{customer_id}/orders", methods={"GET"}),
+            SimpleNamespace(path="/auth/login", methods={"POST"}),
+            SimpleNamespace(path="/health/live", methods={"GET"}),
+            SimpleNamespace(path="/files/{name:path}", methods={"GET"}),
+            SimpleNamespace(path="/static", app=object()),
+        ]
+        return compile_policies(routes, self.POLICIES)
+
+    def _match(self, method, path):
+        template, policy = self._matcher().match(method, path)
+        return template, policy.name
+
+    def test_path_parameters_share_template(self):
+        """测试不同 ID 归入同一路由模板"""
+        assert self._match("GET", "/orders/1") == ("/orders/{order_id}", "reads")
+        assert self._match("GET", "/orders/2") == ("/orders/{order_id}", "reads")
+        assert self._match("PATCH", "/orders/2") == ("/orders/{order_id}", "default")
+
+    def test_static_segment_precedence(self):
+        """测试静态路径优先于参数，并在死路时回溯"""
+        assert self._match("GET", "/customers/segments") == ("/customers/segments", "reads")
+        assert self._match("GET", "/customers/7") == ("/customers/{customer_id}", "reads")
+        assert self._match("GET", "/customers/7/orders") == (
+            "/customers/{customer_id}/orders", "reads",
+        )
+        assert self._match("GET", "/files/a/b.txt") == ("/files/{name:path}", "reads")
+
+    def test_policy_selection(self):
+        """测试按方法与模式选择第一条匹配的策略"""
+        assert self._match("POST", "/auth/login") == ("/auth/login", "login")
+        assert self._match("GET", "/health/live") == ("/health/live", "health")
+
+    def test_unmatched_paths(self):
+        """测试未知路径归入同一个桶"""
+        assert self._match("GET", "/random/123") == (UNMATCHED, "reads")
+        assert self._match("DELETE", "/orders/1") == (UNMATCHED, "default")
+
+
+class TestMiddlewareStack:
+    """纯 ASGI 中间件测试"""
+
+    def _app(self):
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        @app.get("/stream")
+        async def stream():
+            async def chunks():
+                for i in range(3):
+                    yield f"{i}\n".encode()
+
+            return StreamingResponse(chunks(), media_type="text/plain")
+
+        # 使用未在全局策略表中出现的策略名，避免与其他测试共享限流状态
+        policies = (RateLimitPolicy("reads", "*", limit=2),)
+        app.add_middleware(RateLimiterMiddleware, policies=policies)
+        app.add_middleware(SecurityHeadersMiddleware)
+        return app
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_by_template(self):
+        """测试不同 ID 共享配额，超限返回 429 且带安全响应头"""
+        transport = ASGITransport(app=self._app(), client=("10.9.8.7", 1234))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get("/items/1")
+            second = await client.get("/items/2")
+            third = await client.get("/items/3")
+
+        assert first.status_code == second.status_code == 200
+        assert first.headers["x-ratelimit-remaining"] == "1"
+        assert first.headers["x-frame-options"] == "DENY"
+        assert third.status_code == 429
+        assert third.json() == {"detail": "Rate limit exceeded"}
+        assert int(third.headers["retry-after"]) >= 1
+        assert third.headers["x-content-type-options"] == "nosniff"
+
+    @pytest.mark.asyncio
+    async def test_streaming_response(self):
+        """测试流式响应原样透传"""
+        transport = ASGITransport(app=self._app(), client=("10.9.8.6", 1234))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/stream")
+
+        assert response.text == "0\n1\n2\n"
+        assert response.headers["content-security-policy"].startswith("default-src")
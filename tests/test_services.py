@@ -0,0 +1,295 @@
+"""
+业务服务测试
+============
+
+测试 app/services 中不依赖数据库的业务逻辑
+"""
+
+import numpy as np
+import pytest
+
+from app.models.customer import Customer
+from app.services.cohorts import accumulate_retention, month_index
+from app.services.customer_dedup import (
+    build_profile,
+    candidate_pairs,
+    scan_duplicates,
+    score_pair,
+)
+from app.services.customer_import import add_to_batch
+from app.services.customer_search import customer_tokens, query_grams, words
+from app.services.customer_segments import (
+    OrderAccumulator,
+    assign_segments,
+    quintile_scores,
+    score_customers,
+)
+from app.services.forecasting import forecast_demand, reorder_metrics
+from app.services.imports import (
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+)
+from app.services.recommendations import CooccurrenceIndex
+
+
+async def _stream(body: bytes, size: int = 5):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+async def _collect(records):
+    return [record async for record in records]
+
+
+class TestProductImportParsing:
+    """批量导入解析测试"""
+
+    @pytest.mark.asyncio
+    async def test_csv_records(self):
+        """测试 CSV 解析（跨行引号字段、空单元格）"""
+        body = 'name,sku,price,description\r\n手机,A1,9.99,"第一行\n第二行"\r\n壳,B2,1,\r\n'
+        records = await _collect(iter_csv_records(iter_lines(_stream(body.encode()))))
+
+        assert records == [
+            {"name": "手机", "sku": "A1", "price": "9.99", "description": "第一行\n第二行"},
+            {"name": "壳", "sku": "B2", "price": "1"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_ndjson_records(self):
+        """测试 NDJSON 解析与无效行"""
+        body = b'{"sku": "A1"}\n\n{bad\n{"sku": "B2"}'
+        records = await _collect(iter_ndjson_records(iter_lines(_stream(body))))
+
+        assert records[0] == {"sku": "A1"}
+        assert isinstance(records[1], ValueError)
+        assert records[2] == {"sku": "B2"}
+
+    @pytest.mark.asyncio
+    async def test_invalid_utf8_line(self):
+        """测试无效 UTF-8 只影响所在行"""
+        body = "\ufeffname,sku\n".encode() + b"\xe5\xff,A1\n" + "好,B2\n".encode()
+        records = await _collect(iter_csv_records(iter_lines(_stream(body))))
+
+        assert isinstance(records[0], ValueError)
+        assert "UTF-8" in str(records[0])
+        assert records[1] == {"name": "好", "sku": "B2"}
+
+
+class TestCooccurrenceIndex:
+    """共同购买推荐测试"""
+
+    def test_related_ranking(self):
+        """测试按共同购买次数排序"""
+        index = CooccurrenceIndex(max_basket_size=10)
+        index.add_order(1, [(1, "手机"), (2, "手机壳")])
+        index.add_order(2, [(1, "手机"), (2, "手机壳"), (3, "耳机")])
+        index.add_order(3, [(1, "手机"), (3, "耳机")])
+        index.add_order(4, [(1, "手机"), (2, "手机壳")])
+
+        related = index.related(1, limit=10)
+        assert [item["product_id"] for item in related] == [2, 3]
+        assert related[0]["co_occurrences"] == 3
+        assert related[0]["confidence"] == 0.75
+        assert index.related(4, limit=10) == []
+
+    def test_large_basket_skips_pairs(self):
+        """测试超大订单不计入共同购买"""
+        index = CooccurrenceIndex(max_basket_size=2)
+        index.add_order(1, [(1, "a"), (2, "b"), (3, "c")])
+        assert index.related(1, limit=10) == []
+
+
+class TestDemandForecast:
+    """需求预测测试"""
+
+    def test_model_selection(self):
+        """测试稳定销售用 SES，间歇销售用 Croston"""
+        sales = np.array([
+            [4.0] * 10,
+            [0, 0, 6, 0, 0, 6, 0, 0, 6, 0],
+            [0.0] * 10,
+        ])
+        forecast, std, intermittent = forecast_demand(sales, alpha=0.2)
+
+        assert intermittent.tolist() == [False, True, True]
+        assert forecast[0] == pytest.approx(4.0)
+        assert forecast[1] == pytest.approx(2.0, rel=0.2)
+        assert forecast[2] == 0
+        assert std[0] == 0
+
+    def test_reorder_metrics(self):
+        """测试可售天数与补货点"""
+        forecast = np.array([2.0, 0.0])
+        std = np.array([1.0, 0.0])
+        stock = np.array([10.0, 5.0])
+        days_of_cover, reorder_point = reorder_metrics(forecast, std, stock, 4, 1.5)
+
+        assert days_of_cover[0] == 5
+        assert np.isinf(days_of_cover[1])
+        assert reorder_point.tolist() == [11, 0]
+
+
+class TestCustomerSearchTokens:
+    """客户搜索分词测试"""
+
+    def _customer(self, **fields):
+        data = {"email": "user@example.com", "first_name": "", "last_name": ""}
+        data.update(fields)
+        return Customer(**data)
+
+    def _matches(self, customer, query):
+        tokens = customer_tokens(customer)
+        return all(query_grams(word) <= tokens for word in words(query))
+
+    def test_full_name_either_order(self):
+        """测试姓名正序、倒序与连写均可命中"""
+        customer = self._customer(first_name="San", last_name="Zhang")
+        for query in ("San Zhang", "Zhang San", "zhangsan", "ZHANG", "zh"):
+            assert self._matches(customer, query)
+        assert not self._matches(customer, "Li")
+
+    def test_chinese_name(self):
+        """测试中文姓名按字与双字检索"""
+        customer = self._customer(first_name="三", last_name="张")
+        for query in ("张三", "张", "三"):
+            assert self._matches(customer, query)
+        assert not self._matches(customer, "李四")
+
+    def test_phone_and_fullwidth(self):
+        """测试电话号码片段与全角字符归一化"""
+        customer = self._customer(phone="138-0013-8000", city="Ｂｅｉｊｉｎｇ")
+        assert self._matches(customer, "0013 8000")
+        assert self._matches(customer, "beijing")
+
+
+class TestCustomerSegments:
+    """RFM 分群测试"""
+
+    def test_quintile_scores(self):
+        """测试五分位评分与并列值处理"""
+        assert quintile_scores(np.arange(10)).tolist() == [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+        assert set(quintile_scores(np.ones(7)).tolist()) == {3}
+
+    def test_accumulator_chunks(self):
+        """测试分块累加结果与一次性累加一致"""
+        accumulator = OrderAccumulator(np.array([1, 2, 3]))
+        accumulator.add(np.array([1, 2, 9]), np.array([100, 200, 300]), np.array([10.0, 20.0, 5.0]))
+        accumulator.add(np.array([1]), np.array([50]), np.array([30.0]))
+
+        assert accumulator.frequency.tolist() == [2, 1, 0]
+        assert accumulator.monetary.tolist() == [40.0, 20.0, 0.0]
+        assert accumulator.first[0] == 50
+        assert accumulator.last[0] == 100
+
+    def test_score_customers(self):
+        """测试只为有订单的客户评分"""
+        accumulator = OrderAccumulator(np.array([1, 2]))
+        accumulator.add(np.array([1, 1]), np.array([0, 86400 * 30]), np.array([50.0, 50.0]))
+        scores = score_customers(accumulator, now=86400 * 40, horizon_years=1.0)
+
+        assert scores["customer_id"].tolist() == [1]
+        assert scores["recency_days"].tolist() == [10]
+        assert scores["clv"][0] == round(50.0 * 2 / 40 * 365, 2)
+
+    def test_assign_segments(self):
+        """测试分群规则"""
+        r = np.array([5, 3, 5, 1, 1, 3])
+        f = np.array([5, 3, 1, 4, 1, 1])
+        assert assign_segments(r, f).tolist() == [
+            "champions", "loyal", "new", "at_risk", "hibernating", "need_attention",
+        ]
+
+
+class TestCohortRetention:
+    """同期群留存测试"""
+
+    def test_month_index(self):
+        """测试整数月份编号"""
+        from datetime import datetime
+
+        months = month_index([datetime(2024, 1, 31), datetime(2024, 2, 1)])
+        assert months[1] - months[0] == 1
+
+    def test_accumulate_retention(self):
+        """测试按同期群与月份偏移累加活跃客户"""
+        cohort = np.array([0, 0, 1, -1])
+        activity = np.array([
+            [True, False, True],
+            [True, True, False],
+            [True, True, True],
+            [True, True, True],
+        ])
+        sizes, counts = accumulate_retention(cohort, activity, 3)
+
+        assert sizes.tolist() == [2, 1, 0]
+        assert counts[0].tolist() == [2, 1, 1]
+        assert counts[1].tolist() == [1, 1, 0]
+        assert counts[2].tolist() == [0, 0, 0]
+
+
+class TestCustomerImportBatch:
+    """客户批量导入批内去重测试"""
+
+    def _rows(self, policy):
+        rows = {}
+        added = [
+            add_to_batch(rows, {"email": "a@x.com", "first_name": "A", "city": "Paris"}, policy),
+            add_to_batch(rows, {"email": "a@x.com", "first_name": "B", "city": None}, policy),
+        ]
+        return rows, added
+
+    def test_merge_keeps_latest_values(self):
+        """测试合并策略下后出现的非空值覆盖先前值"""
+        rows, added = self._rows("merge")
+        assert added == [True, False]
+        assert rows["a@x.com"] == {"email": "a@x.com", "first_name": "B", "city": "Paris"}
+
+    def test_skip_keeps_first_row(self):
+        """测试跳过策略下保留首次出现的行"""
+        rows, added = self._rows("skip")
+        assert added == [True, False]
+        assert rows["a@x.com"]["first_name"] == "A"
+
+
+class TestCustomerDedup:
+    """重复客户检测测试"""
+
+    def test_profile_normalization(self):
+        """测试电话、姓名顺序与邮箱本地部分归一化"""
+        a = build_profile("Zhang.San+shop@x.com", "San", "Zhang", "+86 138-0013-8000", "Beijing")
+        b = build_profile("zhangsan@y.com", "Zhang", "San", "13800138000", "beijing")
+
+        assert a == b
+
+    def test_blocking_limits_comparisons(self):
+        """测试只比较共享分块键的客户"""
+        profiles = [
+            build_profile("a@x.com", "San", "Zhang", "13800138000", None),
+            build_profile("b@x.com", "Si", "Li", "13800138000", None),
+            build_profile("c@x.com", "Wu", "Wang", "13900000000", None),
+        ]
+        assert candidate_pairs(profiles, max_block_size=50) == {(0, 1)}
+        assert candidate_pairs(profiles, max_block_size=1) == set()
+
+    def test_score_ignores_missing_fields(self):
+        """测试缺失字段不计入相似度"""
+        a = build_profile("zhang.san@x.com", "San", "Zhang", None, "Beijing")
+        b = build_profile("zhangsan@y.com", "San", "Zhang", "13800138000", "Beijing")
+        score, reasons = score_pair(a, b)
+
+        assert score == 1.0
+        assert reasons == ["name", "email", "city"]
+
+    def test_scan_maps_customer_ids(self):
+        """测试扫描结果使用客户 ID，较早的客户在前"""
+        customers = [
+            (7, "zhang.san@x.com", "San", "Zhang", "13800138000", "Beijing"),
+            (9, "li@x.com", "Si", "Li", None, "Shanghai"),
+            (12, "zhangsan@y.com", "Zhang", "San", "+86 13800138000", "beijing"),
+        ]
+        matches = scan_duplicates(customers, max_block_size=50, min_score=0.6)
+
+        assert [(a, b) for a, b, _, _ in matches] == [(7, 12)]
+